@@ -0,0 +1,154 @@
+import logging
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from app.core.database import get_db
+from app.models.analytics import DailySales, OrderStatusCount, ProductSales, FarmerSales
+from app.models.product import Product, Farmer
+from app.models.user import User
+from app.api.deps import get_current_admin
+from app.schemas.analytics import DailySalesResponse, ProductSalesResponse, FarmerSalesResponse
+from app.schemas.response import MessageResponse
+from app.utils.rollups import rebuild_rollups
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Upper bound on a daily range so a response never grows with history
+MAX_DAILY_RANGE_DAYS = 366
+
+
+@router.get("/daily", response_model=DailySalesResponse)
+async def get_daily_sales(
+    start_date: Optional[date] = Query(None, description="First day (default: 30 days ago)"),
+    end_date: Optional[date] = Query(None, description="Last day (default: today)"),
+    db: AsyncSession = Depends(get_db),
+    admin: User = Depends(get_current_admin)
+):
+    """Daily order count and revenue (cancelled orders excluded). Admin only."""
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=29)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    if (end_date - start_date).days >= MAX_DAILY_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range cannot exceed {MAX_DAILY_RANGE_DAYS} days")
+
+    # Each day is spread over rollup shards; sum them
+    result = await db.execute(
+        select(
+            DailySales.day,
+            func.sum(DailySales.order_count).label("order_count"),
+            func.sum(DailySales.revenue).label("revenue"),
+        )
+        .where(DailySales.day >= start_date, DailySales.day <= end_date)
+        .group_by(DailySales.day)
+        .order_by(DailySales.day)
+    )
+    days = result.all()
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "days": [{"day": d.day, "order_count": d.order_count, "revenue": d.revenue} for d in days],
+        "order_count": sum(d.order_count for d in days),
+        "revenue": sum(d.revenue for d in days),
+    }
+
+
+@router.get("/status", response_model=Dict[str, int])
+async def get_status_counts(
+    db: AsyncSession = Depends(get_db),
+    admin: User = Depends(get_current_admin)
+):
+    """Number of orders currently in each status. Admin only."""
+    result = await db.execute(
+        select(OrderStatusCount.status, func.sum(OrderStatusCount.order_count))
+        .group_by(OrderStatusCount.status)
+    )
+    return {status: count for status, count in result}
+
+
+@router.get("/products", response_model=List[ProductSalesResponse])
+async def get_product_sales(
+    limit: int = Query(20, ge=1, le=100, description="Number of products"),
+    db: AsyncSession = Depends(get_db),
+    admin: User = Depends(get_current_admin)
+):
+    """Top products by revenue with quantity sold. Admin only."""
+    sales = (
+        select(
+            ProductSales.product_id,
+            func.sum(ProductSales.quantity).label("quantity"),
+            func.sum(ProductSales.revenue).label("revenue"),
+        )
+        .group_by(ProductSales.product_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(sales, Product.name, Product.unit, Product.farmer_id)
+        .join(Product, Product.id == sales.c.product_id)
+        .order_by(sales.c.revenue.desc(), sales.c.product_id)
+        .limit(limit)
+    )
+    return [
+        {
+            "product_id": row.product_id,
+            "name": row.name,
+            "unit": row.unit,
+            "farmer_id": row.farmer_id,
+            "quantity": row.quantity,
+            "revenue": row.revenue,
+        }
+        for row in result
+    ]
+
+
+@router.get("/farmers", response_model=List[FarmerSalesResponse])
+async def get_farmer_sales(
+    limit: int = Query(20, ge=1, le=100, description="Number of farmers"),
+    db: AsyncSession = Depends(get_db),
+    admin: User = Depends(get_current_admin)
+):
+    """Top farmers by revenue with quantity sold. Admin only."""
+    sales = (
+        select(
+            FarmerSales.farmer_id,
+            func.sum(FarmerSales.quantity).label("quantity"),
+            func.sum(FarmerSales.revenue).label("revenue"),
+        )
+        .group_by(FarmerSales.farmer_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(sales, Farmer.name)
+        .join(Farmer, Farmer.id == sales.c.farmer_id)
+        .order_by(sales.c.revenue.desc(), sales.c.farmer_id)
+        .limit(limit)
+    )
+    return [
+        {
+            "farmer_id": row.farmer_id,
+            "name": row.name,
+            "quantity": row.quantity,
+            "revenue": row.revenue,
+        }
+        for row in result
+    ]
+
+
+@router.post("/rebuild", response_model=MessageResponse)
+async def rebuild_analytics(
+    db: AsyncSession = Depends(get_db),
+    admin: User = Depends(get_current_admin)
+):
+    """
+    Recompute all rollups from order history. Admin only.
+
+    Rollups are maintained incrementally; this is only needed to backfill
+    orders placed before analytics existed.
+    """
+    await rebuild_rollups(db)
+    await db.commit()
+    logger.info(f"Analytics rollups rebuilt by {admin.email}")
+    return {"message": "Analytics rebuilt"}
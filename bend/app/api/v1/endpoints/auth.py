@@ -17,6 +17,7 @@ from app.core.security import (
 from app.core.config import settings
 from app.api.deps import get_current_user
 from app.models.user import User
+from app.schemas.user import TokenResponse, LogoutResponse
 import logging
 
 logger = logging.getLogger(__name__)
@@ -58,7 +59,7 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
-@router.post("/register")
+@router.post("/register", response_model=TokenResponse)
 async def register(
     payload: RegisterRequest,
     db: AsyncSession = Depends(get_db),
@@ -103,7 +104,7 @@ async def register(
     }
 
 
-@router.post("/login")
+@router.post("/login", response_model=TokenResponse)
 @limiter.limit("5/minute")
 async def login(
     request: Request,
@@ -137,7 +138,7 @@ async def login(
     }
 
 
-@router.post("/logout")
+@router.post("/logout", response_model=LogoutResponse)
 async def logout(token: str = Depends(oauth2_scheme)):
     """
     Logout user by blacklisting their token.
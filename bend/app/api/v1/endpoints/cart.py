@@ -0,0 +1,94 @@
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from typing import List
+from app.core.database import get_db
+from app.schemas.cart import HoldRequest, HoldResponse, QuoteRequest, QuoteResponse, AvailabilityLine, ReleaseResponse
+from app.utils.holds import place_holds, release_holds, get_availability, hold_client_key
+from app.utils.quotes import build_quote
+from app.middleware.rate_limit import get_client_ip
+
+logger = logging.getLogger(__name__)
+
+# Import limiter (will be no-op if slowapi not installed)
+try:
+    from app.middleware.rate_limit import limiter
+except ImportError:
+    class NoOpLimiter:
+        def limit(self, limit_string):
+            def decorator(func):
+                return func
+            return decorator
+    limiter = NoOpLimiter()
+router = APIRouter()
+
+
+@router.post("/holds", response_model=HoldResponse)
+@limiter.limit("60/minute")
+async def hold_cart_stock(
+    request: Request,
+    payload: HoldRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    PUBLIC ENDPOINT - Hold stock for a cart while the customer checks out.
+
+    Holds expire after CART_HOLD_TTL_SECONDS. Send the returned ``hold_id``
+    again to replace the holds when the cart changes (this also extends
+    them), and with the order (``hold_id`` in POST /orders) to convert them.
+    If any line cannot be held nothing is held and every failing line is
+    reported in ``failures``, like checkout. Each client may hold at most
+    CART_HOLD_MAX_UNITS_PER_CLIENT units at once (and
+    CART_HOLD_MAX_UNITS_PER_PRODUCT of one product); beyond that the
+    request is rejected with 429.
+    """
+    try:
+        client_key = hold_client_key(get_client_ip(request))
+        result = await place_holds(db, payload.items, payload.hold_id, client_key)
+        await db.commit()
+        return result
+    except HTTPException:
+        await db.rollback()
+        raise
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Database error placing stock holds: {e}")
+        raise HTTPException(status_code=500, detail="Failed to hold stock. Please try again.")
+
+
+@router.delete("/holds/{hold_id}", response_model=ReleaseResponse)
+async def release_cart_stock(
+    hold_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """PUBLIC ENDPOINT - Release a cart's holds (cart emptied or abandoned)."""
+    released = await release_holds(db, hold_id)
+    await db.commit()
+    return {"released": released}
+
+
+@router.get("/availability", response_model=List[AvailabilityLine])
+async def get_stock_availability(
+    product_ids: List[int] = Query(..., min_length=1, max_length=100, description="Products to check"),
+    db: AsyncSession = Depends(get_db)
+):
+    """PUBLIC ENDPOINT - Stock, live holds and available quantity per product."""
+    return await get_availability(db, product_ids)
+
+
+@router.post("/quote", response_model=QuoteResponse)
+@limiter.limit("60/minute")
+async def quote_cart(
+    request: Request,
+    payload: QuoteRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    PUBLIC ENDPOINT - Current prices, line totals and availability for a cart.
+
+    One query prices the whole cart. The quoted prices are kept for
+    QUOTE_TTL_SECONDS; send ``quote_id`` with the order so it is checked
+    against (and charged at) these prices.
+    """
+    return await build_quote(db, payload.items, payload.hold_id)
@@ -7,12 +7,15 @@ from app.core.database import get_db
 from app.models.product import Farmer
 from sqlalchemy import select
 from app.utils.storage import upload_to_minio
+from app.utils.catalog import invalidate_catalog
 from fastapi import UploadFile, File, Form
-from typing import Optional
+from typing import List, Optional
 from sqlalchemy.orm import selectinload
 from app.core.security import get_password_hash
 from app.models.user import User
 from app.api.deps import get_current_admin, get_current_user
+from app.schemas.product import FarmerResponse, FarmerDetailResponse
+from app.schemas.user import FarmerSavedResponse
 from pydantic import EmailStr, validate_email
 from pydantic_core import PydanticCustomError
 
@@ -41,14 +44,14 @@ def validate_email_format(email: str) -> str:
         raise HTTPException(status_code=400, detail="Invalid email format")
 
 
-@router.get("/")
+@router.get("/", response_model=List[FarmerResponse])
 async def list_farmers(db: AsyncSession = Depends(get_db)):
     """Get all farmers. Public endpoint for storefront."""
     result = await db.execute(select(Farmer))
     return result.scalars().all()
 
 
-@router.post("/")
+@router.post("/", response_model=FarmerSavedResponse)
 async def register_farmer(
     name: str = Form(..., min_length=2, max_length=100),
     email: str = Form(...),
@@ -108,7 +111,7 @@ async def register_farmer(
         logger.error(f"Error creating farmer: {e}")
         raise HTTPException(status_code=500, detail="Failed to create farmer account")
 
-@router.put("/{farmer_id}")
+@router.put("/{farmer_id}", response_model=FarmerSavedResponse)
 async def update_farmer(
     farmer_id: int,
     name: Optional[str] = Form(None, min_length=2, max_length=100),
@@ -139,6 +142,8 @@ async def update_farmer(
             farmer.profile_pic = await upload_to_minio(file)
 
         await db.commit()
+        # Catalog pages embed the farmer
+        invalidate_catalog()
         return {"message": "Farmer updated", "farmer_id": farmer.id}
 
     except Exception as e:
@@ -147,7 +152,7 @@ async def update_farmer(
         raise HTTPException(status_code=500, detail="Failed to update farmer")
 
 
-@router.get("/{farmer_id}")
+@router.get("/{farmer_id}", response_model=FarmerDetailResponse)
 async def get_farmer_details(farmer_id: int, db: AsyncSession = Depends(get_db)):
     result = await db.execute(
         select(Farmer)
@@ -1,19 +1,48 @@
+import asyncio
+import csv
+import io
 import logging
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from collections import defaultdict
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import select, func
+from sqlalchemy import select, func, insert, update, exists, false, tuple_
 from sqlalchemy.orm import selectinload
 from pydantic import EmailStr
-from typing import Optional
+from typing import List, Optional, Union
+from datetime import datetime, date
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.events import broker, order_topic, publish_order_events
 from app.models.product import Product
 from app.models.order import Order, OrderItem
+from app.models.archive import ArchivedOrder, ArchivedOrderItem
 from app.models.user import User
 from app.api.deps import get_current_user
-from app.schemas.order import OrderCreate, OrderItemCreate
-from app.schemas.enums import OrderStatus
-from app.utils.pagination import PaginationParams
+from app.schemas.order import (
+    OrderCreate, OrderItemCreate, BulkHarvestRequest, BulkStatusUpdate,
+    OrderResponse, TrackedOrderResponse, OrderPlacedResponse, OrderCancelledResponse, OrderStatusResponse,
+    BulkStatusResponse, HarvestResponse, BulkHarvestResponse, FarmerOrderItem, PickListResponse, ArchiveResponse,
+)
+from app.schemas.enums import OrderStatus, StockMovementReason, ORDER_STATUS_TRANSITIONS, statuses_allowing
+from app.utils.pagination import (
+    PaginationParams, CursorPage, encode_cursor, decode_cursor, offset_page, offset_or_cursor_page,
+)
+from app.utils.counting import count_cache, get_total
+from app.utils.rollups import SaleLine, record_order_placed, record_status_changes
+from app.utils.stock import aggregate_quantities, reserve_stock, restore_stock
+from app.utils.ledger import record_movements
+from app.utils.holds import release_holds
+from app.utils.quotes import verify_prices
+from app.utils.catalog import invalidate_catalog
+from app.utils.idempotency import run_idempotent, request_fingerprint
+from app.utils.manifest import manifest_cache, invalidate_order_dates, stream_manifest
+from app.utils.archive import ARCHIVED_ORDER_COLUMNS, ARCHIVED_ITEM_COLUMNS, archive_closed_orders
+from app.utils.outbox import (
+    ORDER_CREATED, ORDER_CANCELLED, ORDER_ITEMS_HARVESTED, enqueue_event, enqueue_events, notify_dispatcher,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -30,147 +59,297 @@ except ImportError:
 router = APIRouter()
 
 
-@router.get("/")
+def _farmer_orders_clause(farmer_id: int):
+    """Orders containing at least one of the farmer's products."""
+    return exists().where(
+        OrderItem.order_id == Order.id,
+        OrderItem.product_id == Product.id,
+        Product.farmer_id == farmer_id,
+    )
+
+
+def _order_fields(order: Order) -> dict:
+    """Column values of an order, without touching its relationships."""
+    return {column.key: getattr(order, column.key) for column in Order.__table__.columns}
+
+
+async def _with_farmer_items(db: AsyncSession, orders: list, farmer_id: int) -> list:
+    """
+    Attach only the farmer's own items to each order.
+
+    Items are loaded with one query filtered on the farmer in SQL. The
+    result is a list of plain dicts, so the ``Order.items`` relationships in
+    the session are never loaded partially or reassigned.
+    """
+    if not orders:
+        return []
+
+    result = await db.execute(
+        select(OrderItem)
+        .join(Product)
+        .options(selectinload(OrderItem.product).selectinload(Product.farmer))
+        .where(
+            OrderItem.order_id.in_([order.id for order in orders]),
+            Product.farmer_id == farmer_id,
+        )
+        .order_by(OrderItem.id)
+    )
+    items_by_order = defaultdict(list)
+    for item in result.scalars():
+        items_by_order[item.order_id].append(item)
+
+    return [{**_order_fields(order), "items": items_by_order[order.id]} for order in orders]
+
+
+@router.get("/", response_model=offset_or_cursor_page(OrderResponse))
 async def get_orders(
     status: Optional[OrderStatus] = None,
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    mode: str = Query("offset", pattern="^(offset|cursor)$", description="Pagination mode"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page (implies cursor mode)"),
+    include_total: bool = Query(True, description="Set to false to skip counting (infinite scroll)"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get orders with pagination. Admins see all, farmers see only their products."""
-    # Base query with eager loading
-    query = select(Order).options(
-        selectinload(Order.items).selectinload(OrderItem.product).selectinload(Product.farmer)
-    )
+    """
+    Get orders with pagination. Admins see all, farmers see only their products.
+
+    Offset mode (default) returns page numbers and totals. Cursor mode
+    (``mode=cursor`` or any ``cursor``) walks ``(created_at, id)`` with a
+    keyset and returns ``next_cursor``; its cost does not grow with depth.
+    Offset totals are cached until the next order write.
+    """
+    query = select(Order)
+    count_query = select(func.count()).select_from(Order)
+    count_filters = {}
 
     if status:
         query = query.where(Order.status == status.value)
+        count_query = count_query.where(Order.status == status.value)
+        count_filters["status"] = status.value
 
     # Logic for Farmers (Siloed View)
-    if current_user.role == "farmer":
-        query = query.join(OrderItem).join(Product).where(Product.farmer_id == current_user.farmer_id)
+    is_farmer = current_user.role == "farmer"
+    if is_farmer:
+        query = query.where(_farmer_orders_clause(current_user.farmer_id))
+        count_query = count_query.where(_farmer_orders_clause(current_user.farmer_id))
+        count_filters["farmer_id"] = current_user.farmer_id
+    else:
+        # Logic for Admins (Master View): eager load every item
+        query = query.options(
+            selectinload(Order.items).selectinload(OrderItem.product).selectinload(Product.farmer)
+        )
 
-        # Get total count for pagination
-        count_query = select(func.count(func.distinct(Order.id))).select_from(Order).join(OrderItem).join(Product).where(Product.farmer_id == current_user.farmer_id)
-        if status:
-            count_query = count_query.where(Order.status == status.value)
-        total = (await db.execute(count_query)).scalar() or 0
+    query = query.order_by(Order.created_at.desc(), Order.id.desc())
+    use_cursor = mode == "cursor" or cursor is not None
+
+    if use_cursor:
+        if cursor:
+            created_at, order_id = decode_cursor(cursor, 2)
+            try:
+                created_at = datetime.fromisoformat(created_at)
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            if not isinstance(order_id, int):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            query = query.where(tuple_(Order.created_at, Order.id) < tuple_(created_at, order_id))
+
+        # Fetch one extra row to know whether another page exists
+        result = await db.execute(query.limit(page_size + 1))
+        orders = result.scalars().all()
+        next_cursor = None
+        if len(orders) > page_size:
+            orders = orders[:page_size]
+            next_cursor = encode_cursor(orders[-1].created_at, orders[-1].id)
+    else:
+        # Get total count for pagination (cached, or skipped if not wanted)
+        total, total_is_estimate = await get_total(db, count_query, "orders", count_filters, include_total)
 
         # Apply pagination
         offset = (page - 1) * page_size
-        query = query.order_by(Order.created_at.desc()).offset(offset).limit(page_size)
-        result = await db.execute(query)
-        orders = result.scalars().unique().all()
-
-        # Strip out items that don't belong to this farmer
-        for order in orders:
-            order.items = [item for item in order.items if item.product.farmer_id == current_user.farmer_id]
-
-        return {
-            "items": orders,
-            "total": total,
-            "page": page,
-            "page_size": page_size,
-            "total_pages": (total + page_size - 1) // page_size if page_size > 0 else 0
-        }
-
-    # Logic for Admins (Master View)
-    count_query = select(func.count()).select_from(Order)
-    if status:
-        count_query = count_query.where(Order.status == status.value)
-    total = (await db.execute(count_query)).scalar() or 0
+        result = await db.execute(query.offset(offset).limit(page_size))
+        orders = result.scalars().all()
 
-    # Apply pagination
-    offset = (page - 1) * page_size
-    query = query.order_by(Order.created_at.desc()).offset(offset).limit(page_size)
-    result = await db.execute(query)
-    orders = result.scalars().unique().all()
+    if is_farmer:
+        orders = await _with_farmer_items(db, orders, current_user.farmer_id)
 
-    return {
-        "items": orders,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size if page_size > 0 else 0
-    }
+    if use_cursor:
+        return {"items": orders, "page_size": page_size, "next_cursor": next_cursor}
 
+    return offset_page(orders, total, page, page_size, total_is_estimate)
 
-@router.patch("/{order_id}/cancel")
+
+@router.patch("/{order_id}/cancel", response_model=OrderCancelledResponse)
 async def cancel_order(
     order_id: int,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # Fetch order with items and products
+    """
+    Cancel an order and return its items to stock.
+
+    The status change is a conditional UPDATE guarded on the status just
+    read, so of two concurrent cancels (or a cancel racing a status update)
+    only one wins and stock is restored exactly once, with a single
+    set-based UPDATE across every product in the order.
+    """
     result = await db.execute(
-        select(Order)
-        .options(selectinload(Order.items).selectinload(OrderItem.product))
+        select(Order.status, Order.delivery_date)
         .where(Order.id == order_id)
+        .with_for_update()
     )
-    order = result.scalar_one_or_none()
+    order = result.one_or_none()
 
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    if order.status == "cancelled":
+    if order.status == OrderStatus.CANCELLED.value:
         raise HTTPException(status_code=400, detail="Order already cancelled")
 
-    if order.status == "delivered":
+    if order.status == OrderStatus.DELIVERED.value:
         raise HTTPException(status_code=400, detail="Cannot cancel delivered order")
 
-    # Restore stock for each item
-    for item in order.items:
-        product = item.product
-        product.stock_qty += item.quantity
+    result = await db.execute(
+        update(Order)
+        .where(Order.id == order_id, Order.status == order.status)
+        .values(status=OrderStatus.CANCELLED.value)
+        .returning(Order.id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.scalar_one_or_none() is None:
+        # Another request changed the order between the read and the update
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Order was updated concurrently, please retry")
+
+    result = await db.execute(
+        select(OrderItem.product_id, func.sum(OrderItem.quantity).label("quantity"))
+        .where(OrderItem.order_id == order_id)
+        .group_by(OrderItem.product_id)
+        .order_by(OrderItem.product_id)
+    )
+    quantities = {row.product_id: row.quantity for row in result}
+    await restore_stock(db, quantities, order_id)
 
-    order.status = "cancelled"
+    await record_status_changes(db, {order_id: order.status}, OrderStatus.CANCELLED.value)
+    await enqueue_event(db, ORDER_CANCELLED, {
+        "order_id": order_id,
+        "previous_status": order.status,
+        "items": [{"product_id": pid, "quantity": qty} for pid, qty in quantities.items()],
+    })
     await db.commit()
+    notify_dispatcher()
+    count_cache.invalidate("orders")
+    invalidate_catalog()
+    manifest_cache.invalidate(order.delivery_date)
+    await publish_order_events({order_id: {"type": "status", "status": OrderStatus.CANCELLED.value}})
     return {"status": "cancelled", "message": "Stock restored"}
 
 
-@router.post("/")
-async def create_order(order_data: OrderCreate, db: AsyncSession = Depends(get_db)):
-    """Create a new order. Validates stock availability and reduces stock."""
+async def _place_order(db: AsyncSession, order_data: OrderCreate) -> dict:
+    """Reserve stock and insert the order and its items. Does not commit."""
+    # Atomically check and decrement stock for the whole cart; the cart's
+    # own hold counts as available and is converted (deleted) afterwards
+    reserved = await reserve_stock(db, order_data.items, order_data.hold_id)
+    # Check the client's prices against its quote, or the prices just reserved at
+    verify_prices(order_data, {pid: row["price"] for pid, row in reserved.items()})
+    if order_data.hold_id:
+        await release_holds(db, order_data.hold_id)
+
+    # Create the Main Order
+    new_order = Order(
+        customer_name=order_data.customer_name,
+        customer_email=order_data.customer_email,
+        address=order_data.address,
+        total_price=order_data.total_price
+    )
+    db.add(new_order)
+    await db.flush()
+    await record_movements(
+        db,
+        {product_id: -quantity for product_id, quantity in aggregate_quantities(order_data.items).items()},
+        StockMovementReason.ORDER,
+        order_id=new_order.id,
+    )
+
+    # Create the OrderItems with a single multi-row insert
+    await db.execute(
+        insert(OrderItem),
+        [
+            {
+                "order_id": new_order.id,
+                "product_id": item.product_id,
+                "quantity": item.quantity,
+                "price_at_time": item.price,
+            }
+            for item in order_data.items
+        ],
+    )
+
+    await record_order_placed(db, new_order.id, new_order.created_at, [
+        SaleLine(item.product_id, reserved[item.product_id]["farmer_id"], item.quantity, item.price)
+        for item in order_data.items
+    ])
+    await enqueue_event(db, ORDER_CREATED, {
+        "order_id": new_order.id,
+        "created_at": new_order.created_at,
+        "customer_name": new_order.customer_name,
+        "total_price": new_order.total_price,
+        "items": [
+            {
+                "product_id": item.product_id,
+                "farmer_id": reserved[item.product_id]["farmer_id"],
+                "quantity": item.quantity,
+                "price": item.price,
+            }
+            for item in order_data.items
+        ],
+    })
+    return {"status": "success", "order_id": new_order.id}
+
+
+@router.post("/", response_model=OrderPlacedResponse)
+async def create_order(
+    order_data: OrderCreate,
+    db: AsyncSession = Depends(get_db),
+    idempotency_key: Optional[str] = Header(
+        None,
+        alias="Idempotency-Key",
+        min_length=1,
+        max_length=255,
+        description="Client-generated key; retries with the same key return the first response",
+    ),
+):
+    """
+    Create a new order. Validates stock availability and reduces stock.
+
+    Stock is reserved with a single conditional UPDATE, so concurrent
+    checkouts cannot oversell. Stock held for other carts is unavailable;
+    pass ``hold_id`` to check out against (and convert) this cart's hold.
+    Line prices and ``total_price`` must match the quote named by
+    ``quote_id`` (or current prices); otherwise the order is rejected with
+    409 and each difference is listed in ``failures``. If any line cannot be reserved the whole
+    order is rolled back and every failing line is reported in ``failures``.
+
+    Send an ``Idempotency-Key`` header to make retries safe: the first
+    response is stored and replayed for repeats of the same key.
+    """
     try:
-        # Check and Update Stock for each item
-        for item in order_data.items:
-            product_result = await db.execute(select(Product).where(Product.id == item.product_id))
-            product = product_result.scalar_one_or_none()
-
-            if not product:
-                raise HTTPException(status_code=404, detail=f"Product {item.product_id} not found")
-
-            if product.stock_qty < item.quantity:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Only {product.stock_qty} {product.unit} of {product.name} left!"
-                )
-
-            # Reduce stock
-            product.stock_qty -= item.quantity
-
-        # Create the Main Order
-        new_order = Order(
-            customer_name=order_data.customer_name,
-            customer_email=order_data.customer_email,
-            address=order_data.address,
-            total_price=order_data.total_price
-        )
-        db.add(new_order)
-        await db.flush()
-
-        # Create the OrderItems
-        for item in order_data.items:
-            db.add(OrderItem(
-                order_id=new_order.id,
-                product_id=item.product_id,
-                quantity=item.quantity,
-                price_at_time=item.price
-            ))
+        if idempotency_key:
+            result = await run_idempotent(
+                db,
+                f"orders:{idempotency_key}",
+                request_fingerprint(order_data),
+                lambda: _place_order(db, order_data),
+            )
+        else:
+            result = await _place_order(db, order_data)
+            await db.commit()
 
-        await db.commit()
-        return {"status": "success", "order_id": new_order.id}
+        count_cache.invalidate("orders")
+        invalidate_catalog()
+        notify_dispatcher()
+        return result
 
     except HTTPException:
         await db.rollback()
@@ -185,29 +364,138 @@ async def create_order(order_data: OrderCreate, db: AsyncSession = Depends(get_d
         raise HTTPException(status_code=500, detail="An unexpected error occurred.")
 
 
-@router.patch("/{order_id}/status")
+def _check_status_target(status: OrderStatus) -> None:
+    """Cancellation must restore stock, which only the cancel endpoint does."""
+    if status == OrderStatus.CANCELLED:
+        raise HTTPException(status_code=400, detail="Use the cancel endpoint to cancel orders")
+
+
+@router.patch("/status", response_model=BulkStatusResponse)
+async def bulk_update_order_status(
+    payload: BulkStatusUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Move many orders to a new status in one request. Admin only.
+
+    Orders are selected by ``order_ids`` and/or ``delivery_date``
+    (optionally narrowed with ``from_status``), e.g. every packed order for
+    a delivery date -> delivered. A single UPDATE guarded by the allowed
+    transitions performs the move; orders whose current status does not
+    allow it are reported in ``skipped``.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    _check_status_target(payload.status)
+
+    selection = []
+    if payload.order_ids is not None:
+        selection.append(Order.id.in_(payload.order_ids))
+    if payload.delivery_date is not None:
+        selection.append(Order.delivery_date == payload.delivery_date)
+    if payload.from_status is not None:
+        selection.append(Order.status == payload.from_status.value)
+
+    # Lock the selected rows so the previous statuses stay accurate for the rollups
+    result = await db.execute(
+        select(Order.id, Order.status, Order.delivery_date).where(*selection).order_by(Order.id).with_for_update()
+    )
+    rows = result.all()
+    current = {row.id: row.status for row in rows}
+
+    allowed = [s.value for s in statuses_allowing(payload.status)]
+    eligible = [order_id for order_id, status in current.items() if status in allowed]
+
+    updated = []
+    if eligible:
+        result = await db.execute(
+            update(Order)
+            .where(Order.id.in_(eligible), Order.status.in_(allowed))
+            .values(status=payload.status.value)
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        )
+        updated = sorted(result.scalars().all())
+        await record_status_changes(db, {order_id: current[order_id] for order_id in updated}, payload.status.value)
+
+    await db.commit()
+    moved = set(updated)
+    if updated:
+        count_cache.invalidate("orders")
+        manifest_cache.invalidate(*{row.delivery_date for row in rows if row.id in moved})
+        await publish_order_events({
+            order_id: {"type": "status", "status": payload.status.value} for order_id in updated
+        })
+
+    skipped = [
+        {"order_id": order_id, "status": status}
+        for order_id, status in current.items() if order_id not in moved
+    ]
+    not_found = [order_id for order_id in payload.order_ids or [] if order_id not in current]
+    logger.info(f"Bulk status update to {payload.status.value}: {len(updated)} updated, {len(skipped)} skipped")
+    return {
+        "new_status": payload.status.value,
+        "updated": updated,
+        "skipped": skipped,
+        "not_found": not_found,
+    }
+
+
+@router.patch("/{order_id}/status", response_model=OrderStatusResponse)
 async def update_order_status(
     order_id: int,
     status: OrderStatus,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Update order status. Admin only."""
+    """
+    Update order status. Admin only.
+
+    Only moves allowed by ``ORDER_STATUS_TRANSITIONS`` are accepted;
+    cancellation goes through the cancel endpoint so stock is restored.
+    """
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
+    _check_status_target(status)
 
-    result = await db.execute(select(Order).where(Order.id == order_id))
-    order = result.scalar_one_or_none()
+    result = await db.execute(
+        select(Order.status, Order.delivery_date)
+        .where(Order.id == order_id)
+        .with_for_update()
+    )
+    order = result.one_or_none()
 
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    order.status = status.value
+    if status not in ORDER_STATUS_TRANSITIONS[OrderStatus(order.status)]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot move order from {order.status} to {status.value}",
+        )
+
+    # Guard on the status just read so a concurrent cancel cannot be overwritten
+    result = await db.execute(
+        update(Order)
+        .where(Order.id == order_id, Order.status == order.status)
+        .values(status=status.value)
+        .returning(Order.id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.scalar_one_or_none() is None:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Order was updated concurrently, please retry")
+
+    await record_status_changes(db, {order_id: order.status}, status.value)
     await db.commit()
-    return {"status": "updated", "new_status": order.status}
+    count_cache.invalidate("orders")
+    manifest_cache.invalidate(order.delivery_date)
+    await publish_order_events({order_id: {"type": "status", "status": status.value}})
+    return {"status": "updated", "new_status": status.value}
 
 
-@router.patch("/items/{item_id}/harvest")
+@router.patch("/items/{item_id}/harvest", response_model=HarvestResponse)
 async def mark_item_harvested(
     item_id: int,
     db: AsyncSession = Depends(get_db),
@@ -243,10 +531,19 @@ async def mark_item_harvested(
     all_harvested = all(i.is_harvested for i in order.items)
 
     # Auto-update order status to "packed" when all items are harvested
-    if all_harvested and order.status == "pending":
+    packed = all_harvested and order.status == "pending"
+    if packed:
+        await record_status_changes(db, {order.id: order.status}, OrderStatus.PACKED.value)
         order.status = "packed"
 
+    await enqueue_event(db, ORDER_ITEMS_HARVESTED, {
+        "order_id": order.id, "item_ids": [item_id], "order_packed": packed,
+    })
     await db.commit()
+    notify_dispatcher()
+    count_cache.invalidate("orders")
+    manifest_cache.invalidate(order.delivery_date)
+    await publish_order_events({order.id: {"type": "harvest", "item_ids": [item_id], "status": order.status}})
 
     return {
         "status": "harvested",
@@ -256,30 +553,432 @@ async def mark_item_harvested(
     }
 
 
-@router.get("/farmer-items")
+async def _pack_completed_orders(db: AsyncSession, order_ids) -> list:
+    """
+    Move pending orders whose items are all harvested to ``packed``.
+
+    One guarded UPDATE does the check and the transition, so an item
+    un-harvested or an order cancelled concurrently is never packed.
+
+    Returns:
+        IDs of the orders that changed status
+    """
+    unharvested = exists().where(OrderItem.order_id == Order.id, OrderItem.is_harvested == false())
+    result = await db.execute(
+        update(Order)
+        .where(
+            Order.id.in_(order_ids),
+            Order.status == OrderStatus.PENDING.value,
+            ~unharvested,
+        )
+        .values(status=OrderStatus.PACKED.value)
+        .returning(Order.id)
+        .execution_options(synchronize_session=False)
+    )
+    packed = sorted(result.scalars().all())
+    if packed:
+        await record_status_changes(
+            db, {order_id: OrderStatus.PENDING.value for order_id in packed}, OrderStatus.PACKED.value
+        )
+    return packed
+
+
+@router.patch("/items/harvest", response_model=BulkHarvestResponse)
+async def bulk_mark_items_harvested(
+    payload: BulkHarvestRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Mark several order items as harvested in one request.
+
+    Ownership, the harvest update and the "all items harvested -> packed"
+    transition each run as a single statement over the whole batch. Items
+    that are missing or belong to another farmer are reported per item and
+    do not fail the rest of the batch.
+    """
+    if current_user.role == "farmer" and not current_user.farmer_id:
+        raise HTTPException(status_code=403, detail="Farmer profile not linked")
+
+    result = await db.execute(
+        select(OrderItem.id, OrderItem.is_harvested, Product.farmer_id)
+        .join(Product, Product.id == OrderItem.product_id)
+        .where(OrderItem.id.in_(payload.item_ids))
+    )
+    found = {row.id: row for row in result}
+
+    statuses = {}
+    allowed = []
+    for item_id in payload.item_ids:
+        row = found.get(item_id)
+        if row is None:
+            statuses[item_id] = "not_found"
+        elif current_user.role == "farmer" and row.farmer_id != current_user.farmer_id:
+            statuses[item_id] = "forbidden"
+        elif row.is_harvested:
+            statuses[item_id] = "already_harvested"
+        else:
+            allowed.append(item_id)
+
+    packed_orders = []
+    updated = {}
+    if allowed:
+        stmt = update(OrderItem).where(OrderItem.id.in_(allowed), OrderItem.is_harvested == false())
+        if current_user.role == "farmer":
+            # Re-check ownership in the statement itself
+            stmt = stmt.where(OrderItem.product_id.in_(
+                select(Product.id).where(Product.farmer_id == current_user.farmer_id)
+            ))
+        result = await db.execute(
+            stmt.values(is_harvested=True)
+            .returning(OrderItem.id, OrderItem.order_id)
+            .execution_options(synchronize_session=False)
+        )
+        updated = {row.id: row.order_id for row in result}
+        for item_id in allowed:
+            # Lost a race with another request harvesting the same item
+            statuses[item_id] = "harvested" if item_id in updated else "already_harvested"
+
+        if updated:
+            packed_orders = await _pack_completed_orders(db, set(updated.values()))
+
+    harvested_by_order = defaultdict(list)
+    for item_id, order_id in updated.items():
+        harvested_by_order[order_id].append(item_id)
+    await enqueue_events(db, [
+        (ORDER_ITEMS_HARVESTED, {
+            "order_id": order_id,
+            "item_ids": sorted(item_ids),
+            "order_packed": order_id in packed_orders,
+        })
+        for order_id, item_ids in sorted(harvested_by_order.items())
+    ])
+
+    await db.commit()
+    notify_dispatcher()
+    if packed_orders:
+        count_cache.invalidate("orders")
+    await invalidate_order_dates(db, set(updated.values()))
+
+    if updated:
+        await publish_order_events({
+            order_id: {"type": "harvest", "item_ids": sorted(item_ids)}
+            for order_id, item_ids in harvested_by_order.items()
+        })
+        await publish_order_events({
+            order_id: {"type": "status", "status": OrderStatus.PACKED.value} for order_id in packed_orders
+        })
+
+    results = [{"item_id": item_id, "status": statuses[item_id]} for item_id in payload.item_ids]
+    return {
+        "results": results,
+        "harvested": sum(1 for r in results if r["status"] == "harvested"),
+        "packed_orders": packed_orders,
+    }
+
+
+# Rows fetched per round trip when streaming farmer items
+FARMER_ITEMS_STREAM_BATCH = 500
+# Farmer items per page when only a cursor is given
+FARMER_ITEMS_PAGE_SIZE = 50
+
+
+def _farmer_item_row(row) -> dict:
+    """Shape one flat farmer-item row as an item with its product and order."""
+    return {
+        "id": row.id,
+        "order_id": row.order_id,
+        "product_id": row.product_id,
+        "quantity": row.quantity,
+        "price_at_time": row.price_at_time,
+        "is_harvested": row.is_harvested,
+        "product": {"id": row.product_id, "name": row.product_name, "unit": row.unit},
+        "order": {
+            "id": row.order_id,
+            "status": row.status,
+            "customer_name": row.customer_name,
+            "delivery_date": row.delivery_date,
+            "created_at": row.created_at,
+        },
+    }
+
+
+async def _stream_farmer_items(bind, query):
+    """
+    Yield farmer items as NDJSON lines from a server-side cursor.
+
+    Runs on its own session: the request's session is closed once the
+    endpoint returns, before the body is streamed.
+    """
+    async with AsyncSession(bind=bind) as session:
+        result = await session.stream(query.execution_options(yield_per=FARMER_ITEMS_STREAM_BATCH))
+        async for partition in result.partitions():
+            yield b"".join(orjson.dumps(_farmer_item_row(row)) + b"\n" for row in partition)
+
+
+@router.get("/farmer-items", response_model=Union[List[FarmerOrderItem], CursorPage[FarmerOrderItem]])
 async def get_farmer_order_items(
+    harvested: Optional[bool] = Query(None, description="Only harvested (true) or unharvested (false) items"),
+    delivery_date: Optional[date] = Query(None, description="Only items of orders for this delivery date"),
+    status: Optional[OrderStatus] = Query(None, description="Only items of orders in this status"),
+    page_size: Optional[int] = Query(None, ge=1, le=200, description="Items per page (implies pages; default 50)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page (implies pages)"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="json list or pages, or an ndjson stream"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all order items for the current farmer's products."""
+    """
+    Get order items for the current farmer's products, newest first.
+
+    ``format=json`` returns a plain list of every matching item, as this
+    endpoint always has, unless ``page_size`` or ``cursor`` is given: then
+    it returns a keyset page (``next_cursor`` for the next one).
+    ``format=ndjson`` streams every matching item, one JSON object per
+    line, from a server-side cursor so memory stays flat regardless of
+    history size; ``page_size`` is ignored and ``cursor`` resumes a walk.
+    """
     if current_user.role != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can access this endpoint")
 
     if not current_user.farmer_id:
         raise HTTPException(status_code=403, detail="Farmer profile not linked")
 
-    # Query order items where the product belongs to this farmer
+    # Flat columns only: no ORM identity map or relationship loading per row
     query = (
-        select(OrderItem)
-        .options(selectinload(OrderItem.product), selectinload(OrderItem.order))
-        .join(Product)
+        select(
+            OrderItem.id,
+            OrderItem.order_id,
+            OrderItem.product_id,
+            OrderItem.quantity,
+            OrderItem.price_at_time,
+            OrderItem.is_harvested,
+            Product.name.label("product_name"),
+            Product.unit,
+            Order.status,
+            Order.customer_name,
+            Order.delivery_date,
+            Order.created_at,
+        )
+        .join(Product, Product.id == OrderItem.product_id)
+        .join(Order, Order.id == OrderItem.order_id)
         .where(Product.farmer_id == current_user.farmer_id)
+        .order_by(OrderItem.id.desc())
+    )
+    if harvested is not None:
+        query = query.where(OrderItem.is_harvested.is_(harvested))
+    if delivery_date is not None:
+        query = query.where(Order.delivery_date == delivery_date)
+    if status is not None:
+        query = query.where(Order.status == status.value)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, 1)
+        if not isinstance(last_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(OrderItem.id < last_id)
+
+    if format == "ndjson":
+        return StreamingResponse(_stream_farmer_items(db.bind, query), media_type="application/x-ndjson")
+
+    if page_size is None and cursor is None:
+        return [_farmer_item_row(row) for row in await db.execute(query)]
+
+    page_size = page_size or FARMER_ITEMS_PAGE_SIZE
+    # Fetch one extra row to know whether another page exists
+    rows = (await db.execute(query.limit(page_size + 1))).all()
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1].id)
+
+    return {
+        "items": [_farmer_item_row(row) for row in rows],
+        "page_size": page_size,
+        "next_cursor": next_cursor,
+    }
+
+
+# Orders in these statuses never need picking
+CLOSED_STATUSES = [OrderStatus.CANCELLED.value, OrderStatus.DELIVERED.value]
+
+
+def pick_list_query(farmer_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None):
+    """
+    Grouped pick-list query for one farmer.
+
+    ``is_harvested`` is compared with ``=`` rather than ``IS`` so the
+    predicate matches the partial ``ix_order_items_unharvested`` index.
+    """
+    query = (
+        select(
+            Product.id.label("product_id"),
+            Product.name,
+            Product.unit,
+            func.sum(OrderItem.quantity).label("quantity"),
+            func.count(func.distinct(OrderItem.order_id)).label("order_count"),
+        )
+        .join(OrderItem, OrderItem.product_id == Product.id)
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(
+            Product.farmer_id == farmer_id,
+            OrderItem.is_harvested == false(),
+            Order.status.notin_(CLOSED_STATUSES),
+        )
+        .group_by(Product.id, Product.name, Product.unit)
+        .order_by(Product.name)
+    )
+    if start_date:
+        query = query.where(Order.delivery_date >= start_date)
+    if end_date:
+        query = query.where(Order.delivery_date <= end_date)
+    return query
+
+
+@router.get("/pick-list", response_model=PickListResponse)
+async def get_pick_list(
+    delivery_date: Optional[date] = Query(None, description="Single delivery date"),
+    start_date: Optional[date] = Query(None, description="First delivery date of a range"),
+    end_date: Optional[date] = Query(None, description="Last delivery date of a range"),
+    farmer_id: Optional[int] = Query(None, gt=0, description="Farmer to build the list for (admins only)"),
+    format: str = Query("json", pattern="^(json|csv)$", description="json or csv"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Total quantity per product still to harvest.
+
+    Sums unharvested items of open (not cancelled or delivered) orders,
+    for one delivery date, a date range, or every open order when no date
+    is given. Computed by a single grouped query.
+    """
+    if current_user.role == "farmer":
+        if not current_user.farmer_id:
+            raise HTTPException(status_code=403, detail="Farmer profile not linked")
+        farmer_id = current_user.farmer_id
+    elif current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    elif farmer_id is None:
+        raise HTTPException(status_code=400, detail="farmer_id is required")
+
+    if delivery_date is not None:
+        if start_date or end_date:
+            raise HTTPException(status_code=400, detail="Use delivery_date or start_date/end_date, not both")
+        start_date = end_date = delivery_date
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+
+    query = pick_list_query(farmer_id, start_date, end_date)
+    rows = [row._asdict() for row in await db.execute(query)]
+
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=["product_id", "name", "unit", "quantity", "order_count"])
+        writer.writeheader()
+        writer.writerows(rows)
+        filename = f"pick-list-{start_date or 'open'}" + (f"-to-{end_date}" if end_date != start_date else "")
+        return Response(
+            content=buffer.getvalue(),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.csv"'},
+        )
+
+    return {
+        "farmer_id": farmer_id,
+        "start_date": start_date,
+        "end_date": end_date,
+        "items": rows,
+    }
+
+
+@router.get("/manifest")
+async def get_delivery_manifest(
+    delivery_date: date = Query(..., description="Delivery date"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Delivery manifest: every deliverable order for one date. Admin only.
+
+    Each entry has the customer, address, item counts and packing state.
+    The manifest is built by one query and streamed; the result is cached
+    until an order for that date changes, so repeated reloads are free.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    cached = manifest_cache.get(delivery_date)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json", headers={"X-Cache": "HIT"})
+
+    return StreamingResponse(
+        stream_manifest(db.bind, delivery_date),
+        media_type="application/json",
+        headers={"X-Cache": "MISS"},
+    )
+
+
+async def _load_tracked_order(db: AsyncSession, order_id: int, email: str):
+    """
+    Order with items and products for tracking, from the live or archive tables.
+
+    Returns:
+        The live Order, a dict of the same shape for an archived order, or None
+    """
+    result = await db.execute(
+        select(Order)
+        .options(selectinload(Order.items).selectinload(OrderItem.product))
+        .where(Order.id == order_id, Order.customer_email == email)
     )
-    result = await db.execute(query)
-    return result.scalars().all()
+    order = result.scalar_one_or_none()
+    if order:
+        return order
+
+    # Closed orders may have been moved to the archive
+    result = await db.execute(
+        select(ArchivedOrder).where(ArchivedOrder.id == order_id, ArchivedOrder.customer_email == email)
+    )
+    archived = result.scalar_one_or_none()
+    if not archived:
+        return None
+    items = await db.execute(
+        select(ArchivedOrderItem, Product)
+        .join(Product, Product.id == ArchivedOrderItem.product_id)
+        .where(
+            ArchivedOrderItem.order_id == archived.id,
+            ArchivedOrderItem.order_created_at == archived.created_at,
+        )
+        .order_by(ArchivedOrderItem.id)
+    )
+    return {
+        **{column: getattr(archived, column) for column in ARCHIVED_ORDER_COLUMNS},
+        "items": [
+            {**{column: getattr(item, column) for column in ARCHIVED_ITEM_COLUMNS}, "product": product}
+            for item, product in items
+        ],
+    }
+
+
+@router.post("/archive", response_model=ArchiveResponse)
+async def archive_orders(
+    older_than_days: Optional[int] = Query(None, ge=0, description="Age cutoff in days (default ARCHIVE_AFTER_DAYS)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Move delivered and cancelled orders older than the cutoff to the archive. Admin only.
+
+    Archived orders no longer appear in order lists but can still be
+    tracked. Normally run on a schedule with ``python -m app.utils.archive``.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
 
+    archived = await archive_closed_orders(db, older_than_days)
+    if archived:
+        count_cache.invalidate("orders")
+    return {"archived": archived}
 
-@router.get("/track")
+
+@router.get("/track", response_model=TrackedOrderResponse)
 @limiter.limit("10/minute")
 async def track_order(
     request: Request,
@@ -295,12 +994,7 @@ async def track_order(
     """
     logger.info(f"Order track request for order_id={order_id}")
 
-    result = await db.execute(
-        select(Order)
-        .options(selectinload(Order.items).selectinload(OrderItem.product))
-        .where(Order.id == order_id, Order.customer_email == email)
-    )
-    order = result.scalar_one_or_none()
+    order = await _load_tracked_order(db, order_id, email)
 
     if not order:
         # Generic message to prevent order enumeration
@@ -308,3 +1002,72 @@ async def track_order(
         raise HTTPException(status_code=404, detail="Order not found")
 
     return order
+
+
+# Statuses after which an order never changes again
+TERMINAL_STATUSES = {OrderStatus.DELIVERED.value, OrderStatus.CANCELLED.value}
+
+
+def _sse(event: str, data) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
+async def _order_event_stream(topic: str, queue, snapshot: dict):
+    """Send the snapshot, then every event for the order until it reaches a final status."""
+    try:
+        yield _sse("snapshot", snapshot)
+        if snapshot["status"] in TERMINAL_STATUSES:
+            return
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=settings.SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            yield _sse(event["type"], event)
+            if event.get("status") in TERMINAL_STATUSES:
+                return
+    finally:
+        broker.unsubscribe(topic, queue)
+
+
+@router.get("/track/stream")
+@limiter.limit("10/minute")
+async def track_order_stream(
+    request: Request,
+    order_id: int = Query(..., gt=0, description="Order ID"),
+    email: EmailStr = Query(..., description="Customer email"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    PUBLIC ENDPOINT - Follow an order as Server-Sent Events.
+
+    Authenticated like ``/track``. Sends a ``snapshot`` event with the same
+    body as ``/track``, then a ``harvest`` event whenever items are
+    harvested and a ``status`` event whenever the status changes. The
+    stream ends once the order is delivered or cancelled.
+
+    The order is read once; later events come from the in-process broker,
+    so a watching customer costs no further queries.
+    """
+    await broker.start()
+    topic = order_topic(order_id)
+    # Subscribe before reading so no change between the read and the stream is lost
+    queue = broker.subscribe(topic)
+    try:
+        order = await _load_tracked_order(db, order_id, email)
+        if not order:
+            logger.warning(f"Order stream failed: order_id={order_id} not found or email mismatch")
+            raise HTTPException(status_code=404, detail="Order not found")
+        snapshot = TrackedOrderResponse.model_validate(order).model_dump(mode="json")
+    except BaseException:
+        broker.unsubscribe(topic, queue)
+        raise
+
+    return StreamingResponse(
+        _order_event_stream(topic, queue, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,15 +1,32 @@
 import logging
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File, Form
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from sqlalchemy.orm import joinedload
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import select, func, tuple_
+from datetime import datetime
 from typing import Optional
 from app.core.database import get_db
 from app.models.product import Product
-from app.schemas.product import ProductResponse
+from app.schemas.product import (
+    ProductWithFarmerResponse, ProductSearchResult, StockUpdateResponse, ProductImportResponse,
+    InventoryPatchRequest, InventoryPatchResponse,
+)
+from app.schemas.ledger import StockMovementResponse, StockAtResponse, StockSnapshotRunResponse
+from app.schemas.enums import StockMovementReason
+from app.schemas.response import CacheStatsResponse, MessageResponse
 from app.utils.storage import upload_to_minio
 from app.models.user import User
 from app.api.deps import get_current_user, get_current_admin
+from app.utils.pagination import OffsetPage, CursorPage, offset_page, encode_cursor, decode_cursor
+from app.utils.counting import count_cache, get_total
+from app.utils.response_cache import catalog_cache
+from app.utils.search import search_products
+from app.utils.catalog import CatalogFilters, invalidate_catalog
+from app.utils.product_import import detect_format, import_products
+from app.utils.stock import set_inventory
+from app.utils.ledger import record_movements, stock_at, snapshot_stock
+from app.models.ledger import StockMovement
 
 logger = logging.getLogger(__name__)
 
@@ -33,83 +50,117 @@ except ImportError:
     logger.warning("File validation not available - python-magic may not be installed")
 router = APIRouter()
 
+ProductPage = OffsetPage[ProductWithFarmerResponse]
 
-@router.get("/")
+
+@router.get("/", response_model=ProductPage)
 async def get_products(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    include_total: bool = Query(True, description="Set to false to skip counting (infinite scroll)"),
+    filters: CatalogFilters = Depends(),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get products with pagination. Farmers see only their products."""
-    query = select(Product).options(joinedload(Product.farmer))
-    count_query = select(func.count()).select_from(Product)
-
+    """Get products with pagination, filters and sorting. Farmers see only their products."""
     if current_user.role == "farmer":
         if not current_user.farmer_id:
             raise HTTPException(status_code=403, detail="Farmer profile not linked")
-        query = query.where(Product.farmer_id == current_user.farmer_id)
-        count_query = count_query.where(Product.farmer_id == current_user.farmer_id)
+        if filters.farmer_id not in (None, current_user.farmer_id):
+            raise HTTPException(status_code=403, detail="Farmers can only list their own products")
+        filters.farmer_id = current_user.farmer_id
 
-    # Get total count
-    total = (await db.execute(count_query)).scalar() or 0
+    # Get total count (cached, or skipped if not wanted)
+    count_query = select(func.count()).select_from(Product).where(*filters.conditions())
+    total, total_is_estimate = await get_total(
+        db, count_query, filters.count_table, filters.count_filters(), include_total
+    )
 
     # Apply pagination
     offset = (page - 1) * page_size
-    query = query.order_by(Product.id.desc()).offset(offset).limit(page_size)
+    query = filters.page_query(offset, page_size)
     result = await db.execute(query)
     products = result.scalars().unique().all()
 
-    return {
-        "items": products,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size if page_size > 0 else 0
-    }
+    return offset_page(products, total, page, page_size, total_is_estimate)
 
 
-@router.get("/public")
+@router.get("/public", response_model=ProductPage)
 @limiter.limit("30/minute")
 async def get_public_products(
     request: Request,
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    include_total: bool = Query(True, description="Set to false to skip counting (infinite scroll)"),
+    filters: CatalogFilters = Depends(),
     db: AsyncSession = Depends(get_db)
 ):
     """
     PUBLIC ENDPOINT - Intentionally unauthenticated for storefront browsing.
-    Returns all products with farmer info for the public catalog.
+    Returns products with farmer info for the public catalog, optionally
+    filtered (in stock, organic, price range, farmer) and sorted by price.
+
+    Rendered pages are served from an in-process cache until the catalog
+    changes (``X-Cache: HIT``/``MISS``).
 
     Rate limited to 30 requests per minute.
     """
-    # Get total count
-    count_query = select(func.count()).select_from(Product)
-    total = (await db.execute(count_query)).scalar() or 0
+    cache_key = (page, page_size, include_total) + filters.cache_key()
+    cached = catalog_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json", headers={"X-Cache": "HIT"})
+    generation = catalog_cache.generation
+
+    # Get total count (cached; a planner estimate on very large unfiltered tables)
+    count_query = select(func.count()).select_from(Product).where(*filters.conditions())
+    total, total_is_estimate = await get_total(
+        db, count_query, filters.count_table, filters.count_filters(), include_total
+    )
 
     # Apply pagination
     offset = (page - 1) * page_size
-    query = (
-        select(Product)
-        .options(joinedload(Product.farmer))
-        .order_by(Product.id.desc())
-        .offset(offset)
-        .limit(page_size)
-    )
+    query = filters.page_query(offset, page_size)
     result = await db.execute(query)
     products = result.scalars().all()
 
-    return {
-        "items": products,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size if page_size > 0 else 0
-    }
+    # Rendered once by pydantic straight to JSON bytes, then served as-is
+    body = ProductPage.model_validate(
+        offset_page(products, total, page, page_size, total_is_estimate)
+    ).model_dump_json().encode()
+    catalog_cache.set(cache_key, body, generation)
+    return Response(content=body, media_type="application/json", headers={"X-Cache": "MISS"})
+
+
+@router.get("/search", response_model=OffsetPage[ProductSearchResult])
+@limiter.limit("60/minute")
+async def search_public_products(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100, description="Words or word prefixes to search for"),
+    page: int = Query(1, ge=1, description="Page number"),
+    page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    include_total: bool = Query(True, description="Set to false to skip counting matches"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    PUBLIC ENDPOINT - Search products by name and by farmer name, location or bio.
+
+    Every word must match (as a prefix, so "tom" finds "Tomatoes"); on
+    Postgres misspelled product names also match. Results are ordered by
+    relevance and carry a ``rank``.
+    """
+    return await search_products(db, q, page, page_size, include_total)
+
+
+@router.get("/public/cache-stats", response_model=CacheStatsResponse)
+async def get_public_cache_stats(
+    current_user: User = Depends(get_current_admin)
+):
+    """Hit/miss counters and size of the public catalog cache. Admin only."""
+    return catalog_cache.stats()
 
 # Removed duplicate endpoint - using the authenticated version above
 
-@router.patch("/{product_id}/stock")
+@router.patch("/{product_id}/stock", response_model=StockUpdateResponse)
 async def update_stock(
     product_id: int,
     qty: int,
@@ -117,7 +168,8 @@ async def update_stock(
     current_user: User = Depends(get_current_user)
 ):
     """Update product stock. Farmers can only update their own products."""
-    result = await db.execute(select(Product).where(Product.id == product_id))
+    # Locked so the ledger records the change from the current level
+    result = await db.execute(select(Product).where(Product.id == product_id).with_for_update())
     product = result.scalar_one_or_none()
 
     if not product:
@@ -131,11 +183,170 @@ async def update_stock(
     if qty < 0:
         raise HTTPException(status_code=400, detail="Stock quantity cannot be negative")
 
+    await record_movements(
+        db, {product.id: qty - product.stock_qty}, StockMovementReason.ADJUSTMENT, user_id=current_user.id
+    )
     product.stock_qty = qty
     await db.commit()
+    invalidate_catalog()
     return {"status": "success", "new_qty": product.stock_qty}
 
-@router.post("/upsert")
+
+@router.patch("/stock", response_model=InventoryPatchResponse)
+async def update_inventory(
+    payload: InventoryPatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Set stock (and optionally price) for many products at once. Farmers can only update their own products.
+
+    Every entry is applied by a single UPDATE, in one transaction, that
+    only touches the farmer's products. Entries for unknown or other
+    farmers' products, and repeats of a product, are reported in
+    ``rejected`` and do not block the rest.
+    """
+    farmer_id = None
+    if current_user.role == "farmer":
+        if not current_user.farmer_id:
+            raise HTTPException(status_code=403, detail="Farmer profile not linked")
+        farmer_id = current_user.farmer_id
+
+    stock, prices = {}, {}
+    rejected = []
+    for item in payload.items:
+        if item.product_id in stock:
+            rejected.append({"product_id": item.product_id, "reason": "duplicate"})
+            continue
+        stock[item.product_id] = item.stock_qty
+        if item.price is not None:
+            prices[item.product_id] = item.price
+
+    try:
+        rows = await set_inventory(db, stock, prices, farmer_id, current_user.id)
+        updated = {row.id: row for row in rows}
+        missing = [product_id for product_id in stock if product_id not in updated]
+        if missing:
+            # Tell unknown products apart from other farmers' products
+            result = await db.execute(select(Product.id).where(Product.id.in_(missing)))
+            existing = set(result.scalars())
+            rejected.extend(
+                {"product_id": product_id, "reason": "forbidden" if product_id in existing else "not_found"}
+                for product_id in missing
+            )
+        await db.commit()
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Database error updating inventory: {e}")
+        raise HTTPException(status_code=500, detail="Failed to update inventory. Please try again.")
+
+    if rows:
+        # Once for the whole batch
+        invalidate_catalog()
+        if prices:
+            # Price-range totals are cached under the products key
+            count_cache.invalidate("products")
+    logger.info(f"Inventory patch: {len(rows)} updated, {len(rejected)} rejected")
+    return {
+        "updated": [
+            {"product_id": product_id, "stock_qty": updated[product_id].stock_qty, "price": updated[product_id].price}
+            for product_id in stock if product_id in updated
+        ],
+        "rejected": rejected,
+    }
+
+
+async def _check_ledger_access(db: AsyncSession, product_id: int, current_user: User) -> None:
+    """404 for unknown products; farmers may only read their own products' ledgers."""
+    result = await db.execute(select(Product.farmer_id).where(Product.id == product_id))
+    farmer_id = result.scalar_one_or_none()
+    if farmer_id is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    if current_user.role == "farmer" and farmer_id != current_user.farmer_id:
+        raise HTTPException(status_code=403, detail="Not authorized to view this product")
+
+
+@router.get("/{product_id}/stock/history", response_model=CursorPage[StockMovementResponse])
+async def get_stock_history(
+    product_id: int,
+    since: Optional[datetime] = Query(None, description="Only movements after this time"),
+    until: Optional[datetime] = Query(None, description="Only movements at or before this time"),
+    reason: Optional[StockMovementReason] = Query(None, description="Only movements with this cause"),
+    page_size: int = Query(50, ge=1, le=200, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stock movements of a product, newest first. Farmers can only view their own products.
+
+    Every change to the product's stock is listed with its signed
+    ``delta``, its ``reason`` and the order or user behind it.
+    """
+    await _check_ledger_access(db, product_id, current_user)
+
+    query = (
+        select(StockMovement)
+        .where(StockMovement.product_id == product_id)
+        .order_by(StockMovement.created_at.desc(), StockMovement.id.desc())
+    )
+    if since is not None:
+        query = query.where(StockMovement.created_at > since)
+    if until is not None:
+        query = query.where(StockMovement.created_at <= until)
+    if reason is not None:
+        query = query.where(StockMovement.reason == reason.value)
+    if cursor:
+        created_at, movement_id = decode_cursor(cursor, 2)
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if not isinstance(movement_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(tuple_(StockMovement.created_at, StockMovement.id) < tuple_(created_at, movement_id))
+
+    # Fetch one extra row to know whether another page exists
+    movements = (await db.execute(query.limit(page_size + 1))).scalars().all()
+    next_cursor = None
+    if len(movements) > page_size:
+        movements = movements[:page_size]
+        next_cursor = encode_cursor(movements[-1].created_at, movements[-1].id)
+    return {"items": movements, "page_size": page_size, "next_cursor": next_cursor}
+
+
+@router.get("/{product_id}/stock/at", response_model=StockAtResponse)
+async def get_stock_at(
+    product_id: int,
+    at: datetime = Query(..., description="Point in time (UTC)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    A product's stock at a point in time. Farmers can only view their own products.
+
+    Rebuilt from the nearest earlier stock snapshot plus the movements
+    after it; ``movements_replayed`` says how many that took.
+    """
+    await _check_ledger_access(db, product_id, current_user)
+    return await stock_at(db, product_id, at)
+
+
+@router.post("/stock/snapshots", response_model=StockSnapshotRunResponse)
+async def take_stock_snapshots(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Compact the stock ledger into snapshots now. Admin only.
+
+    Normally run in the background every STOCK_SNAPSHOT_INTERVAL_SECONDS,
+    or on a schedule with ``python -m app.utils.ledger``.
+    """
+    return await snapshot_stock(db)
+
+
+@router.post("/upsert", response_model=MessageResponse)
 async def upsert_product(
     id: Optional[int] = Form(None),
     name: str = Form(...),
@@ -189,7 +400,12 @@ async def upsert_product(
         image_url = await upload_to_minio(file)
 
     if product:
-        # UPDATE existing
+        # UPDATE existing. Lock the row only now, after the upload, and
+        # re-read its stock so the ledger delta is against the current level
+        await db.refresh(product, with_for_update=True)
+        await record_movements(
+            db, {product.id: stock_qty - product.stock_qty}, StockMovementReason.ADJUSTMENT, user_id=current_user.id
+        )
         product.name = name
         product.price = price
         product.stock_qty = stock_qty
@@ -203,6 +419,57 @@ async def upsert_product(
             unit=unit, farmer_id=farmer_id, image_url=image_url
         )
         db.add(new_product)
+        await db.flush()
+        await record_movements(
+            db, {new_product.id: stock_qty}, StockMovementReason.CREATED, user_id=current_user.id
+        )
 
     await db.commit()
+    count_cache.invalidate("products")
+    invalidate_catalog()
     return {"message": "Success"}
+
+
+@router.post("/import", response_model=ProductImportResponse)
+async def import_product_file(
+    file: UploadFile = File(..., description="CSV with a header row, or NDJSON (one product per line)"),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="File format (default: from the file name)"),
+    dry_run: bool = Query(False, description="Validate and report without saving"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Create or update many products from one file. Farmers can only import their own products.
+
+    Columns/keys are those of ``ProductCreate`` plus an optional ``id``.
+    Rows with an ``id`` update that product; others update the farmer's
+    product of the same name, or create it. Farmers may leave out
+    ``farmer_id``. Invalid rows are listed in ``errors`` by line number
+    and the remaining rows are still imported, all in one transaction.
+    """
+    if current_user.role == "farmer" and not current_user.farmer_id:
+        raise HTTPException(status_code=403, detail="Farmer profile not linked")
+
+    fmt = format or detect_format(file.filename, file.content_type)
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Unknown file format; pass format=csv or format=ndjson")
+
+    farmer_id = current_user.farmer_id if current_user.role == "farmer" else None
+    try:
+        report = await import_products(db, file.file, fmt, farmer_id, user_id=current_user.id)
+        if dry_run:
+            await db.rollback()
+        else:
+            await db.commit()
+    except HTTPException:
+        await db.rollback()
+        raise
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Database error importing products: {e}")
+        raise HTTPException(status_code=500, detail="Failed to import products. Please try again.")
+
+    if not dry_run and (report["inserted"] or report["updated"]):
+        count_cache.invalidate("products")
+        invalidate_catalog()
+    return {"format": fmt, "dry_run": dry_run, **report}
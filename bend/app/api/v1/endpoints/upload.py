@@ -1,6 +1,7 @@
 import boto3
 from fastapi import APIRouter, UploadFile, File, Depends
 from app.core.config import settings
+from app.schemas.product import ImageUploadResponse
 
 router = APIRouter()
 
@@ -11,7 +12,7 @@ s3_client = boto3.client(
     aws_secret_access_key=settings.MINIO_SECRET_KEY,
 )
 
-@router.post("/{product_id}/image")
+@router.post("/{product_id}/image", response_model=ImageUploadResponse)
 async def upload_product_image(product_id: int, file: UploadFile = File(...)):
     # 1. Upload to MinIO
     file_content = await file.read()
@@ -1,5 +1,6 @@
 import string
 import secrets
+from typing import List
 from fastapi import APIRouter, Depends, HTTPException, Path
 from pydantic import BaseModel, EmailStr
 from sqlalchemy import select, update, delete
@@ -9,6 +10,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.core.security import get_password_hash
 from app.schemas.enums import UserRole
+from app.schemas.response import MessageResponse
+from app.schemas.user import UserResponse, UserCreatedResponse, RoleUpdateResponse, PasswordResetResponse
 
 router = APIRouter()
 
@@ -19,7 +22,7 @@ class CreateUserRequest(BaseModel):
     role: str
 
 
-@router.get("/")
+@router.get("/", response_model=List[UserResponse])
 async def get_all_users(
     db: AsyncSession = Depends(get_db),
     admin: User = Depends(get_current_admin)
@@ -29,7 +32,7 @@ async def get_all_users(
     return result.scalars().all()
 
 
-@router.post("/")
+@router.post("/", response_model=UserCreatedResponse)
 async def create_user(
     payload: CreateUserRequest,
     db: AsyncSession = Depends(get_db),
@@ -60,7 +63,7 @@ async def create_user(
     return {"message": "User created", "user_id": new_user.id}
 
 
-@router.delete("/{user_id}")
+@router.delete("/{user_id}", response_model=MessageResponse)
 async def delete_user(
     user_id: int = Path(..., gt=0),
     db: AsyncSession = Depends(get_db),
@@ -80,7 +83,7 @@ async def delete_user(
     return {"message": "User deleted"}
 
 
-@router.post("/{user_id}/reset-password")
+@router.post("/{user_id}/reset-password", response_model=PasswordResetResponse)
 async def reset_user_password(
     user_id: int = Path(..., gt=0),
     db: AsyncSession = Depends(get_db),
@@ -111,7 +114,7 @@ async def reset_user_password(
     return {"temporary_password": temp_password}
 
 
-@router.patch("/{user_id}/role")
+@router.patch("/{user_id}/role", response_model=RoleUpdateResponse)
 async def update_user_role(
     user_id: int = Path(..., gt=0),
     role: UserRole = None,
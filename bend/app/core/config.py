@@ -22,6 +22,84 @@ class Settings(BaseSettings):
     MINIO_BUCKET: str = os.getenv("MINIO_BUCKET", "organic-farm")
     MINIO_SECURE: bool = os.getenv("MINIO_SECURE", "false").lower() == "true"
 
+    # Idempotency keys (POST /orders)
+    IDEMPOTENCY_KEY_TTL_HOURS: int = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+    IDEMPOTENCY_WAIT_SECONDS: float = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+    # Lease on an in-progress key; a later request may take over once it lapses,
+    # so it must exceed the longest request the key guards
+    IDEMPOTENCY_LEASE_SECONDS: float = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "60"))
+
+    # List totals (count queries)
+    COUNT_CACHE_TTL_SECONDS: float = float(os.getenv("COUNT_CACHE_TTL_SECONDS", "30"))
+    COUNT_CACHE_MAX_ENTRIES: int = int(os.getenv("COUNT_CACHE_MAX_ENTRIES", "1000"))
+    COUNT_ESTIMATE_THRESHOLD: int = int(os.getenv("COUNT_ESTIMATE_THRESHOLD", "100000"))
+
+    # Sales rollups: rows per figure that concurrent checkouts spread over
+    ROLLUP_SHARDS: int = int(os.getenv("ROLLUP_SHARDS", "16"))
+
+    # Public catalog response cache (GET /products/public)
+    CATALOG_CACHE_TTL_SECONDS: float = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "30"))
+    CATALOG_CACHE_MAX_ENTRIES: int = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "256"))
+
+    # Delivery manifests (GET /orders/manifest)
+    MANIFEST_CACHE_TTL_SECONDS: float = float(os.getenv("MANIFEST_CACHE_TTL_SECONDS", "300"))
+    MANIFEST_CACHE_MAX_ENTRIES: int = int(os.getenv("MANIFEST_CACHE_MAX_ENTRIES", "60"))
+
+    # Archival of closed orders (python -m app.utils.archive / POST /orders/archive)
+    ARCHIVE_AFTER_DAYS: int = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+    ARCHIVE_BATCH_SIZE: int = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+
+    # Webhook outbox: WEBHOOK_SINKS is a comma-separated list of name=url pairs
+    WEBHOOK_SINKS: str = os.getenv("WEBHOOK_SINKS", "")
+    WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "")
+    WEBHOOK_TIMEOUT_SECONDS: float = float(os.getenv("WEBHOOK_TIMEOUT_SECONDS", "5"))
+    OUTBOX_DISPATCHER_ENABLED: bool = os.getenv("OUTBOX_DISPATCHER_ENABLED", "true").lower() == "true"
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+    OUTBOX_POLL_SECONDS: float = float(os.getenv("OUTBOX_POLL_SECONDS", "2"))
+    OUTBOX_LEASE_SECONDS: float = float(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+    OUTBOX_RETRY_BASE_SECONDS: float = float(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "5"))
+    OUTBOX_RETRY_MAX_SECONDS: float = float(os.getenv("OUTBOX_RETRY_MAX_SECONDS", "3600"))
+    OUTBOX_RETENTION_DAYS: int = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+
+    # Reverse proxies in front of the app that append the peer address to
+    # X-Forwarded-For; clients are identified by the address the outermost
+    # one saw. 0 ignores forwarding headers (they can be set by anyone).
+    TRUSTED_PROXY_HOPS: int = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
+    # Cart stock holds (POST /cart/holds)
+    CART_HOLD_TTL_SECONDS: int = int(os.getenv("CART_HOLD_TTL_SECONDS", "600"))
+    # Most units one client may hold at once, in total and of any one product
+    CART_HOLD_MAX_UNITS_PER_CLIENT: int = int(os.getenv("CART_HOLD_MAX_UNITS_PER_CLIENT", "200"))
+    CART_HOLD_MAX_UNITS_PER_PRODUCT: int = int(os.getenv("CART_HOLD_MAX_UNITS_PER_PRODUCT", "50"))
+    HOLD_SWEEPER_ENABLED: bool = os.getenv("HOLD_SWEEPER_ENABLED", "true").lower() == "true"
+    HOLD_SWEEP_INTERVAL_SECONDS: float = float(os.getenv("HOLD_SWEEP_INTERVAL_SECONDS", "60"))
+    HOLD_SWEEP_BATCH_SIZE: int = int(os.getenv("HOLD_SWEEP_BATCH_SIZE", "1000"))
+
+    # Cart quotes (POST /cart/quote): price snapshots checked by POST /orders
+    QUOTE_TTL_SECONDS: float = float(os.getenv("QUOTE_TTL_SECONDS", "300"))
+    QUOTE_CACHE_MAX_ENTRIES: int = int(os.getenv("QUOTE_CACHE_MAX_ENTRIES", "10000"))
+
+    # Bulk product import (POST /products/import)
+    PRODUCT_IMPORT_BATCH_SIZE: int = int(os.getenv("PRODUCT_IMPORT_BATCH_SIZE", "1000"))
+    PRODUCT_IMPORT_MAX_ROWS: int = int(os.getenv("PRODUCT_IMPORT_MAX_ROWS", "100000"))
+    PRODUCT_IMPORT_MAX_ERRORS: int = int(os.getenv("PRODUCT_IMPORT_MAX_ERRORS", "1000"))
+
+    # Stock ledger snapshots (python -m app.utils.ledger / POST /products/stock-snapshots)
+    STOCK_SNAPSHOT_ENABLED: bool = os.getenv("STOCK_SNAPSHOT_ENABLED", "true").lower() == "true"
+    STOCK_SNAPSHOT_INTERVAL_SECONDS: float = float(os.getenv("STOCK_SNAPSHOT_INTERVAL_SECONDS", "3600"))
+    # Movements newer than this are left to the next run, so transactions
+    # still in flight when a snapshot is taken are not missed. Must exceed the
+    # longest write transaction: movements committed by a transaction open
+    # longer than this land behind a snapshot and are missed by later
+    # snapshots and by point-in-time stock
+    STOCK_SNAPSHOT_LAG_SECONDS: float = float(os.getenv("STOCK_SNAPSHOT_LAG_SECONDS", "300"))
+
+    # Order events (SSE tracking): "local" (single replica) or "postgres" (LISTEN/NOTIFY)
+    EVENTS_BACKEND: str = os.getenv("EVENTS_BACKEND", "local")
+    EVENTS_QUEUE_SIZE: int = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+    SSE_KEEPALIVE_SECONDS: float = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
     # Environment
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
 
@@ -1,6 +1,7 @@
 import os
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.dialects import postgresql, sqlite
 from app.core.config import settings
 
 # 1. Create the Async Engine
@@ -37,7 +38,19 @@ AsyncSessionLocal = async_sessionmaker(
 class Base(DeclarativeBase):
     pass
 
-# 4. Dependency to get a DB session (used in FastAPI routes)
+# 4. Helper for the few places that need dialect-specific SQL
+def dialect_name(db: AsyncSession) -> str:
+    """Name of the database dialect behind a session ("postgresql", "sqlite", ...)."""
+    return db.bind.dialect.name
+
+
+def upsert_insert(db: AsyncSession, table):
+    """INSERT construct with ``on_conflict_do_update`` for Postgres or SQLite."""
+    if dialect_name(db) == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+# 5. Dependency to get a DB session (used in FastAPI routes)
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
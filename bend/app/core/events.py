@@ -0,0 +1,166 @@
+"""
+In-process pub/sub for order events, with a pluggable cross-replica backend.
+
+Subscribers (e.g. SSE streams) register a queue per topic with the
+``broker``. Publishers hand events to the broker after their transaction
+commits; the backend carries them to every replica, and each replica fans
+them out to its local queues.
+
+Backends:
+    local:    delivers in-process only (single replica, tests)
+    postgres: LISTEN/NOTIFY on the application database, so every replica
+              sharing the database receives every event
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[str, dict], None]
+
+
+class EventBackend:
+    """Transport between replicas. ``deliver`` is called for every event, including our own."""
+
+    async def start(self, deliver: Deliver) -> None:
+        raise NotImplementedError
+
+    async def publish(self, topic: str, event: dict) -> None:
+        raise NotImplementedError
+
+    async def stop(self) -> None:
+        pass
+
+
+class LocalBackend(EventBackend):
+    """In-process stand-in: events never leave this worker."""
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def publish(self, topic: str, event: dict) -> None:
+        if self._deliver is not None:
+            self._deliver(topic, event)
+
+
+class PostgresNotifyBackend(EventBackend):
+    """Cross-replica delivery over Postgres LISTEN/NOTIFY (one connection per replica)."""
+
+    CHANNEL = "organic_farm_events"
+
+    def __init__(self, dsn: str):
+        self._dsn = dsn
+        self._conn = None
+        self._lock = asyncio.Lock()
+        self._deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        import asyncpg
+
+        self._deliver = deliver
+        self._conn = await asyncpg.connect(self._dsn)
+        await self._conn.add_listener(self.CHANNEL, self._on_notify)
+
+    def _on_notify(self, conn, pid, channel, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+            self._deliver(message["topic"], message["event"])
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Dropping malformed event notification: {e}")
+
+    async def publish(self, topic: str, event: dict) -> None:
+        payload = json.dumps({"topic": topic, "event": event}, default=str)
+        # asyncpg connections do not allow concurrent operations
+        async with self._lock:
+            await self._conn.execute("SELECT pg_notify($1, $2)", self.CHANNEL, payload)
+
+    async def stop(self) -> None:
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+
+class EventBroker:
+    """Fans events out to local subscriber queues."""
+
+    def __init__(self, backend: EventBackend, queue_size: int):
+        self.backend = backend
+        self._queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._started = False
+
+    async def start(self) -> None:
+        if not self._started:
+            await self.backend.start(self._dispatch)
+            self._started = True
+
+    async def stop(self) -> None:
+        if self._started:
+            await self.backend.stop()
+            self._started = False
+
+    def subscribe(self, topic: str) -> asyncio.Queue:
+        """Register a queue for ``topic``; pair with ``unsubscribe``."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers[topic].add(queue)
+        return queue
+
+    def unsubscribe(self, topic: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(topic)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[topic]
+
+    def subscriber_count(self, topic: str) -> int:
+        return len(self._subscribers.get(topic, ()))
+
+    async def publish(self, topic: str, event: dict) -> None:
+        """
+        Publish ``event`` to every subscriber of ``topic`` on every replica.
+
+        Call after the change is committed. Failures are logged, not raised:
+        events are a notification channel, never the source of truth.
+        """
+        try:
+            await self.start()
+            await self.backend.publish(topic, event)
+        except Exception as e:
+            logger.error(f"Failed to publish event on {topic}: {e}")
+
+    def _dispatch(self, topic: str, event: dict) -> None:
+        for queue in list(self._subscribers.get(topic, ())):
+            if queue.full():
+                # Slow consumer: drop its oldest event rather than block publishers
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+
+def _create_backend() -> EventBackend:
+    if settings.EVENTS_BACKEND == "postgres":
+        return PostgresNotifyBackend(settings.DATABASE_URL.replace("+asyncpg", ""))
+    return LocalBackend()
+
+
+broker = EventBroker(_create_backend(), queue_size=settings.EVENTS_QUEUE_SIZE)
+
+
+def order_topic(order_id: int) -> str:
+    return f"order:{order_id}"
+
+
+async def publish_order_events(events: Dict[int, dict]) -> None:
+    """Publish one event per order (order_id -> event); skips orders nobody watches locally."""
+    for order_id, event in events.items():
+        topic = order_topic(order_id)
+        if isinstance(broker.backend, LocalBackend) and not broker.subscriber_count(topic):
+            continue
+        await broker.publish(topic, {"order_id": order_id, **event})
@@ -1,11 +1,14 @@
 import os
+import asyncio
 import logging
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 
-from app.api.v1.endpoints import products, orders, farmers, users, auth
+from app.api.v1.endpoints import products, orders, cart, farmers, users, auth, analytics
 from app.core.config import settings
+from app.utils.stock import StockReservationError
+from app.utils.quotes import PriceMismatchError
 
 # Check environment
 is_production = settings.is_production
@@ -45,8 +48,10 @@ This API powers the Organic Oasis farm-to-table e-commerce platform.
 ### Features
 - **Products**: Browse and manage organic produce inventory
 - **Orders**: Place and track customer orders
+- **Cart**: Short-lived stock holds during checkout
 - **Farmers**: Farmer profiles and product sourcing
 - **Authentication**: Secure JWT-based authentication
+- **Analytics**: Pre-aggregated sales figures for admins
 
 ### Authentication
 Most endpoints require authentication via JWT token.
@@ -66,6 +71,8 @@ Authorization: Bearer <your_token>
     license_info={
         "name": "Private",
     },
+    # Response models serialize to plain data; orjson then encodes it
+    default_response_class=ORJSONResponse,
 )
 
 # Add rate limiter if available
@@ -73,6 +80,17 @@ if RATE_LIMITING_ENABLED:
     app.state.limiter = limiter
     app.add_exception_handler(RateLimitExceeded, rate_limit_handler)
 
+
+@app.exception_handler(StockReservationError)
+@app.exception_handler(PriceMismatchError)
+async def stock_reservation_handler(request: Request, exc: StockReservationError):
+    """Return the per-item failure report alongside the usual detail."""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail, "failures": exc.failures},
+    )
+
+
 # Add request ID middleware if available
 if REQUEST_ID_ENABLED:
     app.add_middleware(RequestIDMiddleware)
@@ -93,15 +111,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-Request-ID"],  # Expose request ID header
+    expose_headers=["X-Request-ID", "Idempotent-Replayed"],  # Expose request ID and replay headers
 )
 
 # Include routers
 app.include_router(products.router, prefix="/api/v1/products", tags=["Products"])
 app.include_router(orders.router, prefix="/api/v1/orders", tags=["Orders"])
+app.include_router(cart.router, prefix="/api/v1/cart", tags=["Cart"])
 app.include_router(farmers.router, prefix="/api/v1/farmers", tags=["Farmers"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["Users"])
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
+app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["Analytics"])
 
 
 @app.get("/", tags=["Health"])
@@ -126,7 +146,7 @@ async def startup_event():
     from sqlalchemy import text
     from app.core.database import engine, Base
     # Import all models so Base.metadata knows about them
-    from app.models import product, order, user  # noqa: F401
+    from app.models import product, order, user, idempotency, analytics, archive, outbox, hold, ledger  # noqa: F401
 
     async with engine.begin() as conn:
         # Create any missing tables
@@ -135,13 +155,88 @@ async def startup_event():
         migrations = [
             "ALTER TABLE orders ADD COLUMN IF NOT EXISTS delivery_date DATE",
             "ALTER TABLE order_items ADD COLUMN IF NOT EXISTS is_harvested BOOLEAN NOT NULL DEFAULT FALSE",
+            "ALTER TABLE idempotency_keys ADD COLUMN IF NOT EXISTS owner VARCHAR(36)",
+            "ALTER TABLE idempotency_keys ADD COLUMN IF NOT EXISTS locked_until TIMESTAMP",
+            "ALTER TABLE stock_holds ADD COLUMN IF NOT EXISTS client_key VARCHAR(64)",
+            "CREATE INDEX IF NOT EXISTS ix_stock_holds_client_key_expires_at ON stock_holds (client_key, expires_at)",
+            # Sales rollups are sharded (existing rows become shard 0) and keep exact revenue
+            *[
+                f"""DO $$ BEGIN
+                    IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                                   WHERE table_name = '{table}' AND column_name = 'shard') THEN
+                        ALTER TABLE {table} ADD COLUMN shard SMALLINT NOT NULL DEFAULT 0;
+                        ALTER TABLE {table} DROP CONSTRAINT {table}_pkey, ADD PRIMARY KEY ({key}, shard);
+                    END IF;
+                END $$"""
+                for table, key in [
+                    ("rollup_daily_sales", "day"),
+                    ("rollup_order_status_counts", "status"),
+                    ("rollup_product_sales", "product_id"),
+                    ("rollup_farmer_sales", "farmer_id"),
+                ]
+            ],
+            "ALTER TABLE rollup_daily_sales ALTER COLUMN revenue TYPE NUMERIC(14, 2)",
+            "ALTER TABLE rollup_product_sales ALTER COLUMN revenue TYPE NUMERIC(14, 2)",
+            "ALTER TABLE rollup_farmer_sales ALTER COLUMN revenue TYPE NUMERIC(14, 2)",
+            "DROP INDEX IF EXISTS ix_rollup_product_sales_revenue",
+            "DROP INDEX IF EXISTS ix_rollup_farmer_sales_revenue",
+            # Keyset pagination indexes; each supersedes a single-column index
+            "CREATE INDEX IF NOT EXISTS ix_orders_created_at_id ON orders (created_at, id)",
+            "DROP INDEX IF EXISTS ix_orders_created_at",
+            "CREATE INDEX IF NOT EXISTS ix_order_items_product_id_id ON order_items (product_id, id)",
+            "DROP INDEX IF EXISTS ix_order_items_product_id",
+            "CREATE INDEX IF NOT EXISTS ix_orders_delivery_date ON orders (delivery_date)",
+            "CREATE INDEX IF NOT EXISTS ix_order_items_unharvested ON order_items (product_id, order_id, quantity) WHERE is_harvested = false",
+            # Catalog filters and sorts; the farmer index supersedes ix_products_farmer_id
+            "CREATE INDEX IF NOT EXISTS ix_products_farmer_id_id ON products (farmer_id, id)",
+            "DROP INDEX IF EXISTS ix_products_farmer_id",
+            "CREATE INDEX IF NOT EXISTS ix_products_price_id ON products (price, id)",
+            "CREATE INDEX IF NOT EXISTS ix_products_in_stock ON products (id) WHERE stock_qty > 0",
+            "CREATE INDEX IF NOT EXISTS ix_products_in_stock_price ON products (price, id) WHERE stock_qty > 0",
+            # Product search: full-text GIN indexes, plus trigrams for typo tolerance
+            f"CREATE INDEX IF NOT EXISTS ix_products_name_fts ON products USING gin (({product.PRODUCT_SEARCH_DOCUMENT.format(t='')}))",
+            f"CREATE INDEX IF NOT EXISTS ix_farmers_search_fts ON farmers USING gin (({product.FARMER_SEARCH_DOCUMENT.format(t='')}))",
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            "CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops)",
         ]
         for sql in migrations:
+            # A savepoint per statement, so one that fails (e.g. pg_trgm not
+            # installed) does not abort the transaction for the rest
             try:
-                await conn.execute(text(sql))
+                async with conn.begin_nested():
+                    await conn.execute(text(sql))
             except Exception as e:
                 logger.warning(f"Migration skipped: {e}")
 
+    # Connect the order event backend (LISTEN/NOTIFY when EVENTS_BACKEND=postgres)
+    from app.core.events import broker
+    await broker.start()
+
+    # Deliver outbox events to webhook sinks in the background
+    from app.utils.outbox import configured_sinks, run_dispatcher
+    if settings.OUTBOX_DISPATCHER_ENABLED and configured_sinks():
+        from app.core.database import AsyncSessionLocal
+        app.state.outbox_stop = asyncio.Event()
+        app.state.outbox_task = asyncio.create_task(run_dispatcher(AsyncSessionLocal, app.state.outbox_stop))
+
+    # Delete expired cart holds in the background
+    if settings.HOLD_SWEEPER_ENABLED:
+        from app.core.database import AsyncSessionLocal
+        from app.utils.holds import run_hold_sweeper
+        app.state.hold_sweeper_stop = asyncio.Event()
+        app.state.hold_sweeper_task = asyncio.create_task(
+            run_hold_sweeper(AsyncSessionLocal, app.state.hold_sweeper_stop)
+        )
+
+    # Record opening stock balances and compact the stock ledger into snapshots
+    if settings.STOCK_SNAPSHOT_ENABLED:
+        from app.core.database import AsyncSessionLocal
+        from app.utils.ledger import run_snapshotter
+        app.state.snapshotter_stop = asyncio.Event()
+        app.state.snapshotter_task = asyncio.create_task(
+            run_snapshotter(AsyncSessionLocal, app.state.snapshotter_stop)
+        )
+
     logger.info(
         f"Application starting up - database tables verified",
         extra={"environment": settings.ENVIRONMENT}
@@ -150,5 +245,21 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Log application shutdown."""
+    """Stop background services and log application shutdown."""
+    from app.core.events import broker
+    from app.utils.outbox import notify_dispatcher
+    task = getattr(app.state, "outbox_task", None)
+    if task is not None:
+        app.state.outbox_stop.set()
+        notify_dispatcher()
+        await task
+    task = getattr(app.state, "hold_sweeper_task", None)
+    if task is not None:
+        app.state.hold_sweeper_stop.set()
+        await task
+    task = getattr(app.state, "snapshotter_task", None)
+    if task is not None:
+        app.state.snapshotter_stop.set()
+        await task
+    await broker.stop()
     logger.info("Application shutting down")
\ No newline at end of file
@@ -6,28 +6,38 @@ import logging
 from functools import wraps
 from typing import Callable, Optional
 
+from starlette.requests import Request
+
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
+
+def get_client_ip(request: Request) -> str:
+    """
+    Get client IP address.
+
+    Behind TRUSTED_PROXY_HOPS proxies this is the X-Forwarded-For entry the
+    outermost one appended; entries before it were sent by the client and
+    are ignored. Otherwise it is the address of the connection.
+    """
+    hops = settings.TRUSTED_PROXY_HOPS
+    if hops > 0:
+        forwarded_for = [part.strip() for part in request.headers.get("X-Forwarded-For", "").split(",")]
+        if len(forwarded_for) >= hops and forwarded_for[-hops]:
+            return forwarded_for[-hops]
+    if request.client:
+        return request.client.host
+    return "unknown"
+
+
 try:
     from slowapi import Limiter, _rate_limit_exceeded_handler
     from slowapi.errors import RateLimitExceeded
     from slowapi.middleware import SlowAPIMiddleware
-    from starlette.requests import Request
 
     SLOWAPI_AVAILABLE = True
 
-    def get_client_ip(request: Request) -> str:
-        """Get client IP address, considering X-Forwarded-For header."""
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            return forwarded_for.split(",")[0].strip()
-        real_ip = request.headers.get("X-Real-IP")
-        if real_ip:
-            return real_ip
-        if request.client:
-            return request.client.host
-        return "unknown"
-
     # Create the limiter instance
     limiter = Limiter(
         key_func=get_client_ip,
@@ -0,0 +1,51 @@
+from sqlalchemy import String, Integer, SmallInteger, Numeric, Date, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import date
+from app.core.database import Base
+
+
+# Sales rollups, maintained incrementally by app.utils.rollups as orders are
+# placed, cancelled or change status. Cancelled orders do not count towards
+# revenue, quantities or order_count.
+#
+# Each figure is spread over ROLLUP_SHARDS rows (order_id % ROLLUP_SHARDS),
+# so concurrent checkouts update different rows instead of queueing on one;
+# readers sum the shards. Revenue is exact (Numeric) so it cannot drift
+# under repeated deltas.
+
+Revenue = Numeric(14, 2, asdecimal=False)
+
+
+class DailySales(Base):
+    __tablename__ = "rollup_daily_sales"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    shard: Mapped[int] = mapped_column(SmallInteger, primary_key=True, default=0)
+    order_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    revenue: Mapped[float] = mapped_column(Revenue, default=0, nullable=False)
+
+
+class OrderStatusCount(Base):
+    __tablename__ = "rollup_order_status_counts"
+
+    status: Mapped[str] = mapped_column(String(20), primary_key=True)
+    shard: Mapped[int] = mapped_column(SmallInteger, primary_key=True, default=0)
+    order_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class ProductSales(Base):
+    __tablename__ = "rollup_product_sales"
+
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    shard: Mapped[int] = mapped_column(SmallInteger, primary_key=True, default=0)
+    quantity: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    revenue: Mapped[float] = mapped_column(Revenue, default=0, nullable=False)
+
+
+class FarmerSales(Base):
+    __tablename__ = "rollup_farmer_sales"
+
+    farmer_id: Mapped[int] = mapped_column(ForeignKey("farmers.id", ondelete="CASCADE"), primary_key=True)
+    shard: Mapped[int] = mapped_column(SmallInteger, primary_key=True, default=0)
+    quantity: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    revenue: Mapped[float] = mapped_column(Revenue, default=0, nullable=False)
@@ -0,0 +1,48 @@
+from sqlalchemy import String, Float, Integer, ForeignKey, DateTime, Date, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime, date
+from app.models.product import Product  # noqa: F401  (FK target)
+from app.core.database import Base
+
+
+class ArchivedOrder(Base):
+    """
+    Closed (delivered/cancelled) orders moved out of ``orders``.
+
+    On Postgres the table is range-partitioned by ``created_at`` month;
+    partitions are created by the archive job as needed. The partition key
+    has to be part of the primary key.
+    """
+    __tablename__ = "orders_archive"
+    __table_args__ = (
+        Index("ix_orders_archive_customer_email", "customer_email"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    customer_name: Mapped[str] = mapped_column(String(100), nullable=False)
+    customer_email: Mapped[str] = mapped_column(String(100), nullable=False)
+    address: Mapped[str] = mapped_column(String(500), nullable=False)
+    total_price: Mapped[float] = mapped_column(Float, nullable=False)
+    delivery_date: Mapped[date] = mapped_column(Date, nullable=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ArchivedOrderItem(Base):
+    """Items of archived orders, partitioned like their orders (by the order's ``created_at``)."""
+    __tablename__ = "order_items_archive"
+    __table_args__ = (
+        Index("ix_order_items_archive_order_id", "order_id"),
+        Index("ix_order_items_archive_product_id", "product_id"),
+        {"postgresql_partition_by": "RANGE (order_created_at)"},
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    order_created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    order_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id", ondelete="RESTRICT"), nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    price_at_time: Mapped[float] = mapped_column(Float, nullable=False)
+    is_harvested: Mapped[bool] = mapped_column(default=False, nullable=False)
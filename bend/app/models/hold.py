@@ -0,0 +1,38 @@
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.core.database import Base
+
+
+class StockHold(Base):
+    """
+    A short-lived claim on product stock while a customer checks out.
+
+    Holds never change ``products.stock_qty``; available stock is stock minus
+    the quantity of live (unexpired) holds. A hold is deleted when its cart
+    becomes an order, when it is released, or by the sweeper once expired.
+    """
+    __tablename__ = "stock_holds"
+    __table_args__ = (
+        # Live held quantity per product (availability checks)
+        Index("ix_stock_holds_product_id_expires_at", "product_id", "expires_at"),
+        # Converting or releasing one cart's holds
+        Index("ix_stock_holds_hold_id", "hold_id"),
+        # Sweeping expired holds
+        Index("ix_stock_holds_expires_at", "expires_at"),
+        # Per-client hold caps
+        Index("ix_stock_holds_client_key_expires_at", "client_key", "expires_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Cart token shared by every line of one hold; returned to the client
+    hold_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Client that placed the hold (hashed IP address), for the per-client caps
+    client_key: Mapped[str] = mapped_column(String(64), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
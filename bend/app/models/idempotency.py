@@ -0,0 +1,25 @@
+from sqlalchemy import String, Integer, Text, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.core.database import Base
+
+
+class IdempotencyKey(Base):
+    """Stored first response for a client-supplied Idempotency-Key."""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        # Used to purge expired keys
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    # Scoped key, e.g. "orders:<client key>" (primary key = unique index)
+    key: Mapped[str] = mapped_column(String(300), primary_key=True)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    # NULL while the original request is still in progress
+    status_code: Mapped[int] = mapped_column(Integer, nullable=True)
+    response_body: Mapped[str] = mapped_column(Text, nullable=True)
+    # Random token of the request holding an in-progress key, and the end of its lease
+    owner: Mapped[str] = mapped_column(String(36), nullable=True)
+    locked_until: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
@@ -0,0 +1,59 @@
+from sqlalchemy import String, Float, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.core.database import Base
+
+
+class StockMovement(Base):
+    """
+    One change to a product's stock, appended in the same transaction as
+    the change itself (see app/utils/ledger.py). Rows are never updated.
+
+    ``delta`` is signed: orders take stock out, cancellations and restocks
+    put it back. The sum of a product's deltas is its ``stock_qty``.
+    """
+    __tablename__ = "stock_movements"
+    __table_args__ = (
+        # Replaying a product's tail after a snapshot; its history, newest first
+        Index("ix_stock_movements_product_id_created_at_id", "product_id", "created_at", "id"),
+        # Movements in a snapshot window
+        Index("ix_stock_movements_created_at", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    delta: Mapped[float] = mapped_column(Float, nullable=False)
+    # StockMovementReason value
+    reason: Mapped[str] = mapped_column(String(20), nullable=False)
+    # Order that caused the movement; not a foreign key, orders get archived
+    order_id: Mapped[int] = mapped_column(Integer, nullable=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="SET NULL"),
+        nullable=True
+    )
+
+
+class StockSnapshot(Base):
+    """
+    A product's stock as of ``taken_at``, compacted from the ledger.
+
+    Written periodically for products that moved since their previous
+    snapshot; stock at any time is the nearest earlier snapshot plus the
+    movements after it.
+    """
+    __tablename__ = "stock_snapshots"
+    __table_args__ = (
+        # Latest snapshot run
+        Index("ix_stock_snapshots_taken_at", "taken_at"),
+    )
+
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    taken_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    stock_qty: Mapped[float] = mapped_column(Float, nullable=False)
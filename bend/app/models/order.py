@@ -1,4 +1,4 @@
-from sqlalchemy import String, Float, Integer, ForeignKey, DateTime, Date, CheckConstraint, Index
+from sqlalchemy import String, Float, Integer, ForeignKey, DateTime, Date, CheckConstraint, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime, date
 from app.models.product import Product
@@ -11,7 +11,10 @@ class Order(Base):
         # Indexes for common queries
         Index("ix_orders_customer_email", "customer_email"),
         Index("ix_orders_status", "status"),
-        Index("ix_orders_created_at", "created_at"),
+        # Keyset pagination walks (created_at, id) newest first
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        # Pick lists, manifests and bulk transitions select by delivery date
+        Index("ix_orders_delivery_date", "delivery_date"),
         # Constraints
         CheckConstraint("total_price >= 0", name="chk_orders_total_price_positive"),
     )
@@ -38,7 +41,15 @@ class OrderItem(Base):
     __table_args__ = (
         # Indexes for common queries
         Index("ix_order_items_order_id", "order_id"),
-        Index("ix_order_items_product_id", "product_id"),
+        # Farmer item listings filter by product and walk id newest first
+        Index("ix_order_items_product_id_id", "product_id", "id"),
+        # Pick lists read only open items; covers the grouped query
+        Index(
+            "ix_order_items_unharvested",
+            "product_id", "order_id", "quantity",
+            postgresql_where=text("is_harvested = false"),
+            sqlite_where=text("is_harvested = 0"),
+        ),
         # Constraints
         CheckConstraint("quantity > 0", name="chk_order_items_quantity_positive"),
         CheckConstraint("price_at_time >= 0", name="chk_order_items_price_positive"),
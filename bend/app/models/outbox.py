@@ -0,0 +1,35 @@
+from sqlalchemy import String, Integer, Text, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.core.database import Base
+
+
+class OutboxEvent(Base):
+    """
+    An order event waiting to be delivered to one webhook sink.
+
+    Written in the same transaction as the order change it describes, then
+    delivered by the outbox dispatcher. One row per (event, sink), so each
+    sink retries independently.
+    """
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # The dispatcher claims due pending rows in id order
+        Index("ix_outbox_events_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Shared by the rows of one event across sinks; sent as X-Event-Id
+    event_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    event_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    sink: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    # pending -> delivered, or failed after OUTBOX_MAX_ATTEMPTS
+    status: Mapped[str] = mapped_column(String(20), default="pending", nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # Claim lease: other dispatchers skip the row until it passes
+    locked_until: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[str] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    delivered_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
@@ -1,14 +1,40 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Float, Boolean, Integer, ForeignKey, Text, CheckConstraint, Index
+from sqlalchemy import String, Float, Boolean, Integer, ForeignKey, Text, CheckConstraint, Index, text
 from app.core.database import Base
 
+# Full-text documents for product search (see app/utils/search.py). {t} is
+# "" in the index DDL and "<table>." in queries; the expressions must
+# otherwise match exactly for the planner to use the GIN indexes.
+PRODUCT_SEARCH_DOCUMENT = "to_tsvector('simple', coalesce({t}name, ''))"
+FARMER_SEARCH_DOCUMENT = (
+    "to_tsvector('simple', coalesce({t}name, '') || ' ' || coalesce({t}location, '') "
+    "|| ' ' || coalesce({t}bio, ''))"
+)
+
 
 class Product(Base):
     __tablename__ = "products"
     __table_args__ = (
         # Indexes for common queries
-        Index("ix_products_farmer_id", "farmer_id"),
+        # Farmer filter, newest first; also serves the foreign key
+        Index("ix_products_farmer_id_id", "farmer_id", "id"),
         Index("ix_products_name", "name"),
+        # Catalog filters and sorts (see app/utils/catalog.py)
+        Index("ix_products_price_id", "price", "id"),
+        Index(
+            "ix_products_in_stock",
+            "id",
+            postgresql_where=text("stock_qty > 0"),
+            sqlite_where=text("stock_qty > 0"),
+        ),
+        Index(
+            "ix_products_in_stock_price",
+            "price", "id",
+            postgresql_where=text("stock_qty > 0"),
+            sqlite_where=text("stock_qty > 0"),
+        ),
+        # Product search (Postgres only; trigram index is added by migration)
+        Index("ix_products_name_fts", text(PRODUCT_SEARCH_DOCUMENT.format(t="")), postgresql_using="gin").ddl_if(dialect="postgresql"),
         # Constraints
         CheckConstraint("price >= 0", name="chk_products_price_positive"),
         CheckConstraint("stock_qty >= 0", name="chk_products_stock_positive"),
@@ -33,6 +59,8 @@ class Farmer(Base):
     __tablename__ = "farmers"
     __table_args__ = (
         Index("ix_farmers_name", "name"),
+        # Product search by farmer name, location and bio (Postgres only)
+        Index("ix_farmers_search_fts", text(FARMER_SEARCH_DOCUMENT.format(t="")), postgresql_using="gin").ddl_if(dialect="postgresql"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
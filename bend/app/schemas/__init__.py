@@ -1,12 +1,71 @@
 # Schemas package
-from .enums import OrderStatus, UserRole, ProductUnit
-from .order import OrderCreate, OrderItemCreate, OrderResponse, OrderStatusUpdate
-from .product import ProductCreate, ProductUpdate, ProductResponse
-from .user import UserCreate, UserResponse, FarmerCreate, LoginRequest, TokenResponse
+from .enums import OrderStatus, UserRole, ProductUnit, ProductSort, StockMovementReason, ORDER_STATUS_TRANSITIONS, statuses_allowing
+from .order import (
+    OrderCreate,
+    OrderItemCreate,
+    OrderItemResponse,
+    OrderResponse,
+    TrackedOrderItemResponse,
+    TrackedOrderResponse,
+    OrderStatusUpdate,
+    BulkStatusUpdate,
+    BulkHarvestRequest,
+    OrderPlacedResponse,
+    OrderCancelledResponse,
+    OrderStatusResponse,
+    SkippedOrder,
+    BulkStatusResponse,
+    HarvestResponse,
+    ItemHarvestResult,
+    BulkHarvestResponse,
+    FarmerItemProduct,
+    FarmerItemOrder,
+    FarmerOrderItem,
+    PickListLine,
+    PickListResponse,
+    ArchiveResponse,
+)
+from .cart import (
+    CartItem, HoldRequest, HoldResponse, QuoteRequest, QuoteLine, QuoteResponse, AvailabilityLine, ReleaseResponse,
+)
+from .product import (
+    ProductCreate,
+    ProductUpdate,
+    ProductResponse,
+    FarmerResponse,
+    ProductWithFarmerResponse,
+    ProductSearchResult,
+    FarmerDetailResponse,
+    StockUpdateResponse,
+    ImageUploadResponse,
+    ProductImportRow,
+    ProductImportError,
+    ProductImportResponse,
+    InventoryPatchItem,
+    InventoryPatchRequest,
+    InventoryLine,
+    InventoryRejection,
+    InventoryPatchResponse,
+)
+from .user import (
+    UserCreate,
+    UserResponse,
+    FarmerCreate,
+    LoginRequest,
+    TokenResponse,
+    LogoutResponse,
+    UserCreatedResponse,
+    RoleUpdateResponse,
+    PasswordResetResponse,
+    FarmerSavedResponse,
+)
+from .ledger import StockMovementResponse, StockAtResponse, StockSnapshotRunResponse
+from .analytics import DailySalesPoint, DailySalesResponse, ProductSalesResponse, FarmerSalesResponse
 from .response import (
     SuccessResponse,
     ErrorResponse,
     MessageResponse,
+    CacheStatsResponse,
     PaginatedResponse,
     success_response,
     error_response,
@@ -19,25 +78,86 @@ __all__ = [
     "OrderStatus",
     "UserRole",
     "ProductUnit",
+    "ProductSort",
+    "StockMovementReason",
+    "ORDER_STATUS_TRANSITIONS",
+    "statuses_allowing",
     # Order schemas
     "OrderCreate",
     "OrderItemCreate",
+    "OrderItemResponse",
     "OrderResponse",
+    "TrackedOrderItemResponse",
+    "TrackedOrderResponse",
     "OrderStatusUpdate",
+    "BulkStatusUpdate",
+    "BulkHarvestRequest",
+    "OrderPlacedResponse",
+    "OrderCancelledResponse",
+    "OrderStatusResponse",
+    "SkippedOrder",
+    "BulkStatusResponse",
+    "HarvestResponse",
+    "ItemHarvestResult",
+    "BulkHarvestResponse",
+    "FarmerItemProduct",
+    "FarmerItemOrder",
+    "FarmerOrderItem",
+    "PickListLine",
+    "PickListResponse",
+    "ArchiveResponse",
+    # Cart schemas
+    "CartItem",
+    "HoldRequest",
+    "HoldResponse",
+    "QuoteRequest",
+    "QuoteLine",
+    "QuoteResponse",
+    "AvailabilityLine",
+    "ReleaseResponse",
     # Product schemas
     "ProductCreate",
     "ProductUpdate",
     "ProductResponse",
+    "FarmerResponse",
+    "ProductWithFarmerResponse",
+    "ProductSearchResult",
+    "FarmerDetailResponse",
+    "StockUpdateResponse",
+    "ImageUploadResponse",
+    "ProductImportRow",
+    "ProductImportError",
+    "ProductImportResponse",
+    "InventoryPatchItem",
+    "InventoryPatchRequest",
+    "InventoryLine",
+    "InventoryRejection",
+    "InventoryPatchResponse",
+    # Stock ledger schemas
+    "StockMovementResponse",
+    "StockAtResponse",
+    "StockSnapshotRunResponse",
     # User schemas
     "UserCreate",
     "UserResponse",
     "FarmerCreate",
     "LoginRequest",
     "TokenResponse",
+    "LogoutResponse",
+    "UserCreatedResponse",
+    "RoleUpdateResponse",
+    "PasswordResetResponse",
+    "FarmerSavedResponse",
+    # Analytics schemas
+    "DailySalesPoint",
+    "DailySalesResponse",
+    "ProductSalesResponse",
+    "FarmerSalesResponse",
     # Response helpers
     "SuccessResponse",
     "ErrorResponse",
     "MessageResponse",
+    "CacheStatsResponse",
     "PaginatedResponse",
     "success_response",
     "error_response",
@@ -0,0 +1,37 @@
+from datetime import date
+from typing import List
+from pydantic import BaseModel
+
+
+class DailySalesPoint(BaseModel):
+    """Order count and revenue for one day."""
+    day: date
+    order_count: int
+    revenue: float
+
+
+class DailySalesResponse(BaseModel):
+    """Schema for daily sales over a date range, with range totals."""
+    start_date: date
+    end_date: date
+    days: List[DailySalesPoint]
+    order_count: int
+    revenue: float
+
+
+class ProductSalesResponse(BaseModel):
+    """Quantity sold and revenue of one product."""
+    product_id: int
+    name: str
+    unit: str
+    farmer_id: int
+    quantity: int
+    revenue: float
+
+
+class FarmerSalesResponse(BaseModel):
+    """Quantity sold and revenue of one farmer."""
+    farmer_id: int
+    name: str
+    quantity: int
+    revenue: float
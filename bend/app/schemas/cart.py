@@ -0,0 +1,63 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+
+class CartItem(BaseModel):
+    """Schema for one cart line."""
+    product_id: int = Field(..., gt=0, description="Product ID must be positive")
+    quantity: int = Field(..., ge=1, le=1000, description="Quantity must be between 1 and 1000")
+
+
+class HoldRequest(BaseModel):
+    """Schema for placing (or refreshing) stock holds for a cart."""
+    items: List[CartItem] = Field(..., min_length=1, max_length=100, description="Cart lines to hold")
+    hold_id: Optional[str] = Field(None, min_length=1, max_length=36, description="Existing hold to replace")
+
+
+class QuoteRequest(BaseModel):
+    """Schema for pricing a cart."""
+    items: List[CartItem] = Field(..., min_length=1, max_length=100, description="Cart lines to price")
+    hold_id: Optional[str] = Field(None, min_length=1, max_length=36, description="The cart's hold, if any")
+
+
+class QuoteLine(BaseModel):
+    """Schema for one priced cart line."""
+    product_id: int
+    name: str
+    unit: str
+    quantity: int
+    unit_price: float
+    line_total: float
+    available: float
+    in_stock: bool
+
+
+class QuoteResponse(BaseModel):
+    """Schema for a cart quote; send ``quote_id`` with the order."""
+    quote_id: str
+    expires_at: datetime
+    items: List[QuoteLine]
+    total: float
+    all_in_stock: bool
+    missing: List[int]
+
+
+class HoldResponse(BaseModel):
+    """Schema for a placed hold."""
+    hold_id: str
+    expires_at: datetime
+    items: List[CartItem]
+
+
+class AvailabilityLine(BaseModel):
+    """Stock, live holds and available quantity of one product."""
+    product_id: int
+    stock_qty: float
+    held: float
+    available: float
+
+
+class ReleaseResponse(BaseModel):
+    """Schema for hold release response."""
+    released: int
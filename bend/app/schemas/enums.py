@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Dict, FrozenSet
 
 
 class OrderStatus(str, Enum):
@@ -10,6 +11,25 @@ class OrderStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+# Allowed status moves. Orders only move forward; delivered and cancelled
+# are terminal. Skipping steps is allowed (an admin may mark a pending order
+# delivered directly).
+ORDER_STATUS_TRANSITIONS: Dict[OrderStatus, FrozenSet[OrderStatus]] = {
+    OrderStatus.PENDING: frozenset({
+        OrderStatus.CONFIRMED, OrderStatus.PACKED, OrderStatus.DELIVERED, OrderStatus.CANCELLED,
+    }),
+    OrderStatus.CONFIRMED: frozenset({OrderStatus.PACKED, OrderStatus.DELIVERED, OrderStatus.CANCELLED}),
+    OrderStatus.PACKED: frozenset({OrderStatus.DELIVERED, OrderStatus.CANCELLED}),
+    OrderStatus.DELIVERED: frozenset(),
+    OrderStatus.CANCELLED: frozenset(),
+}
+
+
+def statuses_allowing(target: OrderStatus) -> FrozenSet[OrderStatus]:
+    """Statuses from which an order may move to ``target``."""
+    return frozenset(source for source, targets in ORDER_STATUS_TRANSITIONS.items() if target in targets)
+
+
 class UserRole(str, Enum):
     """Valid user roles."""
     ADMIN = "admin"
@@ -25,3 +45,25 @@ class ProductUnit(str, Enum):
     DOZEN = "dozen"
     LITRE = "litre"
     ML = "ml"
+
+
+class ProductSort(str, Enum):
+    """Sort orders for product listings."""
+    NEWEST = "newest"
+    PRICE_ASC = "price_asc"
+    PRICE_DESC = "price_desc"
+
+
+class StockMovementReason(str, Enum):
+    """
+    Causes of a stock movement in the ledger.
+
+    ``opening`` records the stock a product already had when the ledger
+    started; ``adjustment`` is stock set by a farmer or admin.
+    """
+    OPENING = "opening"
+    CREATED = "created"
+    ADJUSTMENT = "adjustment"
+    IMPORT = "import"
+    ORDER = "order"
+    CANCELLATION = "cancellation"
@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+
+class StockMovementResponse(BaseModel):
+    """One entry of a product's stock ledger."""
+    id: int
+    product_id: int
+    created_at: datetime
+    delta: float
+    reason: str
+    order_id: Optional[int] = None
+    user_id: Optional[int] = None
+
+
+class StockAtResponse(BaseModel):
+    """A product's stock at a point in time, rebuilt from the ledger."""
+    product_id: int
+    at: datetime
+    stock_qty: float
+    snapshot_at: Optional[datetime] = None
+    movements_replayed: int
+
+
+class StockSnapshotRunResponse(BaseModel):
+    """Schema for a stock snapshot run."""
+    opening_balances: int
+    snapshots: int
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
 from typing import List, Optional
 from datetime import datetime, date
 from .enums import OrderStatus
+from .product import ProductResponse, ProductWithFarmerResponse
 
 
 class OrderItemCreate(BaseModel):
@@ -18,6 +19,8 @@ class OrderCreate(BaseModel):
     address: str = Field(..., min_length=10, max_length=500, description="Delivery address")
     total_price: float = Field(..., ge=0, description="Total price cannot be negative")
     items: List[OrderItemCreate] = Field(..., min_length=1, description="At least one item required")
+    hold_id: Optional[str] = Field(None, min_length=1, max_length=36, description="Cart hold to convert into this order")
+    quote_id: Optional[str] = Field(None, min_length=1, max_length=36, description="Cart quote whose prices to check against")
 
     @field_validator('customer_name')
     @classmethod
@@ -43,13 +46,43 @@ class OrderStatusUpdate(BaseModel):
     status: OrderStatus = Field(..., description="New order status")
 
 
+class BulkStatusUpdate(BaseModel):
+    """Schema for moving many orders to a new status at once."""
+    status: OrderStatus = Field(..., description="New order status")
+    order_ids: Optional[List[int]] = Field(None, min_length=1, max_length=1000, description="Orders to update")
+    delivery_date: Optional[date] = Field(None, description="Only orders for this delivery date")
+    from_status: Optional[OrderStatus] = Field(None, description="Only orders currently in this status")
+
+    @model_validator(mode='after')
+    def require_selection(self) -> "BulkStatusUpdate":
+        """Refuse to update every order in the table by accident."""
+        if self.order_ids is None and self.delivery_date is None:
+            raise ValueError("Provide order_ids or delivery_date")
+        if self.order_ids is not None:
+            self.order_ids = list(dict.fromkeys(self.order_ids))
+        return self
+
+
+class BulkHarvestRequest(BaseModel):
+    """Schema for marking several order items harvested at once."""
+    item_ids: List[int] = Field(..., min_length=1, max_length=500, description="Order item IDs to mark harvested")
+
+    @field_validator('item_ids')
+    @classmethod
+    def dedupe_ids(cls, v: List[int]) -> List[int]:
+        """Drop repeated IDs, keeping request order."""
+        return list(dict.fromkeys(v))
+
+
 class OrderItemResponse(BaseModel):
-    """Schema for order item response."""
+    """Schema for order item response (product and farmer must be eager-loaded)."""
     id: int
+    order_id: int
     product_id: int
     quantity: int
     price_at_time: float
     is_harvested: bool
+    product: Optional[ProductWithFarmerResponse] = None
 
     class Config:
         from_attributes = True
@@ -69,3 +102,116 @@ class OrderResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class TrackedOrderItemResponse(OrderItemResponse):
+    """Order item as shown to a tracking customer: the product without its farmer."""
+    product: Optional[ProductResponse] = None
+
+
+class TrackedOrderResponse(OrderResponse):
+    """Schema for a tracked (live or archived) order."""
+    items: List[TrackedOrderItemResponse] = []
+
+
+class OrderPlacedResponse(BaseModel):
+    """Schema for order creation response."""
+    status: str
+    order_id: int
+
+
+class OrderCancelledResponse(BaseModel):
+    """Schema for order cancellation response."""
+    status: str
+    message: str
+
+
+class OrderStatusResponse(BaseModel):
+    """Schema for single order status update response."""
+    status: str
+    new_status: str
+
+
+class SkippedOrder(BaseModel):
+    """Order left unchanged by a bulk status update, with its current status."""
+    order_id: int
+    status: str
+
+
+class BulkStatusResponse(BaseModel):
+    """Schema for bulk status update response."""
+    new_status: str
+    updated: List[int]
+    skipped: List[SkippedOrder]
+    not_found: List[int]
+
+
+class HarvestResponse(BaseModel):
+    """Schema for single item harvest response."""
+    status: str
+    item_id: int
+    order_status: str
+    all_items_harvested: bool
+
+
+class ItemHarvestResult(BaseModel):
+    """Outcome for one item of a bulk harvest."""
+    item_id: int
+    status: str
+
+
+class BulkHarvestResponse(BaseModel):
+    """Schema for bulk harvest response."""
+    results: List[ItemHarvestResult]
+    harvested: int
+    packed_orders: List[int]
+
+
+class FarmerItemProduct(BaseModel):
+    """Product summary on a farmer order item."""
+    id: int
+    name: str
+    unit: str
+
+
+class FarmerItemOrder(BaseModel):
+    """Order summary on a farmer order item."""
+    id: int
+    status: str
+    customer_name: str
+    delivery_date: Optional[date] = None
+    created_at: datetime
+
+
+class FarmerOrderItem(BaseModel):
+    """Order item of one of the farmer's products, with its product and order."""
+    id: int
+    order_id: int
+    product_id: int
+    quantity: int
+    price_at_time: float
+    is_harvested: bool
+    product: FarmerItemProduct
+    order: FarmerItemOrder
+
+
+class PickListLine(BaseModel):
+    """Quantity of one product still to harvest."""
+    product_id: int
+    name: str
+    unit: str
+    quantity: int
+    order_count: int
+
+
+class PickListResponse(BaseModel):
+    """Schema for pick list response."""
+    farmer_id: int
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    items: List[PickListLine]
+
+
+class ArchiveResponse(BaseModel):
+    """Schema for order archiving response."""
+    archived: int
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional
+from typing import List, Optional
 
 
 class ProductBase(BaseModel):
@@ -25,6 +25,11 @@ class ProductCreate(ProductBase):
     farmer_id: int = Field(..., gt=0, description="Farmer ID must be positive")
 
 
+class ProductImportRow(ProductCreate):
+    """One row of a bulk import; ``id`` updates that product instead of matching by name."""
+    id: Optional[int] = Field(None, gt=0, description="Existing product to update")
+
+
 class ProductUpdate(BaseModel):
     """Schema for updating products (all fields optional)."""
     name: Optional[str] = Field(None, min_length=2, max_length=100)
@@ -34,9 +39,19 @@ class ProductUpdate(BaseModel):
     stock_qty: Optional[float] = Field(None, ge=0, le=1000000)
 
 
-class ProductResponse(ProductBase):
-    """Schema for product response."""
+class ProductResponse(BaseModel):
+    """
+    Schema for product response.
+
+    Not derived from ``ProductBase``: responses describe stored rows and
+    must not re-apply input limits to them.
+    """
     id: int
+    name: str
+    price: float
+    unit: str
+    is_organic: bool
+    stock_qty: float
     farmer_id: int
     image_url: Optional[str] = None
 
@@ -44,5 +59,92 @@ class ProductResponse(ProductBase):
         from_attributes = True
 
 
+class FarmerResponse(BaseModel):
+    """Schema for farmer profile response."""
+    id: int
+    name: str
+    location: str
+    bio: Optional[str] = None
+    profile_pic: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ProductWithFarmerResponse(ProductResponse):
+    """Product with its farmer, as shown in the catalog (farmer must be eager-loaded)."""
+    farmer: Optional[FarmerResponse] = None
+
+
+class ProductSearchResult(ProductWithFarmerResponse):
+    """Search hit: a catalog product plus its relevance."""
+    rank: float
+
+
+class FarmerDetailResponse(FarmerResponse):
+    """Farmer profile with their products (products must be eager-loaded)."""
+    products: List[ProductResponse] = []
+
+
+class StockUpdateResponse(BaseModel):
+    """Schema for stock update response."""
+    status: str
+    new_qty: float
+
+
 # Alias for backward compatibility
 Product = ProductResponse
+
+
+class ImageUploadResponse(BaseModel):
+    """Schema for product image upload response."""
+    image_url: str
+
+
+class ProductImportError(BaseModel):
+    """A rejected import row and why."""
+    line: int
+    errors: List[str]
+
+
+class ProductImportResponse(BaseModel):
+    """Schema for bulk import report."""
+    format: str
+    dry_run: bool
+    rows: int
+    inserted: int
+    updated: int
+    failed: int
+    errors: List[ProductImportError]
+    errors_truncated: bool
+
+
+class InventoryPatchItem(BaseModel):
+    """New stock level (and optionally price) for one product."""
+    product_id: int = Field(..., gt=0, description="Product ID must be positive")
+    stock_qty: float = Field(..., ge=0, le=1000000, description="New stock quantity")
+    price: Optional[float] = Field(None, ge=0, le=100000, description="New price (unchanged if omitted)")
+
+
+class InventoryPatchRequest(BaseModel):
+    """Schema for setting many products' stock in one request."""
+    items: List[InventoryPatchItem] = Field(..., min_length=1, max_length=1000, description="Products to update")
+
+
+class InventoryLine(BaseModel):
+    """Stock and price of a product after an inventory patch."""
+    product_id: int
+    stock_qty: float
+    price: float
+
+
+class InventoryRejection(BaseModel):
+    """An inventory patch entry that was not applied, and why."""
+    product_id: int
+    reason: str
+
+
+class InventoryPatchResponse(BaseModel):
+    """Schema for inventory patch response."""
+    updated: List[InventoryLine]
+    rejected: List[InventoryRejection]
@@ -24,6 +24,17 @@ class MessageResponse(BaseModel):
     message: str
 
 
+class CacheStatsResponse(BaseModel):
+    """Size and hit/miss counters of an in-process response cache."""
+    entries: int
+    max_entries: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    hit_ratio: Optional[float] = None
+    invalidations: int
+
+
 class PaginatedResponse(BaseModel, Generic[T]):
     """Paginated response wrapper."""
     success: bool = True
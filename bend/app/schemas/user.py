@@ -35,9 +35,11 @@ class UserCreate(UserBase):
         return v
 
 
-class UserResponse(UserBase):
-    """Schema for user response."""
+class UserResponse(BaseModel):
+    """Schema for user response (never includes the password hash)."""
     id: int
+    # Plain str: stored addresses were validated on the way in
+    email: str
     role: str
     farmer_id: Optional[int] = None
 
@@ -86,3 +88,31 @@ class TokenResponse(BaseModel):
     token_type: str = "bearer"
     role: str
     email: str
+
+
+class LogoutResponse(BaseModel):
+    """Schema for logout response."""
+    detail: str
+
+
+class UserCreatedResponse(BaseModel):
+    """Schema for admin user creation response."""
+    message: str
+    user_id: int
+
+
+class RoleUpdateResponse(BaseModel):
+    """Schema for user role update response."""
+    message: str
+    new_role: str
+
+
+class PasswordResetResponse(BaseModel):
+    """Schema for password reset response."""
+    temporary_password: str
+
+
+class FarmerSavedResponse(BaseModel):
+    """Schema for farmer registration and update responses."""
+    message: str
+    farmer_id: int
@@ -0,0 +1,149 @@
+"""
+Archival of closed orders.
+
+Delivered and cancelled orders older than ARCHIVE_AFTER_DAYS are moved,
+with their items, from ``orders``/``order_items`` into ``orders_archive``/
+``order_items_archive`` in batches. Each batch is one transaction: copy,
+then delete, so an order is always in exactly one place. On Postgres the
+archive tables are partitioned by month and the partitions a batch needs
+are created first.
+
+Run periodically, e.g. from a cron job::
+
+    python -m app.utils.archive
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import select, insert, delete, text, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import dialect_name
+from app.models.archive import ArchivedOrder, ArchivedOrderItem
+from app.models.order import Order, OrderItem
+from app.schemas.enums import OrderStatus
+
+logger = logging.getLogger(__name__)
+
+ARCHIVABLE_STATUSES = [OrderStatus.DELIVERED.value, OrderStatus.CANCELLED.value]
+
+# Columns copied as-is from the live tables
+ARCHIVED_ORDER_COLUMNS = [
+    "id", "created_at", "customer_name", "customer_email", "address", "total_price", "delivery_date", "status",
+]
+ARCHIVED_ITEM_COLUMNS = ["id", "order_id", "product_id", "quantity", "price_at_time", "is_harvested"]
+
+
+def _month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def _next_month(value: datetime) -> datetime:
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+async def ensure_month_partitions(db: AsyncSession, months: Iterable[datetime]) -> None:
+    """Create the monthly archive partitions for ``months`` (Postgres only; no-op elsewhere)."""
+    if dialect_name(db) != "postgresql":
+        return
+    for month in sorted({_month_start(m) for m in months}):
+        start, end = month.date().isoformat(), _next_month(month).date().isoformat()
+        suffix = month.strftime("p%Y%m")
+        for parent in (ArchivedOrder.__tablename__, ArchivedOrderItem.__tablename__):
+            await db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {parent}_{suffix} PARTITION OF {parent} "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            ))
+
+
+async def archive_batch(db: AsyncSession, cutoff: datetime, batch_size: int) -> int:
+    """
+    Move one batch of closed orders created before ``cutoff``. Does not commit.
+
+    Returns:
+        Number of orders archived (0 when nothing is left)
+    """
+    result = await db.execute(
+        select(Order.id, Order.created_at)
+        .where(Order.status.in_(ARCHIVABLE_STATUSES), Order.created_at < cutoff)
+        .order_by(Order.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    rows = result.all()
+    if not rows:
+        return 0
+    order_ids = [row.id for row in rows]
+
+    await ensure_month_partitions(db, {row.created_at for row in rows})
+
+    now = datetime.utcnow()
+    await db.execute(
+        insert(ArchivedOrder).from_select(
+            ARCHIVED_ORDER_COLUMNS + ["archived_at"],
+            select(*[getattr(Order, c) for c in ARCHIVED_ORDER_COLUMNS], literal(now))
+            .where(Order.id.in_(order_ids)),
+        )
+    )
+    await db.execute(
+        insert(ArchivedOrderItem).from_select(
+            ARCHIVED_ITEM_COLUMNS + ["order_created_at"],
+            select(*[getattr(OrderItem, c) for c in ARCHIVED_ITEM_COLUMNS], Order.created_at)
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(OrderItem.order_id.in_(order_ids)),
+        )
+    )
+    await db.execute(
+        delete(OrderItem).where(OrderItem.order_id.in_(order_ids)).execution_options(synchronize_session=False)
+    )
+    await db.execute(
+        delete(Order).where(Order.id.in_(order_ids)).execution_options(synchronize_session=False)
+    )
+    return len(order_ids)
+
+
+async def archive_closed_orders(
+    db: AsyncSession,
+    older_than_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> int:
+    """
+    Archive every closed order older than the cutoff, committing per batch.
+
+    Args:
+        db: Session to use (committed after each batch)
+        older_than_days: Age cutoff (default ARCHIVE_AFTER_DAYS)
+        batch_size: Orders per transaction (default ARCHIVE_BATCH_SIZE)
+
+    Returns:
+        Total number of orders archived
+    """
+    older_than_days = settings.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+
+    total = 0
+    while True:
+        moved = await archive_batch(db, cutoff, batch_size)
+        await db.commit()
+        total += moved
+        if moved < batch_size:
+            break
+    if total:
+        logger.info(f"Archived {total} closed orders created before {cutoff.isoformat()}")
+    return total
+
+
+async def _main() -> None:
+    from app.core.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        total = await archive_closed_orders(session)
+    print(f"Archived {total} orders")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
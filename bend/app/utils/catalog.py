@@ -0,0 +1,114 @@
+"""
+Filter and sort parameters for product listings.
+
+Each filter/sort combination a shopper can pick is served by an index
+(see ``Product.__table_args__``):
+
+- in stock, newest first        -> partial ``ix_products_in_stock (id) WHERE stock_qty > 0``
+- in stock, by price            -> partial ``ix_products_in_stock_price (price, id) WHERE stock_qty > 0``
+- by price / price range        -> ``ix_products_price_id (price, id)``
+- one farmer                    -> ``ix_products_farmer_id_id (farmer_id, id)``
+
+The in-stock predicate is rendered as a literal (``stock_qty > 0``) rather
+than a bound parameter so the planner can prove it implies the partial
+indexes' WHERE clause.
+
+Totals of in-stock listings change with every stock movement, so they are
+cached under their own key and dropped, along with the rendered public
+pages, by ``invalidate_catalog``.
+"""
+from typing import Optional
+
+from fastapi import HTTPException, Query
+from sqlalchemy import Select, literal_column, select
+from sqlalchemy.orm import joinedload
+
+from app.models.product import Product
+from app.schemas.enums import ProductSort
+from app.utils.counting import count_cache
+from app.utils.response_cache import catalog_cache
+
+IN_STOCK = Product.stock_qty > literal_column("0")
+
+# Count cache key for totals that depend on stock levels
+IN_STOCK_COUNTS = "products_in_stock"
+
+
+def invalidate_catalog() -> None:
+    """Drop cached catalog pages and stock-dependent totals after a write."""
+    catalog_cache.invalidate()
+    count_cache.invalidate(IN_STOCK_COUNTS)
+
+
+class CatalogFilters:
+    """Dependency for product listing filters and sort order."""
+
+    def __init__(
+        self,
+        in_stock: bool = Query(False, description="Only products with stock left"),
+        organic: Optional[bool] = Query(None, description="Only organic (true) or non-organic (false) products"),
+        min_price: Optional[float] = Query(None, ge=0, description="Lowest price, inclusive"),
+        max_price: Optional[float] = Query(None, ge=0, description="Highest price, inclusive"),
+        farmer_id: Optional[int] = Query(None, gt=0, description="Only this farmer's products"),
+        sort: ProductSort = Query(ProductSort.NEWEST, description="Sort order"),
+    ):
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise HTTPException(status_code=422, detail="min_price cannot be greater than max_price")
+        self.in_stock = in_stock
+        self.organic = organic
+        self.min_price = min_price
+        self.max_price = max_price
+        self.farmer_id = farmer_id
+        self.sort = sort
+
+    def conditions(self) -> list:
+        """WHERE clauses for the selected filters."""
+        conditions = []
+        if self.in_stock:
+            conditions.append(IN_STOCK)
+        if self.organic is not None:
+            conditions.append(Product.is_organic == self.organic)
+        if self.min_price is not None:
+            conditions.append(Product.price >= self.min_price)
+        if self.max_price is not None:
+            conditions.append(Product.price <= self.max_price)
+        if self.farmer_id is not None:
+            conditions.append(Product.farmer_id == self.farmer_id)
+        return conditions
+
+    def order_by(self) -> list:
+        """ORDER BY matching the sort; ``id`` breaks ties so pages are stable."""
+        if self.sort == ProductSort.PRICE_ASC:
+            return [Product.price.asc(), Product.id.asc()]
+        if self.sort == ProductSort.PRICE_DESC:
+            return [Product.price.desc(), Product.id.desc()]
+        return [Product.id.desc()]
+
+    def apply(self, query: Select) -> Select:
+        """Add the filters and sort order to a product query."""
+        return query.where(*self.conditions()).order_by(*self.order_by())
+
+    def page_query(self, offset: int, limit: int) -> Select:
+        """One listing page: filtered, sorted products with their farmer."""
+        query = self.apply(select(Product).options(joinedload(Product.farmer)))
+        return query.offset(offset).limit(limit)
+
+    @property
+    def count_table(self) -> str:
+        """Count cache key the total is invalidated under."""
+        return IN_STOCK_COUNTS if self.in_stock else "products"
+
+    def count_filters(self) -> dict:
+        """Filter values that shape the total (``{}`` when unfiltered)."""
+        values = {
+            "in_stock": self.in_stock or None,
+            "organic": self.organic,
+            "min_price": self.min_price,
+            "max_price": self.max_price,
+            "farmer_id": self.farmer_id,
+        }
+        return {key: value for key, value in values.items() if value is not None}
+
+    def cache_key(self) -> tuple:
+        """Hashable form of the filters and sort, for response caching."""
+        return tuple(sorted(self.count_filters().items())) + (("sort", self.sort.value),)
@@ -0,0 +1,126 @@
+"""
+Totals for paginated list endpoints.
+
+Exact counts are cached per table and filter set, and dropped whenever a
+write to that table is reported through ``count_cache.invalidate``. Large
+unfiltered Postgres tables can use the planner's row estimate instead of
+counting. The cache is per process; other replicas see a write once their
+entry expires (COUNT_CACHE_TTL_SECONDS).
+"""
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import Select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import dialect_name
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, Tuple[Tuple[str, object], ...]]
+
+
+class CountCache:
+    """In-memory cache of exact totals with per-table invalidation."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[CacheKey, Tuple[int, float]] = {}
+        # Bumped on every invalidation so in-flight counts can't store stale values
+        self._generations: Dict[str, int] = {}
+
+    @staticmethod
+    def key(table: str, filters: dict) -> CacheKey:
+        return table, tuple(sorted(filters.items()))
+
+    def generation(self, table: str) -> int:
+        return self._generations.get(table, 0)
+
+    def get(self, key: CacheKey) -> Optional[int]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        total, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        return total
+
+    def set(self, key: CacheKey, total: int, generation: int) -> None:
+        if self.generation(key[0]) != generation:
+            return  # a write happened while we were counting
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            # Evict the oldest entry (dicts keep insertion order)
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (total, time.monotonic() + self.ttl_seconds)
+
+    def invalidate(self, *tables: str) -> None:
+        """Drop cached totals for ``tables`` after a write."""
+        for table in tables:
+            self._generations[table] = self.generation(table) + 1
+        self._entries = {k: v for k, v in self._entries.items() if k[0] not in tables}
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._generations.clear()
+
+
+count_cache = CountCache(
+    ttl_seconds=settings.COUNT_CACHE_TTL_SECONDS,
+    max_entries=settings.COUNT_CACHE_MAX_ENTRIES,
+)
+
+
+async def _planner_estimate(db: AsyncSession, table: str) -> Optional[int]:
+    """Row estimate from Postgres statistics, or None if unavailable."""
+    if dialect_name(db) != "postgresql":
+        return None
+    result = await db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table},
+    )
+    estimate = result.scalar()
+    # reltuples is -1 (or 0) until the table has been vacuumed/analyzed
+    return estimate if estimate and estimate > 0 else None
+
+
+async def get_total(
+    db: AsyncSession,
+    count_query: Select,
+    table: str,
+    filters: dict,
+    include_total: bool = True,
+) -> Tuple[Optional[int], bool]:
+    """
+    Resolve the total for a list endpoint.
+
+    Args:
+        db: Request session
+        count_query: Exact ``SELECT count(...)`` for the current filters
+        table: Table the count depends on (the invalidation key)
+        filters: Filter values that shape the count; ``{}`` means unfiltered
+        include_total: When False, skip counting entirely
+
+    Returns:
+        Tuple of (total or None, whether the total is an estimate)
+    """
+    if not include_total:
+        return None, False
+
+    key = count_cache.key(table, filters)
+    cached = count_cache.get(key)
+    if cached is not None:
+        return cached, False
+
+    if not filters:
+        estimate = await _planner_estimate(db, table)
+        if estimate is not None and estimate >= settings.COUNT_ESTIMATE_THRESHOLD:
+            return estimate, True
+
+    generation = count_cache.generation(table)
+    total = (await db.execute(count_query)).scalar() or 0
+    count_cache.set(key, total, generation)
+    return total, False
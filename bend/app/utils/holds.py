@@ -0,0 +1,258 @@
+"""
+Short-lived stock holds for carts in checkout.
+
+During a harvest drop many customers fill carts at once. A hold claims
+stock for CART_HOLD_TTL_SECONDS so the customer learns about a shortage
+when adding to the cart rather than at ``create_order``:
+
+- available stock is ``stock_qty`` minus live holds, computed in SQL
+  (``available_stock``), so an expired hold stops counting immediately,
+  whether or not it has been swept yet;
+- placing holds is one conditional INSERT ... SELECT per cart, after
+  locking the product rows so concurrent carts cannot both claim the
+  same last units;
+- ``create_order`` with a ``hold_id`` reserves against stock excluding the
+  cart's own hold and then deletes it (the hold is converted);
+- expired rows are deleted in batches by the sweeper.
+
+The endpoint is public, so each client (by IP address, see
+``get_client_ip``) may only hold
+CART_HOLD_MAX_UNITS_PER_CLIENT units at once across all its carts, and
+CART_HOLD_MAX_UNITS_PER_PRODUCT of any one product; one script cannot tie
+up the catalog by opening or renewing carts.
+"""
+import asyncio
+import hashlib
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select, delete, insert, case, func, literal, or_, and_, DateTime, String
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import dialect_name
+from app.models.hold import StockHold
+from app.models.product import Product
+from app.utils.stock import aggregate_quantities, available_stock, held_quantity, raise_reservation_error
+
+logger = logging.getLogger(__name__)
+
+
+def hold_client_key(address: str) -> str:
+    """Fixed-width ``StockHold.client_key`` for a client address (SHA-256 hex digest)."""
+    return hashlib.sha256(address.encode()).hexdigest()
+
+
+async def check_client_caps(
+    db: AsyncSession,
+    client_key: str,
+    quantities: Dict[int, int],
+    hold_id: str,
+    now: datetime,
+) -> None:
+    """
+    Reject a hold that would take a client over its caps.
+
+    The client's other live holds count towards the caps; the cart's own
+    (``hold_id``), which the new one replaces, does not. Concurrent holds of
+    one client are serialized first (a transaction-scoped advisory lock on
+    Postgres; SQLite already serializes writers), so they cannot both pass
+    the check.
+
+    Raises:
+        HTTPException: 429 if a cap would be exceeded
+    """
+    if dialect_name(db) == "postgresql":
+        await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"stock_holds:{client_key}"))))
+    result = await db.execute(
+        select(StockHold.product_id, func.sum(StockHold.quantity))
+        .where(
+            StockHold.client_key == client_key,
+            StockHold.expires_at > now,
+            StockHold.hold_id != hold_id,
+        )
+        .group_by(StockHold.product_id)
+    )
+    held = dict(result.all())
+
+    per_product = settings.CART_HOLD_MAX_UNITS_PER_PRODUCT
+    for product_id, quantity in quantities.items():
+        if held.get(product_id, 0) + quantity > per_product:
+            raise HTTPException(
+                status_code=429,
+                detail=f"Cannot hold more than {per_product} units of product {product_id}",
+            )
+    if sum(held.values()) + sum(quantities.values()) > settings.CART_HOLD_MAX_UNITS_PER_CLIENT:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Cannot hold more than {settings.CART_HOLD_MAX_UNITS_PER_CLIENT} units at once",
+        )
+
+
+async def place_holds(
+    db: AsyncSession,
+    items: Iterable,
+    hold_id: Optional[str] = None,
+    client_key: Optional[str] = None,
+) -> dict:
+    """
+    Hold stock for every line of a cart, all or nothing. Does not commit.
+
+    Passing an existing ``hold_id`` replaces that cart's holds and restarts
+    the TTL, so the client can call this again whenever the cart changes.
+
+    Args:
+        db: Active session; the caller owns the transaction
+        items: Cart lines with ``product_id`` and ``quantity``
+        hold_id: Cart token from a previous call, or None for a new cart
+        client_key: Client placing the hold; when given, its caps are enforced
+
+    Returns:
+        ``{"hold_id", "expires_at", "items": [{"product_id", "quantity"}]}``
+
+    Raises:
+        HTTPException: 429 if the client would exceed its hold caps
+        StockReservationError: 404 if a product does not exist, 400 if stock is short;
+            the caller must roll back
+    """
+    quantities = aggregate_quantities(items)
+    hold_id = hold_id or str(uuid.uuid4())
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=settings.CART_HOLD_TTL_SECONDS)
+
+    # Serialize carts competing for the same products (no-op on SQLite,
+    # where writers are already serialized)
+    await db.execute(
+        select(Product.id)
+        .where(Product.id.in_(quantities.keys()))
+        .order_by(Product.id)
+        .with_for_update()
+    )
+    # Drop the cart's previous holds, and any expired ones on these products
+    await db.execute(
+        delete(StockHold)
+        .where(or_(
+            StockHold.hold_id == hold_id,
+            and_(StockHold.product_id.in_(quantities.keys()), StockHold.expires_at <= now),
+        ))
+        .execution_options(synchronize_session=False)
+    )
+    if client_key is not None:
+        await check_client_caps(db, client_key, quantities, hold_id, now)
+
+    requested = case(quantities, value=Product.id)
+    result = await db.execute(
+        insert(StockHold)
+        .from_select(
+            ["hold_id", "product_id", "quantity", "client_key", "created_at", "expires_at"],
+            select(
+                literal(hold_id, String),
+                Product.id,
+                requested,
+                literal(client_key, String),
+                literal(now, DateTime),
+                literal(expires_at, DateTime),
+            ).where(Product.id.in_(quantities.keys()), available_stock(now) >= requested),
+        )
+        .returning(StockHold.product_id)
+    )
+    held = set(result.scalars())
+
+    if len(held) < len(quantities):
+        failed_ids = [pid for pid in quantities if pid not in held]
+        await raise_reservation_error(db, quantities, failed_ids, now)
+
+    return {
+        "hold_id": hold_id,
+        "expires_at": expires_at,
+        "items": [{"product_id": pid, "quantity": qty} for pid, qty in quantities.items()],
+    }
+
+
+async def release_holds(db: AsyncSession, hold_id: str) -> int:
+    """
+    Delete every hold of one cart. Does not commit.
+
+    Called when the cart is abandoned and after its order has reserved the
+    stock (conversion).
+
+    Returns:
+        Number of hold rows deleted
+    """
+    result = await db.execute(
+        delete(StockHold)
+        .where(StockHold.hold_id == hold_id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+async def get_availability(db: AsyncSession, product_ids: List[int]) -> List[Dict]:
+    """Stock, live held quantity and available quantity for each existing product."""
+    now = datetime.utcnow()
+    held = held_quantity(now)
+    result = await db.execute(
+        select(Product.id, Product.stock_qty, held.label("held"))
+        .where(Product.id.in_(product_ids))
+        .order_by(Product.id)
+    )
+    return [
+        {
+            "product_id": row.id,
+            "stock_qty": row.stock_qty,
+            "held": row.held,
+            "available": max(row.stock_qty - row.held, 0),
+        }
+        for row in result
+    ]
+
+
+async def sweep_expired_holds(db: AsyncSession, batch_size: Optional[int] = None) -> int:
+    """
+    Delete expired holds in batches, committing after each batch.
+
+    Expired holds already stop counting against stock; sweeping only keeps
+    the table (and the held-quantity index scans) small.
+
+    Returns:
+        Number of holds deleted
+    """
+    batch_size = batch_size or settings.HOLD_SWEEP_BATCH_SIZE
+    now = datetime.utcnow()
+    total = 0
+    while True:
+        expired = (
+            select(StockHold.id)
+            .where(StockHold.expires_at <= now)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            delete(StockHold)
+            .where(StockHold.id.in_(expired))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
+
+
+async def run_hold_sweeper(session_factory, stop: asyncio.Event) -> None:
+    """Sweep expired holds every HOLD_SWEEP_INTERVAL_SECONDS until ``stop`` is set."""
+    logger.info("Stock hold sweeper started")
+    while not stop.is_set():
+        try:
+            async with session_factory() as db:
+                swept = await sweep_expired_holds(db)
+            if swept:
+                logger.info(f"Swept {swept} expired stock holds")
+        except Exception as e:
+            logger.error(f"Stock hold sweeper error: {e}")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.HOLD_SWEEP_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,272 @@
+"""
+Idempotency-Key support for non-idempotent POST endpoints.
+
+The first request with a given key claims it by inserting a row, runs the
+handler and stores the response in the same transaction as its side
+effects. Replays return the stored response without re-running the handler.
+A duplicate that arrives while the original is still running waits for the
+stored result: in-process via an asyncio.Event, across replicas by polling
+the row.
+
+A claim is a lease held by one request (``owner``) until ``locked_until``.
+If the worker dies before storing a response, a later request with the same
+key takes the lapsed claim over instead of getting 409 until the key
+expires. The response is only stored while the request still owns the
+claim, so a slow original that lost its lease cannot commit a second time.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import select, delete, update, or_, Row
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.idempotency import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = 0.1
+
+# Keys currently being processed by this worker -> set when the response is stored
+_in_flight: Dict[str, asyncio.Event] = {}
+
+
+def request_fingerprint(payload: BaseModel) -> str:
+    """Hash a request body so a reused key with a different body can be rejected."""
+    return hashlib.sha256(payload.model_dump_json().encode("utf-8")).hexdigest()
+
+
+def _error_body(exc: HTTPException) -> dict:
+    """Body FastAPI would send for ``exc`` (including any failure report)."""
+    body = {"detail": exc.detail}
+    failures = getattr(exc, "failures", None)
+    if failures is not None:
+        body["failures"] = failures
+    return body
+
+
+def _check_fingerprint(row: Row, fingerprint: str) -> None:
+    """Reject a key reused with a different request body."""
+    if row.request_hash != fingerprint:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key has already been used with a different request",
+        )
+
+
+def _replay(row: Row, fingerprint: str) -> JSONResponse:
+    """Return the stored response for a completed key."""
+    _check_fingerprint(row, fingerprint)
+    return JSONResponse(
+        status_code=row.status_code,
+        content=json.loads(row.response_body),
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+async def _load(db: AsyncSession, key: str) -> Optional[Row]:
+    """Fetch a live (unexpired) key as a plain row, so it survives a rollback."""
+    result = await db.execute(
+        select(
+            IdempotencyKey.request_hash,
+            IdempotencyKey.status_code,
+            IdempotencyKey.response_body,
+            IdempotencyKey.locked_until,
+        ).where(IdempotencyKey.key == key, IdempotencyKey.expires_at > datetime.utcnow())
+    )
+    return result.one_or_none()
+
+
+def _lease_lapsed(row: Row, now: datetime) -> bool:
+    """True for an in-progress key whose owner stopped before storing a response."""
+    return row.status_code is None and (row.locked_until is None or row.locked_until <= now)
+
+
+async def _wait_for_response(db: AsyncSession, key: str, fingerprint: str) -> JSONResponse:
+    """Poll a key claimed by another worker until its response is stored."""
+    deadline = asyncio.get_running_loop().time() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        row = await _load(db, key)
+        await db.rollback()  # end the read transaction so the next poll sees new commits
+        if row is None or _lease_lapsed(row, datetime.utcnow()):
+            # The original failed and released the key, or was abandoned;
+            # a retry runs again (taking over the lapsed claim)
+            raise HTTPException(status_code=409, detail="Original request failed. Please retry.")
+        if row.status_code is not None:
+            return _replay(row, fingerprint)
+        if asyncio.get_running_loop().time() >= deadline:
+            raise HTTPException(
+                status_code=409,
+                detail="A request with this Idempotency-Key is still being processed",
+            )
+        await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+
+async def _claim(db: AsyncSession, key: str, fingerprint: str) -> Optional[str]:
+    """Insert the in-progress row for ``key``. Returns the owner token, or None if already claimed."""
+    now = datetime.utcnow()
+    owner = str(uuid.uuid4())
+    await db.execute(
+        delete(IdempotencyKey)
+        .where(IdempotencyKey.expires_at <= now)
+        .execution_options(synchronize_session=False)
+    )
+    db.add(IdempotencyKey(
+        key=key,
+        request_hash=fingerprint,
+        owner=owner,
+        locked_until=now + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS),
+        created_at=now,
+        expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+    ))
+    try:
+        await db.commit()
+        return owner
+    except IntegrityError:
+        await db.rollback()
+        return None
+
+
+async def _take_over(db: AsyncSession, key: str) -> Optional[str]:
+    """
+    Claim an in-progress key whose lease has lapsed.
+
+    The conditional UPDATE succeeds for at most one of several concurrent
+    retries. Returns the new owner token, or None if the key was stored,
+    released or taken over by someone else first.
+    """
+    now = datetime.utcnow()
+    owner = str(uuid.uuid4())
+    result = await db.execute(
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.key == key,
+            IdempotencyKey.status_code.is_(None),
+            or_(IdempotencyKey.locked_until.is_(None), IdempotencyKey.locked_until <= now),
+        )
+        .values(owner=owner, locked_until=now + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    if result.rowcount != 1:
+        return None
+    logger.warning(f"Took over abandoned idempotency key {key}")
+    return owner
+
+
+async def _store(db: AsyncSession, key: str, owner: str, status_code: int, body: Any) -> bool:
+    """
+    Record the response for ``key``; committed by the caller.
+
+    Returns False if the request no longer owns the claim (its lease lapsed
+    and a retry took over); the caller must then roll back.
+    """
+    result = await db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.key == key, IdempotencyKey.owner == owner)
+        .values(status_code=status_code, response_body=json.dumps(jsonable_encoder(body)))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+async def _release(db: AsyncSession, key: str, owner: str) -> None:
+    """Drop the claim after an unexpected failure so the client can retry."""
+    try:
+        await db.rollback()
+        await db.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.key == key, IdempotencyKey.owner == owner)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+    except SQLAlchemyError as e:
+        # The claim's lease will lapse and a retry can take it over
+        logger.error(f"Failed to release idempotency key {key}: {e}")
+
+
+async def run_idempotent(
+    db: AsyncSession,
+    key: str,
+    fingerprint: str,
+    handler: Callable[[], Awaitable[Any]],
+) -> Any:
+    """
+    Run ``handler`` at most once per ``key``.
+
+    ``handler`` must not commit; its changes are committed together with
+    the stored response. Client errors (4xx) are stored and replayed too;
+    server errors release the key so a retry runs again.
+
+    Args:
+        db: Request session
+        key: Scoped idempotency key, e.g. ``"orders:<header value>"``
+        fingerprint: Hash of the request body (see ``request_fingerprint``)
+        handler: Coroutine factory performing the request's work
+
+    Returns:
+        The handler's result, or a JSONResponse replaying the stored one
+    """
+    event = _in_flight.get(key)
+    if event is not None:
+        # Same key already running in this worker: wait for it instead of racing
+        try:
+            await asyncio.wait_for(event.wait(), timeout=settings.IDEMPOTENCY_WAIT_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        return await _wait_for_response(db, key, fingerprint)
+
+    event = _in_flight[key] = asyncio.Event()
+    try:
+        existing = await _load(db, key)
+        if existing is not None:
+            await db.rollback()
+            if existing.status_code is not None:
+                return _replay(existing, fingerprint)
+            if not _lease_lapsed(existing, datetime.utcnow()):
+                return await _wait_for_response(db, key, fingerprint)
+            _check_fingerprint(existing, fingerprint)
+            owner = await _take_over(db, key)
+            if owner is None:
+                return await _wait_for_response(db, key, fingerprint)
+        else:
+            owner = await _claim(db, key, fingerprint)
+            if owner is None:
+                # Another replica claimed it between our read and insert
+                return await _wait_for_response(db, key, fingerprint)
+
+        try:
+            result = await handler()
+        except HTTPException as exc:
+            if exc.status_code >= 500:
+                await _release(db, key, owner)
+                raise
+            await db.rollback()
+            if await _store(db, key, owner, exc.status_code, _error_body(exc)):
+                await db.commit()
+            else:
+                await db.rollback()
+            raise
+        except Exception:
+            await _release(db, key, owner)
+            raise
+
+        if not await _store(db, key, owner, 200, result):
+            # Our lease lapsed and a retry took over: its result is the one kept
+            await db.rollback()
+            raise HTTPException(status_code=409, detail="Original request failed. Please retry.")
+        await db.commit()
+        return result
+    finally:
+        event.set()
+        _in_flight.pop(key, None)
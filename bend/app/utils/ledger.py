@@ -0,0 +1,253 @@
+"""
+Append-only stock ledger, compacted snapshots and point-in-time stock.
+
+Every write to ``products.stock_qty`` also appends ``StockMovement`` rows
+(signed delta, reason, order or user) in the same transaction, so the
+ledger cannot drift from the stock it explains. Writers lock the product
+rows they overwrite before reading the old level, so concurrent changes
+never produce a wrong delta.
+
+Replaying the whole ledger gets slower as it grows, so it is compacted
+periodically into ``StockSnapshot`` rows: one per product that moved
+since its previous snapshot, computed from that snapshot plus the
+movements in between. Stock at time ``t`` is then the nearest snapshot at
+or before ``t`` plus the movements after it, a tail bounded by
+STOCK_SNAPSHOT_INTERVAL_SECONDS of activity, read with two index range
+scans whatever the ledger's size.
+
+Snapshots only cover movements older than STOCK_SNAPSHOT_LAG_SECONDS, so a
+transaction still open when a snapshot is taken is picked up by the next
+one instead of being skipped. A transaction open for longer than the lag
+can still commit movements behind a snapshot; later snapshots and
+``stock_at`` never see those, so the lag must exceed the longest write
+transaction.
+
+Runs are serialized (``snapshot_stock`` takes a transaction-scoped advisory
+lock on Postgres; SQLite serializes writers), so the background task, the
+cron job and the endpoint, on any number of replicas, never compute two
+snapshots from the same previous run or record opening balances twice.
+
+Products that had stock before the ledger existed get an ``opening``
+movement on the first run, net of any movements recorded before it. Runs happen in the background
+(STOCK_SNAPSHOT_ENABLED) or from a cron job::
+
+    python -m app.utils.ledger
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import select, insert, exists, func, literal, DateTime, String
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import dialect_name
+from app.models.ledger import StockMovement, StockSnapshot
+from app.models.product import Product
+from app.schemas.enums import StockMovementReason
+
+logger = logging.getLogger(__name__)
+
+
+async def record_movements(
+    db: AsyncSession,
+    deltas: Dict[int, float],
+    reason: StockMovementReason,
+    order_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> None:
+    """
+    Append one movement per product with a non-zero delta. Does not commit.
+
+    Args:
+        db: Session of the transaction that changes the stock
+        deltas: Mapping of product_id to its signed stock change
+        reason: Why the stock changed
+        order_id: Order that caused the change, if any
+        user_id: User who made the change, if any
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            "product_id": product_id,
+            "created_at": now,
+            "delta": float(delta),
+            "reason": reason.value,
+            "order_id": order_id,
+            "user_id": user_id,
+        }
+        for product_id, delta in deltas.items()
+        if delta
+    ]
+    if rows:
+        await db.execute(insert(StockMovement), rows)
+
+
+async def record_opening_balances(db: AsyncSession) -> int:
+    """
+    Append an ``opening`` movement for products whose ledger does not explain their stock. Does not commit.
+
+    A product created after the ledger existed starts from its ``created``
+    movement and never needs one. Any other product without an opening
+    balance gets ``stock_qty`` minus the movements it already has, so
+    orders or edits made before the first run are kept, not counted twice.
+
+    Returns:
+        Number of products given an opening balance
+    """
+    baseline = exists().where(
+        StockMovement.product_id == Product.id,
+        StockMovement.reason.in_([StockMovementReason.OPENING.value, StockMovementReason.CREATED.value]),
+    )
+    recorded = (
+        select(func.coalesce(func.sum(StockMovement.delta), 0))
+        .where(StockMovement.product_id == Product.id)
+        .correlate(Product)
+        .scalar_subquery()
+    )
+    opening = Product.stock_qty - recorded
+    result = await db.execute(
+        insert(StockMovement).from_select(
+            ["product_id", "created_at", "delta", "reason"],
+            select(
+                Product.id,
+                literal(datetime.utcnow(), DateTime),
+                opening,
+                literal(StockMovementReason.OPENING.value, String),
+            ).where(~baseline, opening != 0),
+        )
+    )
+    return result.rowcount
+
+
+async def take_snapshots(db: AsyncSession, until: Optional[datetime] = None) -> int:
+    """
+    Compact movements up to ``until`` into snapshots with one INSERT ... SELECT. Does not commit.
+
+    Each run starts where the previous one ended, so only the movements in
+    between are read. A run whose cutoff is not after the latest snapshot
+    writes nothing.
+
+    Args:
+        db: Active session; the caller owns the transaction
+        until: Cutoff (default now minus STOCK_SNAPSHOT_LAG_SECONDS)
+
+    Returns:
+        Number of snapshots written
+    """
+    cutoff = until or datetime.utcnow() - timedelta(seconds=settings.STOCK_SNAPSHOT_LAG_SECONDS)
+    last_run = (await db.execute(select(func.max(StockSnapshot.taken_at)))).scalar()
+    if last_run is not None and last_run >= cutoff:
+        return 0
+
+    previous = (
+        select(StockSnapshot.stock_qty)
+        .where(StockSnapshot.product_id == StockMovement.product_id)
+        .order_by(StockSnapshot.taken_at.desc())
+        .limit(1)
+        .correlate(StockMovement)
+        .scalar_subquery()
+    )
+    window = [StockMovement.created_at <= cutoff]
+    if last_run is not None:
+        window.append(StockMovement.created_at > last_run)
+    result = await db.execute(
+        insert(StockSnapshot).from_select(
+            ["product_id", "taken_at", "stock_qty"],
+            select(
+                StockMovement.product_id,
+                literal(cutoff, DateTime),
+                func.coalesce(previous, 0) + func.sum(StockMovement.delta),
+            )
+            .where(*window)
+            .group_by(StockMovement.product_id),
+        )
+    )
+    return result.rowcount
+
+
+async def stock_at(db: AsyncSession, product_id: int, at: datetime) -> dict:
+    """
+    Rebuild a product's stock at ``at`` from the nearest snapshot and the movements after it.
+
+    Returns:
+        ``{"product_id", "at", "stock_qty", "snapshot_at", "movements_replayed"}``;
+        ``snapshot_at`` is None when no snapshot precedes ``at``
+    """
+    result = await db.execute(
+        select(StockSnapshot.taken_at, StockSnapshot.stock_qty)
+        .where(StockSnapshot.product_id == product_id, StockSnapshot.taken_at <= at)
+        .order_by(StockSnapshot.taken_at.desc())
+        .limit(1)
+    )
+    snapshot = result.one_or_none()
+
+    tail = [StockMovement.product_id == product_id, StockMovement.created_at <= at]
+    if snapshot is not None:
+        tail.append(StockMovement.created_at > snapshot.taken_at)
+    result = await db.execute(
+        select(func.coalesce(func.sum(StockMovement.delta), 0).label("delta"), func.count().label("movements"))
+        .where(*tail)
+    )
+    replayed = result.one()
+
+    return {
+        "product_id": product_id,
+        "at": at,
+        "stock_qty": (snapshot.stock_qty if snapshot is not None else 0.0) + replayed.delta,
+        "snapshot_at": snapshot.taken_at if snapshot is not None else None,
+        "movements_replayed": replayed.movements,
+    }
+
+
+async def _lock_snapshot_runs(db: AsyncSession) -> None:
+    """Wait for any other snapshot run to commit; held until this transaction ends."""
+    if dialect_name(db) == "postgresql":
+        await db.execute(select(func.pg_advisory_xact_lock(func.hashtext("stock_snapshots"))))
+
+
+async def snapshot_stock(db: AsyncSession, until: Optional[datetime] = None) -> dict:
+    """
+    Record any missing opening balances, then take snapshots, and commit.
+
+    Concurrent runs wait for each other, so each starts from the snapshots
+    the previous one committed.
+
+    Returns:
+        ``{"opening_balances", "snapshots"}`` counts
+    """
+    await _lock_snapshot_runs(db)
+    opening = await record_opening_balances(db)
+    snapshots = await take_snapshots(db, until)
+    await db.commit()
+    if opening or snapshots:
+        logger.info(f"Stock ledger: {opening} opening balances, {snapshots} snapshots")
+    return {"opening_balances": opening, "snapshots": snapshots}
+
+
+async def run_snapshotter(session_factory, stop: asyncio.Event) -> None:
+    """Take stock snapshots every STOCK_SNAPSHOT_INTERVAL_SECONDS until ``stop`` is set."""
+    logger.info("Stock snapshotter started")
+    while not stop.is_set():
+        try:
+            async with session_factory() as db:
+                await snapshot_stock(db)
+        except Exception as e:
+            logger.error(f"Stock snapshotter error: {e}")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.STOCK_SNAPSHOT_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _main() -> None:
+    from app.core.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        counts = await snapshot_stock(session)
+    print(f"Recorded {counts['opening_balances']} opening balances, took {counts['snapshots']} snapshots")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
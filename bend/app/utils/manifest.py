@@ -0,0 +1,182 @@
+"""
+Delivery manifests: every open order for one delivery date.
+
+A manifest is built by one grouped query, streamed to the client as it is
+read, and the finished body is cached per date. Writes that touch an order
+report its delivery date through ``manifest_cache.invalidate`` (or
+``invalidate_order_dates`` when only ids are known), which drops that date's
+manifest. The cache is per process; other replicas pick up a change once
+their entry expires (MANIFEST_CACHE_TTL_SECONDS).
+"""
+import json
+import logging
+import time
+from datetime import date
+from typing import AsyncIterator, Dict, Iterable, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import Select, select, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.order import Order, OrderItem
+from app.schemas.enums import OrderStatus
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip while streaming a manifest
+MANIFEST_STREAM_BATCH = 500
+
+DELIVERABLE_STATUSES = [
+    OrderStatus.PENDING.value,
+    OrderStatus.CONFIRMED.value,
+    OrderStatus.PACKED.value,
+]
+
+
+class ManifestCache:
+    """In-memory cache of rendered manifests with per-date invalidation."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[date, Tuple[bytes, float]] = {}
+        # Bumped on every invalidation so a manifest built meanwhile is not stored
+        self._generations: Dict[date, int] = {}
+        self._building = 0
+
+    def generation(self, day: date) -> int:
+        return self._generations.get(day, 0)
+
+    @property
+    def active(self) -> bool:
+        """Whether any manifest is cached or being built (i.e. invalidation matters)."""
+        return bool(self._entries) or self._building > 0
+
+    def get(self, day: date) -> Optional[bytes]:
+        entry = self._entries.get(day)
+        if entry is None:
+            return None
+        body, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[day]
+            return None
+        return body
+
+    def set(self, day: date, body: bytes, generation: int) -> None:
+        if self.generation(day) != generation:
+            return  # an order for this date changed while we were building
+        if day not in self._entries and len(self._entries) >= self.max_entries:
+            # Evict the oldest entry (dicts keep insertion order)
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[day] = (body, time.monotonic() + self.ttl_seconds)
+
+    def invalidate(self, *days: Optional[date]) -> None:
+        """Drop manifests for ``days`` after an order for them changed."""
+        for day in days:
+            if day is None:
+                continue
+            self._generations[day] = self.generation(day) + 1
+            self._entries.pop(day, None)
+
+    def begin_build(self, day: date) -> int:
+        """Mark a build in progress and return the generation it must match to be stored."""
+        self._building += 1
+        return self.generation(day)
+
+    def end_build(self) -> None:
+        self._building = max(0, self._building - 1)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._generations.clear()
+        self._building = 0
+
+
+manifest_cache = ManifestCache(
+    ttl_seconds=settings.MANIFEST_CACHE_TTL_SECONDS,
+    max_entries=settings.MANIFEST_CACHE_MAX_ENTRIES,
+)
+
+
+async def invalidate_order_dates(db: AsyncSession, order_ids: Iterable[int]) -> None:
+    """
+    Invalidate the manifests of the given orders' delivery dates.
+
+    Skips the date lookup entirely when nothing is cached or being built.
+    """
+    order_ids = list(order_ids)
+    if not order_ids or not manifest_cache.active:
+        return
+    result = await db.execute(
+        select(Order.delivery_date)
+        .where(Order.id.in_(order_ids), Order.delivery_date.is_not(None))
+        .distinct()
+    )
+    manifest_cache.invalidate(*result.scalars().all())
+
+
+def manifest_query(day: date) -> Select:
+    """One row per deliverable order for ``day`` with its item counts and packing state."""
+    return (
+        select(
+            Order.id,
+            Order.customer_name,
+            Order.address,
+            Order.total_price,
+            Order.status,
+            func.count(OrderItem.id).label("item_count"),
+            func.sum(OrderItem.quantity).label("total_quantity"),
+            func.sum(case((OrderItem.is_harvested, 1), else_=0)).label("harvested_count"),
+        )
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .where(Order.delivery_date == day, Order.status.in_(DELIVERABLE_STATUSES))
+        .group_by(Order.id, Order.customer_name, Order.address, Order.total_price, Order.status)
+        .order_by(Order.id)
+    )
+
+
+def _manifest_entry(row) -> dict:
+    return {
+        "order_id": row.id,
+        "customer_name": row.customer_name,
+        "address": row.address,
+        "total_price": row.total_price,
+        "status": row.status,
+        "item_count": row.item_count,
+        "total_quantity": row.total_quantity,
+        "harvested_count": row.harvested_count,
+        "packed": row.status == OrderStatus.PACKED.value,
+    }
+
+
+async def stream_manifest(bind, day: date) -> AsyncIterator[bytes]:
+    """
+    Yield the manifest for ``day`` as a JSON document, then cache it.
+
+    Runs on its own session: the request's session is closed before the
+    body is streamed. The body is only cached if no order for ``day``
+    changed while it was being built.
+    """
+    generation = manifest_cache.begin_build(day)
+    try:
+        chunks = [f'{{"delivery_date":"{day.isoformat()}","orders":['.encode("utf-8")]
+        yield chunks[0]
+        first = True
+        async with AsyncSession(bind=bind) as session:
+            result = await session.stream(
+                manifest_query(day).execution_options(yield_per=MANIFEST_STREAM_BATCH)
+            )
+            async for partition in result.partitions():
+                parts = []
+                for row in partition:
+                    parts.append(("" if first else ",") + json.dumps(jsonable_encoder(_manifest_entry(row))))
+                    first = False
+                chunk = "".join(parts).encode("utf-8")
+                chunks.append(chunk)
+                yield chunk
+        chunks.append(b"]}")
+        yield chunks[-1]
+        manifest_cache.set(day, b"".join(chunks), generation)
+    finally:
+        manifest_cache.end_build()
@@ -0,0 +1,245 @@
+"""
+Transactional outbox for order events delivered to webhook sinks.
+
+Endpoints call ``enqueue_event`` inside the transaction that changes the
+order, so an event exists if and only if the change committed, and
+checkout never waits on a webhook. The dispatcher then:
+
+1. claims a batch of due rows (``FOR UPDATE SKIP LOCKED`` plus a lease in
+   ``locked_until``, so several dispatchers can run side by side),
+2. POSTs each payload to its sink concurrently,
+3. records the outcome: ``delivered``, or another attempt after an
+   exponential backoff, or ``failed`` after OUTBOX_MAX_ATTEMPTS.
+
+Sinks are configured with WEBHOOK_SINKS as ``name=url`` pairs, e.g.
+``pos=https://pos.example/hooks,notify=http://notifier/events``.
+Delivery is at least once; receivers should de-duplicate on X-Event-Id.
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, update, delete, insert, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = "order.created"
+ORDER_CANCELLED = "order.cancelled"
+ORDER_ITEMS_HARVESTED = "order.items_harvested"
+
+PURGE_INTERVAL = timedelta(hours=1)
+
+# Set after a commit that enqueued events, so the dispatcher does not wait a full poll
+_wakeup = asyncio.Event()
+
+
+def configured_sinks() -> Dict[str, str]:
+    """Parse WEBHOOK_SINKS into {name: url}."""
+    sinks = {}
+    for entry in settings.WEBHOOK_SINKS.split(","):
+        name, sep, url = entry.strip().partition("=")
+        if sep and name and url:
+            sinks[name.strip()] = url.strip()
+    return sinks
+
+
+async def enqueue_event(db: AsyncSession, event_type: str, payload: dict) -> None:
+    """
+    Add an event for every configured sink. Does not commit.
+
+    Args:
+        db: Session holding the order change
+        event_type: One of the ``ORDER_*`` constants
+        payload: JSON-serializable event body
+    """
+    await enqueue_events(db, [(event_type, payload)])
+
+
+async def enqueue_events(db: AsyncSession, events: List[tuple]) -> None:
+    """Add several ``(event_type, payload)`` events with one INSERT. Does not commit."""
+    sinks = configured_sinks()
+    if not sinks or not events:
+        return
+    now = datetime.utcnow()
+    rows = []
+    for event_type, payload in events:
+        event_id = str(uuid.uuid4())
+        body = json.dumps(jsonable_encoder({"id": event_id, "type": event_type, "data": payload}))
+        rows.extend(
+            {
+                "event_id": event_id,
+                "event_type": event_type,
+                "sink": sink,
+                "payload": body,
+                "status": "pending",
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now,
+            }
+            for sink in sinks
+        )
+    await db.execute(insert(OutboxEvent), rows)
+
+
+def notify_dispatcher() -> None:
+    """Wake the in-process dispatcher after committing new events."""
+    _wakeup.set()
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff after ``attempts`` failed deliveries."""
+    seconds = settings.OUTBOX_RETRY_BASE_SECONDS * (2 ** max(0, attempts - 1))
+    return timedelta(seconds=min(seconds, settings.OUTBOX_RETRY_MAX_SECONDS))
+
+
+def _signature(body: str) -> Optional[str]:
+    if not settings.WEBHOOK_SECRET:
+        return None
+    digest = hmac.new(settings.WEBHOOK_SECRET.encode("utf-8"), body.encode("utf-8"), hashlib.sha256)
+    return f"sha256={digest.hexdigest()}"
+
+
+async def _claim(db: AsyncSession, batch_size: int) -> list:
+    """Lease a batch of due events and commit the lease."""
+    now = datetime.utcnow()
+    result = await db.execute(
+        select(OutboxEvent.id)
+        .where(
+            OutboxEvent.status == "pending",
+            OutboxEvent.next_attempt_at <= now,
+            or_(OutboxEvent.locked_until.is_(None), OutboxEvent.locked_until < now),
+        )
+        .order_by(OutboxEvent.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    ids = result.scalars().all()
+    if not ids:
+        await db.commit()
+        return []
+    result = await db.execute(
+        update(OutboxEvent)
+        .where(OutboxEvent.id.in_(ids))
+        .values(locked_until=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS))
+        .returning(OutboxEvent.id, OutboxEvent.event_id, OutboxEvent.event_type, OutboxEvent.sink,
+                   OutboxEvent.payload, OutboxEvent.attempts)
+        .execution_options(synchronize_session=False)
+    )
+    rows = sorted(result.all(), key=lambda row: row.id)
+    await db.commit()
+    return rows
+
+
+async def _deliver(http: httpx.AsyncClient, sinks: Dict[str, str], row) -> Optional[str]:
+    """POST one event. Returns None on success or an error description."""
+    url = sinks.get(row.sink)
+    if url is None:
+        return f"Sink {row.sink!r} is not configured"
+    headers = {
+        "Content-Type": "application/json",
+        "X-Event-Id": row.event_id,
+        "X-Event-Type": row.event_type,
+    }
+    signature = _signature(row.payload)
+    if signature:
+        headers["X-Signature"] = signature
+    try:
+        response = await http.post(url, content=row.payload, headers=headers)
+    except httpx.HTTPError as e:
+        return f"{type(e).__name__}: {e}"
+    if response.status_code >= 300:
+        return f"HTTP {response.status_code}"
+    return None
+
+
+async def dispatch_batch(db: AsyncSession, http: httpx.AsyncClient, batch_size: Optional[int] = None) -> int:
+    """
+    Claim, deliver and record one batch of events.
+
+    Returns:
+        Number of events attempted (0 when nothing was due)
+    """
+    rows = await _claim(db, batch_size or settings.OUTBOX_BATCH_SIZE)
+    if not rows:
+        return 0
+
+    sinks = configured_sinks()
+    errors = await asyncio.gather(*(_deliver(http, sinks, row) for row in rows))
+
+    now = datetime.utcnow()
+    delivered = [row.id for row, error in zip(rows, errors) if error is None]
+    if delivered:
+        await db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(delivered))
+            .values(status="delivered", delivered_at=now, attempts=OutboxEvent.attempts + 1,
+                    locked_until=None, last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+    for row, error in zip(rows, errors):
+        if error is None:
+            continue
+        attempts = row.attempts + 1
+        exhausted = attempts >= settings.OUTBOX_MAX_ATTEMPTS
+        await db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id == row.id)
+            .values(
+                status="failed" if exhausted else "pending",
+                attempts=attempts,
+                next_attempt_at=now + retry_delay(attempts),
+                locked_until=None,
+                last_error=error,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        log = logger.error if exhausted else logger.warning
+        log(f"Outbox event {row.event_id} to {row.sink} failed (attempt {attempts}): {error}")
+    await db.commit()
+    return len(rows)
+
+
+async def purge_delivered(db: AsyncSession) -> None:
+    """Delete delivered events older than OUTBOX_RETENTION_DAYS."""
+    cutoff = datetime.utcnow() - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    await db.execute(
+        delete(OutboxEvent)
+        .where(OutboxEvent.status == "delivered", OutboxEvent.delivered_at < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+
+async def run_dispatcher(session_factory, stop: asyncio.Event) -> None:
+    """Deliver events until ``stop`` is set. Started from app startup when enabled."""
+    logger.info(f"Outbox dispatcher started for sinks: {', '.join(configured_sinks()) or 'none'}")
+    next_purge = datetime.utcnow()
+    async with httpx.AsyncClient(timeout=settings.WEBHOOK_TIMEOUT_SECONDS) as http:
+        while not stop.is_set():
+            try:
+                async with session_factory() as db:
+                    attempted = await dispatch_batch(db, http)
+                    if not attempted and datetime.utcnow() >= next_purge:
+                        await purge_delivered(db)
+                        next_purge = datetime.utcnow() + PURGE_INTERVAL
+            except Exception as e:
+                logger.error(f"Outbox dispatcher error: {e}")
+                attempted = 0
+            if attempted:
+                continue  # more may be due; keep draining
+            _wakeup.clear()
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=settings.OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
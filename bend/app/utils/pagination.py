@@ -1,6 +1,10 @@
-from typing import TypeVar, Generic, List, Optional
-from pydantic import BaseModel, Field
-from fastapi import Query
+import base64
+import json
+from datetime import datetime, date
+from typing import Any, TypeVar, Generic, List, Optional, Union
+from pydantic import BaseModel, Discriminator, Field, Tag
+from typing_extensions import Annotated
+from fastapi import HTTPException, Query
 
 T = TypeVar("T")
 
@@ -42,3 +46,92 @@ class PaginatedResponse(BaseModel, Generic[T]):
             page_size=page_size,
             total_pages=total_pages
         )
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode keyset values (e.g. ``created_at, id``) as an opaque cursor.
+
+    Datetimes are stored as ISO strings; decode with ``decode_cursor``.
+    """
+    payload = [v.isoformat() if isinstance(v, (datetime, date)) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed or has the wrong arity
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+class CursorPage(BaseModel, Generic[T]):
+    """Keyset-paginated response: no total, just a cursor to the next page."""
+    items: List[T]
+    page_size: int
+    next_cursor: Optional[str] = None
+
+
+class OffsetPage(BaseModel, Generic[T]):
+    """Offset-paginated response body, as built by ``offset_page``."""
+    items: List[T]
+    total: Optional[int] = None
+    page: int
+    page_size: int
+    total_pages: Optional[int] = None
+    total_is_estimate: bool = False
+
+
+def _page_kind(page: Any) -> str:
+    has_cursor = "next_cursor" in page if isinstance(page, dict) else hasattr(page, "next_cursor")
+    return "cursor" if has_cursor else "offset"
+
+
+def offset_or_cursor_page(item: type) -> Any:
+    """
+    Response model for endpoints serving either pagination mode.
+
+    Tagged on ``next_cursor`` so each body is validated against one page
+    model only, instead of trying both as a plain ``Union`` would.
+    """
+    return Annotated[
+        Union[
+            Annotated[OffsetPage[item], Tag("offset")],
+            Annotated[CursorPage[item], Tag("cursor")],
+        ],
+        Discriminator(_page_kind),
+    ]
+
+
+def offset_page(
+    items: list,
+    total: Optional[int],
+    page: int,
+    page_size: int,
+    total_is_estimate: bool = False,
+) -> dict:
+    """
+    Build an offset-paginated response body.
+
+    ``total`` is None when the client asked to skip counting
+    (``include_total=false``); ``total_pages`` is then None as well.
+    """
+    return {
+        "items": items,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": (total + page_size - 1) // page_size if total is not None and page_size > 0 else None,
+        "total_is_estimate": total_is_estimate,
+    }
@@ -0,0 +1,266 @@
+"""
+Bulk product import from CSV or NDJSON uploads (POST /products/import).
+
+The upload is parsed in a worker thread one batch at a time, so memory is
+bounded by PRODUCT_IMPORT_BATCH_SIZE rows whatever the file size. Every
+row is validated with ``ProductImportRow`` (``ProductCreate`` plus an
+optional ``id``) and must belong to the importing farmer. Per batch:
+
+- one query resolves the products rows refer to, by ``id`` or else by
+  (farmer_id, name), so importing the same file twice updates rather than
+  duplicates;
+- one executemany INSERT adds the new products (sent as multi-row
+  INSERTs by SQLAlchemy's "insertmanyvalues" where the driver supports
+  it, compiled once rather than per batch);
+- one executemany UPDATE (by primary key) rewrites the existing ones;
+- one executemany INSERT appends the batch's stock changes to the ledger
+  (app/utils/ledger.py). Existing products are locked when resolved, so
+  the old levels the changes are computed from stay current.
+
+Rejected rows are reported with their line number and do not stop the
+rest of the file. The caller commits the whole import as one transaction.
+"""
+import csv
+import io
+import logging
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import orjson
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.product import Product, Farmer
+from app.schemas.enums import StockMovementReason
+from app.schemas.product import ProductImportRow
+from app.utils.ledger import record_movements
+
+logger = logging.getLogger(__name__)
+
+# Columns an import writes; image_url is left alone
+IMPORT_FIELDS = {"name", "price", "unit", "is_organic", "stock_qty", "farmer_id"}
+
+# (line number, parsed record, parse error)
+Record = Tuple[int, Optional[dict], Optional[str]]
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """Import format from the upload's file name or content type, if recognisable."""
+    name = (filename or "").lower()
+    if name.endswith(".csv") or content_type == "text/csv":
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+def _csv_records(fileobj) -> Iterator[Record]:
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.DictReader(text)
+        for record in reader:
+            # Empty cells fall back to the schema defaults; extra cells are ignored
+            values = {key: value for key, value in record.items() if key is not None and value not in ("", None)}
+            yield reader.line_num, values, None
+    finally:
+        # Leave the upload open for Starlette to close
+        text.detach()
+
+
+def _ndjson_records(fileobj) -> Iterator[Record]:
+    for line_number, raw in enumerate(fileobj, start=1):
+        if not raw.strip():
+            continue
+        try:
+            record = orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            yield line_number, None, "Invalid JSON"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, record, None
+
+
+def _batches(records: Iterator[Record], batch_size: int) -> Iterator[List[Record]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _error_messages(exc: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in exc.errors()]
+
+
+def _reject(report: dict, line: int, errors: List[str]) -> None:
+    report["failed"] += 1
+    if len(report["errors"]) < settings.PRODUCT_IMPORT_MAX_ERRORS:
+        report["errors"].append({"line": line, "errors": errors})
+    else:
+        report["errors_truncated"] = True
+
+
+async def _import_batch(
+    db: AsyncSession,
+    batch: List[Record],
+    farmer_id: Optional[int],
+    known_farmers: Set[int],
+    report: dict,
+    user_id: Optional[int] = None,
+) -> None:
+    valid: List[Tuple[int, ProductImportRow]] = []
+    for line, record, error in batch:
+        if error:
+            _reject(report, line, [error])
+            continue
+        if farmer_id is not None:
+            record.setdefault("farmer_id", farmer_id)
+        try:
+            row = ProductImportRow.model_validate(record)
+        except ValidationError as e:
+            _reject(report, line, _error_messages(e))
+            continue
+        if farmer_id is not None and row.farmer_id != farmer_id:
+            _reject(report, line, ["farmer_id: Farmers can only import their own products"])
+            continue
+        valid.append((line, row))
+
+    # Farmers referenced for the first time in this import
+    unseen = {row.farmer_id for _, row in valid} - known_farmers
+    if unseen:
+        result = await db.execute(select(Farmer.id).where(Farmer.id.in_(unseen)))
+        known_farmers.update(result.scalars())
+
+    # Stock of the existing products this batch may update, for the ledger
+    previous_stock: Dict[int, float] = {}
+
+    by_id: Dict[int, int] = {}
+    ids = {row.id for _, row in valid if row.id}
+    if ids:
+        result = await db.execute(
+            select(Product.id, Product.farmer_id, Product.stock_qty)
+            .where(Product.id.in_(ids))
+            .order_by(Product.id)
+            .with_for_update()
+        )
+        for product in result:
+            by_id[product.id] = product.farmer_id
+            previous_stock[product.id] = product.stock_qty
+
+    by_name: Dict[Tuple[int, str], int] = {}
+    named = [row for _, row in valid if not row.id]
+    if named:
+        result = await db.execute(
+            select(Product.id, Product.farmer_id, Product.name, Product.stock_qty)
+            .where(
+                Product.farmer_id.in_({row.farmer_id for row in named}),
+                Product.name.in_({row.name for row in named}),
+            )
+            .order_by(Product.id)
+            .with_for_update()
+        )
+        for product in result:
+            previous_stock[product.id] = product.stock_qty
+            # Duplicates already in the catalog: the oldest product is updated
+            by_name.setdefault((product.farmer_id, product.name), product.id)
+
+    # Keyed so a product repeated in the batch is written once, last row winning
+    inserts: Dict[Tuple[int, str], dict] = {}
+    updates: Dict[int, dict] = {}
+    for line, row in valid:
+        if row.farmer_id not in known_farmers:
+            _reject(report, line, ["farmer_id: Farmer not found"])
+            continue
+        values = row.model_dump(include=IMPORT_FIELDS)
+        if row.id:
+            owner = by_id.get(row.id)
+            if owner is None:
+                _reject(report, line, ["id: Product not found"])
+            elif farmer_id is not None and owner != farmer_id:
+                _reject(report, line, ["id: Not authorized to update this product"])
+            else:
+                updates[row.id] = {"id": row.id, **values}
+            continue
+        existing = by_name.get((row.farmer_id, row.name))
+        if existing is not None:
+            updates[existing] = {"id": existing, **values}
+        else:
+            inserts[(row.farmer_id, row.name)] = values
+
+    deltas: Dict[int, float] = {}
+    if inserts:
+        result = await db.execute(insert(Product).returning(Product.id, Product.stock_qty), list(inserts.values()))
+        deltas.update((product.id, product.stock_qty) for product in result)
+    if updates:
+        await db.execute(update(Product), list(updates.values()))
+        deltas.update(
+            (product_id, values["stock_qty"] - previous_stock[product_id]) for product_id, values in updates.items()
+        )
+    await record_movements(db, deltas, StockMovementReason.IMPORT, user_id=user_id)
+    report["inserted"] += len(inserts)
+    report["updated"] += len(updates)
+
+
+async def import_products(
+    db: AsyncSession,
+    fileobj,
+    fmt: str,
+    farmer_id: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> dict:
+    """
+    Validate and upsert every row of an uploaded product file.
+
+    Args:
+        db: Request session; the caller commits (or rolls back) afterwards
+        fileobj: Binary file object of the upload
+        fmt: "csv" (header row required) or "ndjson"
+        farmer_id: The importing farmer; rows default to and must match it.
+            None for admins, whose rows must name an existing farmer.
+        batch_size: Rows per batch (default PRODUCT_IMPORT_BATCH_SIZE)
+        user_id: Importing user, for the stock ledger
+
+    Returns:
+        Report with row, insert, update and failure counts and the
+        rejected rows (at most PRODUCT_IMPORT_MAX_ERRORS of them)
+
+    Raises:
+        HTTPException: 400 if the file cannot be decoded, 413 if it has
+            more than PRODUCT_IMPORT_MAX_ROWS rows
+    """
+    batch_size = batch_size or settings.PRODUCT_IMPORT_BATCH_SIZE
+    records = _csv_records(fileobj) if fmt == "csv" else _ndjson_records(fileobj)
+    batches = _batches(records, batch_size)
+    report = {"rows": 0, "inserted": 0, "updated": 0, "failed": 0, "errors": [], "errors_truncated": False}
+    known_farmers: Set[int] = set()
+
+    while True:
+        try:
+            # File reads and parsing stay off the event loop
+            batch = await run_in_threadpool(next, batches, None)
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise HTTPException(status_code=400, detail=f"Could not read {fmt} file: {e}")
+        if batch is None:
+            break
+        report["rows"] += len(batch)
+        if report["rows"] > settings.PRODUCT_IMPORT_MAX_ROWS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Imports are limited to {settings.PRODUCT_IMPORT_MAX_ROWS} rows",
+            )
+        await _import_batch(db, batch, farmer_id, known_farmers, report, user_id)
+
+    logger.info(
+        f"Product import: {report['rows']} rows, {report['inserted']} inserted, "
+        f"{report['updated']} updated, {report['failed']} failed"
+    )
+    return report
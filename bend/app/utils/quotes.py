@@ -0,0 +1,176 @@
+"""
+Server-side cart pricing.
+
+``build_quote`` prices a whole cart with one query (current price, line
+totals, availability net of holds) and keeps a snapshot of the prices it
+quoted for QUOTE_TTL_SECONDS. ``create_order`` then checks the client's
+per-line prices and ``total_price``:
+
+- against the quote snapshot, when the order carries a live ``quote_id``
+  (the quoted prices are honoured until the quote expires);
+- otherwise against the prices returned by the stock reservation UPDATE,
+  so verification never costs an extra query.
+
+Snapshots are per process; an order that reaches a replica without the
+snapshot (or after it expired) falls back to current prices.
+"""
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.product import Product
+from app.utils.stock import aggregate_quantities, available_stock
+
+logger = logging.getLogger(__name__)
+
+# Client totals are computed in floating point; allow for rounding
+PRICE_TOLERANCE = 0.01
+
+
+class PriceMismatchError(HTTPException):
+    """Raised when an order's prices do not match the server's; ``failures`` lists each difference."""
+
+    def __init__(self, detail: str, failures: List[dict]):
+        super().__init__(status_code=409, detail=detail)
+        self.failures = failures
+
+
+class QuoteCache:
+    """In-memory price snapshots keyed by quote id, oldest evicted first."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[Dict[int, float], float]] = {}
+
+    def get(self, quote_id: str) -> Optional[Dict[int, float]]:
+        entry = self._entries.get(quote_id)
+        if entry is None:
+            return None
+        prices, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[quote_id]
+            return None
+        return prices
+
+    def set(self, quote_id: str, prices: Dict[int, float]) -> None:
+        while len(self._entries) >= self.max_entries:
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[quote_id] = (prices, time.monotonic() + self.ttl_seconds)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+quote_cache = QuoteCache(
+    ttl_seconds=settings.QUOTE_TTL_SECONDS,
+    max_entries=settings.QUOTE_CACHE_MAX_ENTRIES,
+)
+
+
+async def build_quote(db: AsyncSession, items: Iterable, hold_id: Optional[str] = None) -> dict:
+    """
+    Price a cart with a single query and snapshot the quoted prices.
+
+    Args:
+        db: Request session
+        items: Cart lines with ``product_id`` and ``quantity``
+        hold_id: The cart's hold, whose stock counts as available
+
+    Returns:
+        Quote with per-line prices, totals and availability; unknown
+        products are listed in ``missing`` and left out of the total
+    """
+    quantities = aggregate_quantities(items)
+    now = datetime.utcnow()
+    result = await db.execute(
+        select(
+            Product.id,
+            Product.name,
+            Product.unit,
+            Product.price,
+            available_stock(now, hold_id).label("available"),
+        )
+        .where(Product.id.in_(quantities.keys()))
+    )
+    products = {row.id: row for row in result}
+
+    lines = []
+    for product_id, quantity in quantities.items():
+        product = products.get(product_id)
+        if product is None:
+            continue
+        available = max(product.available, 0)
+        lines.append({
+            "product_id": product_id,
+            "name": product.name,
+            "unit": product.unit,
+            "quantity": quantity,
+            "unit_price": product.price,
+            "line_total": round(product.price * quantity, 2),
+            "available": available,
+            "in_stock": available >= quantity,
+        })
+
+    quote_id = str(uuid.uuid4())
+    quote_cache.set(quote_id, {line["product_id"]: line["unit_price"] for line in lines})
+    return {
+        "quote_id": quote_id,
+        "expires_at": now + timedelta(seconds=settings.QUOTE_TTL_SECONDS),
+        "items": lines,
+        "total": round(sum(line["line_total"] for line in lines), 2),
+        "all_in_stock": len(lines) == len(quantities) and all(line["in_stock"] for line in lines),
+        "missing": [pid for pid in quantities if pid not in products],
+    }
+
+
+def verify_prices(order_data, current_prices: Dict[int, float]) -> None:
+    """
+    Check an order's line prices and total before it is stored.
+
+    Args:
+        order_data: ``OrderCreate`` payload
+        current_prices: product_id -> price from the reservation UPDATE,
+            used when the order has no live quote snapshot
+
+    Raises:
+        PriceMismatchError: 409 listing every line (and the total) that differs
+    """
+    prices = quote_cache.get(order_data.quote_id) if order_data.quote_id else None
+    if prices is None or any(item.product_id not in prices for item in order_data.items):
+        prices = current_prices
+
+    failures = []
+    for item in order_data.items:
+        expected = prices[item.product_id]
+        if abs(item.price - expected) > PRICE_TOLERANCE:
+            failures.append({
+                "product_id": item.product_id,
+                "reason": "price_changed",
+                "sent": item.price,
+                "expected": expected,
+                "message": f"Price of product {item.product_id} is now {expected}",
+            })
+
+    expected_total = round(sum(prices[item.product_id] * item.quantity for item in order_data.items), 2)
+    if abs(order_data.total_price - expected_total) > PRICE_TOLERANCE:
+        failures.append({
+            "product_id": None,
+            "reason": "total_mismatch",
+            "sent": order_data.total_price,
+            "expected": expected_total,
+            "message": f"Order total should be {expected_total}",
+        })
+
+    if failures:
+        raise PriceMismatchError(
+            detail="Prices have changed, please review your cart",
+            failures=failures,
+        )
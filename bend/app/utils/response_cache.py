@@ -0,0 +1,83 @@
+"""
+In-process cache of rendered JSON responses.
+
+Used for GET /products/public: each page is rendered once and the bytes are
+served until the catalog changes. Writes that change what the catalog shows
+(product upserts, stock updates, order creation and cancellation) call
+``app.utils.catalog.invalidate_catalog()``, which drops every page. The cache is per
+process; other replicas pick up a change once their entries expire
+(CATALOG_CACHE_TTL_SECONDS).
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Size-bounded LRU of response bodies with a TTL and hit/miss counters."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[bytes, float]]" = OrderedDict()
+        # Bumped on every invalidation so a page rendered meanwhile is not stored
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] < time.monotonic():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: Hashable, body: bytes, generation: int) -> None:
+        if generation != self.generation:
+            return  # the catalog changed while this page was being rendered
+        self._entries[key] = (body, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            # Evict the least recently used entry
+            self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Drop every cached response after a write."""
+        self.generation += 1
+        self.invalidations += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations,
+        }
+
+    def clear(self) -> None:
+        """Drop entries and reset the counters."""
+        self._entries.clear()
+        self.generation += 1
+        self.hits = self.misses = self.invalidations = 0
+
+
+catalog_cache = ResponseCache(
+    ttl_seconds=settings.CATALOG_CACHE_TTL_SECONDS,
+    max_entries=settings.CATALOG_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,221 @@
+"""
+Incremental maintenance of the sales rollup tables.
+
+Every function here runs inside the caller's transaction, so a rollup
+change commits or rolls back together with the order change it describes.
+Updates are additive upserts (``INSERT ... ON CONFLICT DO UPDATE SET
+x = x + excluded.x``); nothing is recomputed from order history except by
+``rebuild_rollups``.
+
+An order's deltas always go to its own shard (``shard_of``), so checkouts
+running at the same time touch different rows rather than all waiting on
+today's row and the ``pending`` count. Rows are upserted in key order so
+two transactions never lock the same rows in opposite orders.
+"""
+from collections import Counter, defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from sqlalchemy import select, delete, func, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import upsert_insert
+from app.models.analytics import DailySales, OrderStatusCount, ProductSales, FarmerSales
+from app.models.order import Order, OrderItem
+from app.models.archive import ArchivedOrder, ArchivedOrderItem
+from app.models.product import Product
+from app.schemas.enums import OrderStatus
+
+CANCELLED = OrderStatus.CANCELLED.value
+
+
+class SaleLine(NamedTuple):
+    """One order line as the rollups see it."""
+    product_id: int
+    farmer_id: int
+    quantity: int
+    price: float
+
+
+def shard_of(order_id: int) -> int:
+    """Rollup shard an order's figures are kept in."""
+    return order_id % settings.ROLLUP_SHARDS
+
+
+async def _increment(db: AsyncSession, model, key: str, rows: Dict[Tuple[object, int], Dict[str, float]]) -> None:
+    """Add ``rows`` ({(key value, shard): {column: delta}}) to ``model`` with one upsert."""
+    rows = {k: v for k, v in rows.items() if any(v.values())}
+    if not rows:
+        return
+    columns = list(next(iter(rows.values())).keys())
+    stmt = upsert_insert(db, model).values([
+        {key: value, "shard": shard, **deltas} for (value, shard), deltas in sorted(rows.items())
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[key, "shard"],
+        set_={column: getattr(model, column) + stmt.excluded[column] for column in columns},
+    )
+    await db.execute(stmt)
+
+
+async def _apply_sales(
+    db: AsyncSession,
+    orders: Dict[Tuple[date, int], int],
+    lines: Dict[Tuple[date, int], List[SaleLine]],
+    sign: int,
+) -> None:
+    """Add (sign=1) or remove (sign=-1) orders and their lines, keyed by (sale day, shard)."""
+    daily: Dict[tuple, Dict[str, float]] = defaultdict(lambda: {"order_count": 0, "revenue": 0.0})
+    products: Dict[tuple, Dict[str, float]] = defaultdict(lambda: {"quantity": 0, "revenue": 0.0})
+    farmers: Dict[tuple, Dict[str, float]] = defaultdict(lambda: {"quantity": 0, "revenue": 0.0})
+
+    for day_shard, count in orders.items():
+        daily[day_shard]["order_count"] += sign * count
+    for (sale_day, shard), sale_lines in lines.items():
+        for line in sale_lines:
+            revenue = sign * line.quantity * line.price
+            daily[(sale_day, shard)]["revenue"] += revenue
+            products[(line.product_id, shard)]["quantity"] += sign * line.quantity
+            products[(line.product_id, shard)]["revenue"] += revenue
+            farmers[(line.farmer_id, shard)]["quantity"] += sign * line.quantity
+            farmers[(line.farmer_id, shard)]["revenue"] += revenue
+
+    await _increment(db, DailySales, "day", daily)
+    await _increment(db, ProductSales, "product_id", products)
+    await _increment(db, FarmerSales, "farmer_id", farmers)
+
+
+async def record_order_placed(db: AsyncSession, order_id: int, created_at, lines: Iterable[SaleLine]) -> None:
+    """Count a new (pending) order and its lines."""
+    key = (created_at.date(), shard_of(order_id))
+    await _apply_sales(db, {key: 1}, {key: list(lines)}, sign=1)
+    await _increment(db, OrderStatusCount, "status", {
+        (OrderStatus.PENDING.value, key[1]): {"order_count": 1},
+    })
+
+
+async def _order_lines(db: AsyncSession, order_ids: List[int]):
+    """Lines of the given orders keyed by (sale day, shard), in one query."""
+    result = await db.execute(
+        select(
+            Order.id,
+            Order.created_at,
+            OrderItem.product_id,
+            Product.farmer_id,
+            OrderItem.quantity,
+            OrderItem.price_at_time,
+        )
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .join(Product, Product.id == OrderItem.product_id)
+        .where(Order.id.in_(order_ids))
+    )
+    keys: Dict[int, tuple] = {}
+    lines: Dict[tuple, List[SaleLine]] = defaultdict(list)
+    for order_id, created_at, product_id, farmer_id, quantity, price in result:
+        key = keys[order_id] = (created_at.date(), shard_of(order_id))
+        lines[key].append(SaleLine(product_id, farmer_id, quantity, price))
+    return Counter(keys.values()), lines
+
+
+async def record_status_changes(db: AsyncSession, previous: Dict[int, str], new_status: str) -> None:
+    """
+    Move orders between status counts.
+
+    Orders entering ``cancelled`` are removed from the sales rollups; orders
+    leaving it are added back.
+
+    Args:
+        db: Session holding the status change
+        previous: order_id -> status before the change
+        new_status: Status the orders moved to
+    """
+    moved = {order_id: old for order_id, old in previous.items() if old != new_status}
+    if not moved:
+        return
+
+    deltas: Dict[tuple, Dict[str, int]] = defaultdict(lambda: {"order_count": 0})
+    for order_id, old in moved.items():
+        deltas[(old, shard_of(order_id))]["order_count"] -= 1
+        deltas[(new_status, shard_of(order_id))]["order_count"] += 1
+    await _increment(db, OrderStatusCount, "status", deltas)
+
+    if new_status == CANCELLED:
+        orders, lines = await _order_lines(db, list(moved))
+        await _apply_sales(db, orders, lines, sign=-1)
+    else:
+        reinstated = [order_id for order_id, old in moved.items() if old == CANCELLED]
+        if reinstated:
+            orders, lines = await _order_lines(db, reinstated)
+            await _apply_sales(db, orders, lines, sign=1)
+
+
+def _as_date(value) -> date:
+    """func.date() yields a date on Postgres and an ISO string on SQLite."""
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+async def rebuild_rollups(db: AsyncSession) -> None:
+    """
+    Recompute every rollup from order history (live and archived) with grouped queries.
+
+    Only needed once to backfill existing data (or after manual fixes);
+    normal operation keeps the rollups current incrementally. Rebuilt
+    figures all land in shard 0.
+    """
+    for model in (DailySales, OrderStatusCount, ProductSales, FarmerSales):
+        await db.execute(delete(model))
+
+    # Archived orders are part of history too; an order lives in exactly one table
+    orders = union_all(
+        select(Order.id, Order.status, Order.created_at),
+        select(ArchivedOrder.id, ArchivedOrder.status, ArchivedOrder.created_at),
+    ).subquery()
+    items = union_all(
+        select(OrderItem.order_id, OrderItem.product_id, OrderItem.quantity, OrderItem.price_at_time),
+        select(
+            ArchivedOrderItem.order_id,
+            ArchivedOrderItem.product_id,
+            ArchivedOrderItem.quantity,
+            ArchivedOrderItem.price_at_time,
+        ),
+    ).subquery()
+
+    status_counts = await db.execute(select(orders.c.status, func.count()).group_by(orders.c.status))
+    await _increment(db, OrderStatusCount, "status", {
+        (status, 0): {"order_count": count} for status, count in status_counts
+    })
+
+    live = orders.c.status != CANCELLED
+    sale_day = func.date(orders.c.created_at)
+    line_revenue = func.sum(items.c.quantity * items.c.price_at_time)
+
+    daily: Dict[tuple, Dict[str, float]] = defaultdict(lambda: {"order_count": 0, "revenue": 0.0})
+    for day, count in await db.execute(select(sale_day, func.count()).where(live).group_by(sale_day)):
+        daily[(_as_date(day), 0)]["order_count"] = count
+    for day, revenue in await db.execute(
+        select(sale_day, line_revenue).join(items, items.c.order_id == orders.c.id).where(live).group_by(sale_day)
+    ):
+        daily[(_as_date(day), 0)]["revenue"] = revenue or 0.0
+    await _increment(db, DailySales, "day", daily)
+
+    per_product = await db.execute(
+        select(items.c.product_id, func.sum(items.c.quantity), line_revenue)
+        .join(orders, orders.c.id == items.c.order_id)
+        .where(live)
+        .group_by(items.c.product_id)
+    )
+    await _increment(db, ProductSales, "product_id", {
+        (product_id, 0): {"quantity": quantity, "revenue": revenue} for product_id, quantity, revenue in per_product
+    })
+
+    per_farmer = await db.execute(
+        select(Product.farmer_id, func.sum(items.c.quantity), line_revenue)
+        .join(items, items.c.product_id == Product.id)
+        .join(orders, orders.c.id == items.c.order_id)
+        .where(live)
+        .group_by(Product.farmer_id)
+    )
+    await _increment(db, FarmerSales, "farmer_id", {
+        (farmer_id, 0): {"quantity": quantity, "revenue": revenue} for farmer_id, quantity, revenue in per_farmer
+    })
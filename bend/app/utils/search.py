@@ -0,0 +1,160 @@
+"""
+Product search over product names and farmer name, location and bio.
+
+On both backends every term must match the product name or its farmer's
+text, each term independently: "beans lakshmi" finds Lakshmi's beans.
+
+On Postgres matching is index-backed:
+
+- full text: for each term, a prefix ``tsquery`` (``tomat:*``) against the
+  GIN expression indexes on the product and farmer documents; the per-term
+  candidate sets are intersected;
+- typo tolerance: ``pg_trgm`` word similarity (``name %> :q``) against a
+  trigram GIN index on ``products.name``, when the extension is installed.
+
+Each branch picks candidate ids from its own index and the result is
+ranked by ``ts_rank`` (product name weighted above farmer text) plus
+trigram similarity, so latency depends on the number of matches rather
+than the catalog size.
+
+SQLite (tests, local development) falls back to LIKE (case-insensitive
+for ASCII) with the same response shape and matching rule; names starting
+with a term rank first. The fallback has no typo tolerance.
+"""
+import logging
+import re
+from typing import List, Optional
+
+from sqlalchemy import select, func, union, intersect, case, or_, and_, literal_column, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
+
+from app.core.database import dialect_name
+from app.models.product import Product, Farmer, PRODUCT_SEARCH_DOCUMENT, FARMER_SEARCH_DOCUMENT
+from app.schemas.product import ProductWithFarmerResponse
+from app.utils.pagination import offset_page
+
+logger = logging.getLogger(__name__)
+
+MAX_TERMS = 8
+MAX_TERM_LENGTH = 50
+
+# Product name matches count double relative to farmer text
+PRODUCT_WEIGHT = 2.0
+
+# Whether pg_trgm is installed; checked once per process
+_trigram_available: Optional[bool] = None
+
+
+def search_terms(q: str) -> List[str]:
+    """Lower-cased words (letters and digits only) from a search string."""
+    terms = re.findall(r"[^\W_]+", q.lower())
+    return [term[:MAX_TERM_LENGTH] for term in terms[:MAX_TERMS]]
+
+
+async def _has_trigram(db: AsyncSession) -> bool:
+    global _trigram_available
+    if _trigram_available is None:
+        result = await db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+        _trigram_available = result.scalar() is not None
+        if not _trigram_available:
+            logger.warning("pg_trgm is not installed - product search has no typo tolerance")
+    return _trigram_available
+
+
+async def _postgres_matches(db: AsyncSession, terms: List[str]):
+    """Candidate product ids and the rank expression for Postgres."""
+    product_doc = literal_column(PRODUCT_SEARCH_DOCUMENT.format(t="products."))
+    farmer_doc = literal_column(FARMER_SEARCH_DOCUMENT.format(t="farmers."))
+    phrase = " ".join(terms)
+
+    # A term matches through the product or its farmer; every term must match
+    per_term = []
+    for term in terms:
+        tsquery = func.to_tsquery(literal_column("'simple'"), f"{term}:*")
+        per_term.append(union(
+            select(Product.id).where(product_doc.op("@@")(tsquery)),
+            select(Product.id)
+            .join(Farmer, Farmer.id == Product.farmer_id)
+            .where(farmer_doc.op("@@")(tsquery)),
+        ))
+    branches = [intersect(*per_term) if len(per_term) > 1 else per_term[0]]
+
+    # Rank by whichever terms each document holds
+    any_term = func.to_tsquery(literal_column("'simple'"), " | ".join(f"{term}:*" for term in terms))
+    rank = func.ts_rank(product_doc, any_term) * PRODUCT_WEIGHT + func.ts_rank(farmer_doc, any_term)
+    if await _has_trigram(db):
+        branches.append(select(Product.id).where(Product.name.op("%>")(phrase)))
+        rank = rank + func.word_similarity(phrase, Product.name)
+    return union(*branches).subquery(), rank
+
+
+def _fallback_matches(terms: List[str]):
+    """Candidate product ids and the rank expression for SQLite."""
+    # SQLite's LIKE is case-insensitive for ASCII, so no lower() per row
+    farmer_text = Farmer.name + " " + Farmer.location + " " + func.coalesce(Farmer.bio, "")
+    conditions = []
+    rank = literal_column("0.0")
+    for term in terms:
+        # Farmers are few: resolve their matches once rather than per product
+        by_farmer = Product.farmer_id.in_(select(Farmer.id).where(farmer_text.contains(term)))
+        conditions.append(or_(Product.name.contains(term), by_farmer))
+        rank = rank + case(
+            (Product.name.startswith(term), 3.0),
+            (Product.name.contains(f" {term}"), 2.0),
+            (Product.name.contains(term), 1.0),
+            else_=0.0,
+        ) + case((by_farmer, 0.5), else_=0.0)
+
+    matched = select(Product.id).where(and_(*conditions)).subquery()
+    return matched, rank
+
+
+async def search_products(
+    db: AsyncSession,
+    q: str,
+    page: int,
+    page_size: int,
+    include_total: bool = True,
+) -> dict:
+    """
+    Ranked, paginated product search.
+
+    Args:
+        db: Request session
+        q: Free text; prefixes match ("tom" finds "Tomatoes")
+        page: 1-based page number
+        page_size: Results per page
+        include_total: When False, skip counting matches
+
+    Returns:
+        Offset page whose items are products (with farmer) plus ``rank``
+    """
+    terms = search_terms(q)
+    if not terms:
+        return offset_page([], 0 if include_total else None, page, page_size)
+
+    if dialect_name(db) == "postgresql":
+        matched, rank = await _postgres_matches(db, terms)
+    else:
+        matched, rank = _fallback_matches(terms)
+
+    # Counted directly: free-text keys would only churn the shared count cache
+    total = None
+    if include_total:
+        total = (await db.execute(select(func.count()).select_from(matched))).scalar_one()
+
+    result = await db.execute(
+        select(Product, rank.label("rank"))
+        .join(Product.farmer)
+        .options(contains_eager(Product.farmer))
+        .where(Product.id.in_(select(matched.c.id)))
+        .order_by(literal_column("rank").desc(), Product.id.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )
+    items = [
+        {**ProductWithFarmerResponse.model_validate(product).model_dump(), "rank": round(float(score), 4)}
+        for product, score in result.all()
+    ]
+    return offset_page(items, total, page, page_size)
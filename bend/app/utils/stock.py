@@ -0,0 +1,273 @@
+"""
+Set-based stock reservation helpers for order checkout.
+
+Available stock is ``stock_qty`` minus the quantity of live cart holds
+(see app/utils/holds.py); checkouts and new holds are both checked against
+it, excluding the caller's own hold.
+
+Stock changes are appended to the ledger (app/utils/ledger.py) in the same
+transaction: by ``restore_stock`` and ``set_inventory`` themselves, and by
+the caller of ``reserve_stock``, which creates the order afterwards.
+"""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select, update, case, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.hold import StockHold
+from app.models.product import Product
+from app.schemas.enums import StockMovementReason
+from app.schemas.order import OrderItemCreate
+from app.utils.ledger import record_movements
+
+
+class StockReservationError(HTTPException):
+    """
+    Raised when one or more cart lines cannot be reserved.
+
+    ``detail`` describes the first failing line (so existing clients keep
+    working) and ``failures`` lists every line that failed.
+    """
+
+    def __init__(self, status_code: int, detail: str, failures: List[dict]):
+        super().__init__(status_code=status_code, detail=detail)
+        self.failures = failures
+
+
+def held_quantity(now: datetime, exclude_hold_id: Optional[str] = None):
+    """
+    Correlated subquery: quantity of a product held by live holds.
+
+    Must be used in a statement whose FROM (or UPDATE target) is ``products``.
+
+    Args:
+        now: Holds expiring at or before this time no longer count
+        exclude_hold_id: Leave out this cart's own holds
+    """
+    conditions = [StockHold.product_id == Product.id, StockHold.expires_at > now]
+    if exclude_hold_id is not None:
+        conditions.append(StockHold.hold_id != exclude_hold_id)
+    return (
+        select(func.coalesce(func.sum(StockHold.quantity), 0))
+        .where(*conditions)
+        .correlate(Product)
+        .scalar_subquery()
+    )
+
+
+def available_stock(now: datetime, exclude_hold_id: Optional[str] = None):
+    """SQL expression for a product's stock minus live holds (other than ``exclude_hold_id``)."""
+    return Product.stock_qty - held_quantity(now, exclude_hold_id)
+
+
+def aggregate_quantities(items: Iterable[OrderItemCreate]) -> "OrderedDict[int, int]":
+    """
+    Sum requested quantities per product, preserving cart order.
+
+    A cart may list the same product on more than one line; stock has to be
+    checked against the combined quantity.
+    """
+    quantities: "OrderedDict[int, int]" = OrderedDict()
+    for item in items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    return quantities
+
+
+async def reserve_stock(
+    db: AsyncSession,
+    items: Iterable[OrderItemCreate],
+    hold_id: Optional[str] = None,
+) -> Dict[int, dict]:
+    """
+    Atomically check and decrement stock for a whole cart.
+
+    A single conditional UPDATE decrements every product that still has
+    enough available stock; the check and the decrement happen inside the
+    database, so concurrent checkouts can never oversell. Stock held by
+    other carts is not available; the cart's own hold (``hold_id``) is.
+
+    The products are locked first, the same way ``place_holds`` locks them.
+    A hold never writes to ``products``, so without the lock a checkout
+    waiting behind a new hold would recheck only its own row and miss the
+    hold; after the lock the UPDATE reads the committed holds. If
+    any line could not be reserved, the failing products are read once to
+    build the error report and the caller must roll back the transaction.
+
+    Args:
+        db: Active session; the caller owns the transaction
+        items: Order lines from the request
+        hold_id: Cart hold being converted into this order, if any
+
+    Returns:
+        Mapping of product_id to the updated product row (stock after decrement)
+
+    Raises:
+        StockReservationError: 404 if a product does not exist, 400 if stock is short
+    """
+    quantities = aggregate_quantities(items)
+    requested = case(quantities, value=Product.id)
+
+    await db.execute(
+        select(Product.id)
+        .where(Product.id.in_(quantities.keys()))
+        .order_by(Product.id)
+        .with_for_update()
+    )
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(Product)
+        .where(Product.id.in_(quantities.keys()), available_stock(now, hold_id) >= requested)
+        .values(stock_qty=Product.stock_qty - requested)
+        .returning(
+            Product.id,
+            Product.name,
+            Product.unit,
+            Product.price,
+            Product.stock_qty,
+            Product.farmer_id,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    reserved = {row.id: row._asdict() for row in result}
+
+    if len(reserved) < len(quantities):
+        failed_ids = [pid for pid in quantities if pid not in reserved]
+        await raise_reservation_error(db, quantities, failed_ids, now, hold_id)
+
+    return reserved
+
+
+async def raise_reservation_error(
+    db: AsyncSession,
+    quantities: Dict[int, int],
+    failed_ids: List[int],
+    now: datetime,
+    hold_id: Optional[str] = None,
+) -> None:
+    """Build a per-item failure report for lines a conditional statement skipped."""
+    result = await db.execute(
+        select(
+            Product.id,
+            Product.name,
+            Product.unit,
+            available_stock(now, hold_id).label("available"),
+        )
+        .where(Product.id.in_(failed_ids))
+    )
+    current = {row.id: row for row in result}
+
+    failures = []
+    for product_id in failed_ids:
+        product = current.get(product_id)
+        if not product:
+            failures.append({
+                "product_id": product_id,
+                "reason": "not_found",
+                "requested": quantities[product_id],
+                "available": 0,
+                "message": f"Product {product_id} not found",
+            })
+        else:
+            failures.append({
+                "product_id": product_id,
+                "reason": "insufficient_stock",
+                "requested": quantities[product_id],
+                "available": max(product.available, 0),
+                "message": f"Only {max(product.available, 0)} {product.unit} of {product.name} left!",
+            })
+
+    # Unknown products take precedence, matching the original per-line checks
+    not_found = [f for f in failures if f["reason"] == "not_found"]
+    first = not_found[0] if not_found else failures[0]
+    raise StockReservationError(
+        status_code=404 if not_found else 400,
+        detail=first["message"],
+        failures=failures,
+    )
+
+
+async def restore_stock(db: AsyncSession, quantities: Dict[int, int], order_id: Optional[int] = None) -> None:
+    """
+    Add quantities back to stock with one set-based UPDATE.
+
+    The inverse of ``reserve_stock``: every product in ``quantities`` is
+    incremented in a single statement, so restoring an order costs one round
+    trip however many lines it has. Does not commit.
+
+    Args:
+        db: Active session; the caller owns the transaction
+        quantities: Mapping of product_id to the quantity to return
+        order_id: Cancelled order the stock comes back from, for the ledger
+    """
+    if not quantities:
+        return
+    await db.execute(
+        update(Product)
+        .where(Product.id.in_(quantities.keys()))
+        .values(stock_qty=Product.stock_qty + case(quantities, value=Product.id))
+        .execution_options(synchronize_session=False)
+    )
+    await record_movements(db, quantities, StockMovementReason.CANCELLATION, order_id=order_id)
+
+
+async def set_inventory(
+    db: AsyncSession,
+    stock: Dict[int, float],
+    prices: Dict[int, float],
+    farmer_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> List:
+    """
+    Overwrite stock levels (and optionally prices) with one set-based UPDATE.
+
+    The products are locked and their old levels read first, so the change
+    of each is appended to the stock ledger. Does not commit.
+
+    Args:
+        db: Active session; the caller owns the transaction
+        stock: Mapping of product_id to its new stock_qty
+        prices: Mapping of product_id to its new price, for the products
+            whose price changes (others keep theirs)
+        farmer_id: When given, only this farmer's products are updated;
+            ownership is checked by the statements themselves
+        user_id: User making the change, for the ledger
+
+    Returns:
+        Rows (id, stock_qty, price) of the products actually updated
+    """
+    if not stock:
+        return []
+    ownership = [Product.id.in_(stock.keys())]
+    if farmer_id is not None:
+        ownership.append(Product.farmer_id == farmer_id)
+    result = await db.execute(
+        select(Product.id, Product.stock_qty)
+        .where(*ownership)
+        .order_by(Product.id)
+        .with_for_update()
+    )
+    previous = {row.id: row.stock_qty for row in result}
+    if not previous:
+        return []
+
+    values = {"stock_qty": case(stock, value=Product.id)}
+    if prices:
+        values["price"] = case(prices, value=Product.id, else_=Product.price)
+    result = await db.execute(
+        update(Product)
+        .where(*ownership)
+        .values(**values)
+        .returning(Product.id, Product.stock_qty, Product.price)
+        .execution_options(synchronize_session=False)
+    )
+    rows = result.all()
+    await record_movements(
+        db,
+        {row.id: row.stock_qty - previous[row.id] for row in rows},
+        StockMovementReason.ADJUSTMENT,
+        user_id=user_id,
+    )
+    return rows
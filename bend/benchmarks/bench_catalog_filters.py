@@ -0,0 +1,123 @@
+"""
+Benchmark: filtered and sorted GET /api/v1/products/public pages on a
+100k-product catalog.
+
+For each filter/sort combination the page query's plan is printed along
+with request latency (the response cache is invalidated before every
+call, so each request hits the database). The scenarios are then re-run
+with the listing indexes dropped to show what they buy. Totals are
+skipped (``include_total=false``) so the timings isolate the page query.
+
+Runs against in-memory SQLite by default; set BENCH_DATABASE_URL to a
+scratch Postgres database to measure there instead.
+"""
+import asyncio
+import os
+import random
+
+from sqlalchemy import insert, text
+
+from benchmarks.common import benchmark_app, time_calls, summarize
+from app.middleware.rate_limit import limiter
+from app.models.product import Product, Farmer
+from app.schemas.enums import ProductSort
+from app.utils.catalog import CatalogFilters
+from app.utils.response_cache import catalog_cache
+
+PRODUCTS = 100_000
+FARMERS = 500
+ITERATIONS = 50
+BATCH = 5_000
+
+LISTING_INDEXES = ["ix_products_in_stock", "ix_products_in_stock_price", "ix_products_price_id", "ix_products_farmer_id_id"]
+
+SCENARIOS = {
+    "in stock": {"in_stock": True},
+    "in stock, price asc": {"in_stock": True, "sort": ProductSort.PRICE_ASC},
+    "in stock, 100-200": {"in_stock": True, "min_price": 100, "max_price": 200, "sort": ProductSort.PRICE_ASC},
+    "price desc": {"sort": ProductSort.PRICE_DESC},
+    "farmer 42": {"farmer_id": 42},
+    "farmer 42, organic": {"farmer_id": 42, "organic": False},
+}
+
+
+async def _seed(session_factory) -> None:
+    rng = random.Random(21)
+    async with session_factory() as session:
+        await session.execute(insert(Farmer), [
+            {"name": f"Farmer {i}", "location": "Mandya", "bio": None} for i in range(FARMERS)
+        ])
+        for start in range(0, PRODUCTS, BATCH):
+            await session.execute(insert(Product), [
+                {"name": f"Product {i}", "price": round(rng.uniform(5, 500), 2),
+                 # Most of the catalog is sold out, the case the partial indexes are for
+                 "stock_qty": rng.randint(1, 50) if rng.random() < 0.2 else 0,
+                 "is_organic": rng.random() < 0.8, "unit": "kg", "farmer_id": rng.randint(1, FARMERS)}
+                for i in range(start, start + BATCH)
+            ])
+        await session.commit()
+        await session.execute(text("ANALYZE"))
+        await session.commit()
+
+
+def _filters(values: dict) -> CatalogFilters:
+    defaults = {"in_stock": False, "organic": None, "min_price": None, "max_price": None,
+                "farmer_id": None, "sort": ProductSort.NEWEST}
+    return CatalogFilters(**{**defaults, **values})
+
+
+def _params(values: dict) -> dict:
+    params = {key: (value.value if isinstance(value, ProductSort) else value) for key, value in values.items()}
+    return {**params, "page": 3, "page_size": 20, "include_total": "false"}
+
+
+async def _plan(session_factory, values: dict) -> str:
+    # The page query GET /products/public runs for page 3 (see _params)
+    query = _filters(values).page_query(offset=40, limit=20)
+    async with session_factory() as session:
+        dialect = session.bind.dialect
+        compiled = query.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+        if dialect.name == "postgresql":
+            rows = (await session.execute(text(f"EXPLAIN {compiled}"))).scalars().all()
+            return " | ".join(row.strip() for row in rows if "Scan" in row or "Sort" in row)
+        rows = (await session.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))).all()
+        return " | ".join(row[-1] for row in rows)
+
+
+async def _run(client, session_factory, counter) -> None:
+    print(f"{'scenario':<22}  {'latency':<36}  stmts  plan")
+    for name, values in SCENARIOS.items():
+        params = _params(values)
+
+        async def page():
+            catalog_cache.invalidate()
+            response = await client.get("/api/v1/products/public", params=params)
+            assert response.status_code == 200, response.text
+            return response
+
+        await page()  # warm up
+        counter.reset()
+        timings = await time_calls(page, ITERATIONS)
+        plan = await _plan(session_factory, values)
+        print(f"{name:<22}  {summarize(timings):<36}  {counter.count / ITERATIONS:>5.1f}  {plan}")
+
+
+async def main() -> None:
+    limiter.enabled = False
+    database_url = os.getenv("BENCH_DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    async with benchmark_app(database_url) as (client, session_factory, counter):
+        await _seed(session_factory)
+        print(f"{PRODUCTS} products on {database_url.split(':')[0]}\n\nwith listing indexes")
+        await _run(client, session_factory, counter)
+
+        async with session_factory() as session:
+            for index in LISTING_INDEXES:
+                await session.execute(text(f"DROP INDEX IF EXISTS {index}"))
+            await session.execute(text("ANALYZE"))
+            await session.commit()
+        print("\nwithout listing indexes")
+        await _run(client, session_factory, counter)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
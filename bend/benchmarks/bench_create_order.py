@@ -0,0 +1,55 @@
+"""
+Benchmark: POST /api/v1/orders latency as the number of cart lines grows.
+
+Reports median/p95 latency and the number of SQL statements issued per
+checkout. With set-based reservation the statement count stays flat no
+matter how many lines the cart has.
+
+    python -m benchmarks.bench_create_order
+"""
+import asyncio
+
+from benchmarks.common import benchmark_app, time_calls, summarize
+from app.models.product import Product, Farmer
+
+LINE_COUNTS = [1, 5, 10, 30, 80]
+ITERATIONS = 50
+
+
+async def main() -> None:
+    async with benchmark_app() as (client, session_factory, counter):
+        async with session_factory() as session:
+            farmer = Farmer(name="Bench Farmer", location="Bench Valley", bio="Benchmark data")
+            session.add(farmer)
+            await session.flush()
+            session.add_all([
+                Product(name=f"Produce {i}", price=10.0, stock_qty=1_000_000, unit="kg", farmer_id=farmer.id)
+                for i in range(max(LINE_COUNTS))
+            ])
+            await session.commit()
+
+        print(f"{'lines':>6}  {'latency':<36}  statements/order")
+        for lines in LINE_COUNTS:
+            payload = {
+                "customer_name": "Bench Customer",
+                "customer_email": "bench@example.com",
+                "address": "1 Benchmark Road, Test City",
+                "total_price": 10.0 * lines,
+                "items": [
+                    {"product_id": product_id, "quantity": 1, "price": 10.0}
+                    for product_id in range(1, lines + 1)
+                ],
+            }
+
+            async def place_order():
+                response = await client.post("/api/v1/orders/", json=payload)
+                assert response.status_code == 200, response.text
+
+            await place_order()  # warm up
+            counter.reset()
+            timings = await time_calls(place_order, ITERATIONS)
+            print(f"{lines:>6}  {summarize(timings):<36}  {counter.count / ITERATIONS:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
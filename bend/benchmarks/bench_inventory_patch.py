@@ -0,0 +1,68 @@
+"""
+Benchmark: a farmer's morning stock update, one PATCH per product vs one
+bulk PATCH /products/stock for the whole catalog.
+
+    python -m benchmarks.bench_inventory_patch
+"""
+import asyncio
+import random
+import time
+
+from sqlalchemy import insert
+
+from benchmarks.common import benchmark_app
+from app.core.security import create_access_token
+from app.middleware.rate_limit import limiter
+from app.models.product import Product, Farmer
+from app.models.user import User
+
+CATALOG_SIZES = [50, 200, 1000]
+ROUNDS = 3
+
+
+async def main() -> None:
+    limiter.enabled = False
+    rng = random.Random(24)
+    print(f"{'products':>8}  {'per-product PATCH':<30}  {'bulk PATCH':<30}  speedup")
+    for size in CATALOG_SIZES:
+        async with benchmark_app() as (client, session_factory, counter):
+            async with session_factory() as session:
+                await session.execute(insert(Farmer), [{"name": "Farmer", "location": "Mandya"}])
+                await session.execute(insert(User), [
+                    {"email": "farmer@bench.io", "hashed_password": "x", "role": "farmer", "farmer_id": 1}
+                ])
+                await session.execute(insert(Product), [
+                    {"name": f"Product {i}", "price": 10.0, "stock_qty": 0, "unit": "kg", "farmer_id": 1}
+                    for i in range(size)
+                ])
+                await session.commit()
+            token = create_access_token(data={"sub": "farmer@bench.io", "role": "farmer"})
+            headers = {"Authorization": f"Bearer {token}"}
+            ids = range(1, size + 1)
+
+            counter.reset()
+            start = time.perf_counter()
+            for _ in range(ROUNDS):
+                for product_id in ids:
+                    response = await client.patch(
+                        f"/api/v1/products/{product_id}/stock", params={"qty": rng.randint(0, 100)}, headers=headers
+                    )
+                    assert response.status_code == 200, response.text
+            single = (time.perf_counter() - start) / ROUNDS
+            single_statements = counter.count / ROUNDS
+
+            counter.reset()
+            start = time.perf_counter()
+            for _ in range(ROUNDS):
+                items = [{"product_id": product_id, "stock_qty": rng.randint(0, 100), "price": 12.0} for product_id in ids]
+                response = await client.patch("/api/v1/products/stock", json={"items": items}, headers=headers)
+                assert len(response.json()["updated"]) == size, response.text
+            bulk = (time.perf_counter() - start) / ROUNDS
+            bulk_statements = counter.count / ROUNDS
+
+            print(f"{size:>8}  {single * 1000:9.1f} ms {single_statements:6.0f} stmts     "
+                  f"{bulk * 1000:9.1f} ms {bulk_statements:6.0f} stmts     {single / bulk:6.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""
+Benchmark: bulk product import vs one upsert form post per product.
+
+- baseline: POST /products/upsert once per product, as onboarding works
+  without the import endpoint (run on a small sample and extrapolated);
+- import: POST /products/import with the whole file, first creating every
+  product and then, re-imported, updating every product.
+
+Peak Python memory of the import itself (``import_products`` reading
+the file from disk) is traced for growing files to show it stays flat.
+
+    python -m benchmarks.bench_product_import
+"""
+import asyncio
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import insert
+
+from benchmarks.common import benchmark_app
+from app.core.security import create_access_token
+from app.middleware.rate_limit import limiter
+from app.models.product import Farmer
+from app.models.user import User
+from app.utils.product_import import import_products
+
+ROWS = 50_000
+BASELINE_ROWS = 200
+MEMORY_ROWS = [5_000, 20_000, 50_000]
+
+
+def _write_csv(path: str, rows: int, farmer_id: int) -> None:
+    rng = random.Random(23)
+    with open(path, "w", newline="") as f:
+        f.write("name,price,unit,stock_qty,is_organic,farmer_id\n")
+        for i in range(rows):
+            f.write(f"Product {i},{rng.uniform(5, 500):.2f},kg,{rng.randint(0, 200)},true,{farmer_id}\n")
+
+
+async def main() -> None:
+    limiter.enabled = False
+    async with benchmark_app() as (client, session_factory, counter):
+        async with session_factory() as session:
+            await session.execute(insert(Farmer), [{"name": "Co-op", "location": "Mandya"}])
+            await session.execute(insert(User), [{"email": "admin@bench.io", "hashed_password": "x", "role": "admin"}])
+            await session.commit()
+        headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'admin@bench.io', 'role': 'admin'})}"}
+
+        counter.reset()
+        start = time.perf_counter()
+        for i in range(BASELINE_ROWS):
+            response = await client.post("/api/v1/products/upsert", headers=headers, data={
+                "name": f"Form Product {i}", "price": "10", "stock_qty": "5", "unit": "kg", "farmer_id": "1",
+            })
+            assert response.status_code == 200, response.text
+        per_row = (time.perf_counter() - start) / BASELINE_ROWS
+        print(f"upsert form   {BASELINE_ROWS:>6} rows  {per_row * 1000:8.2f} ms/row  "
+              f"~{per_row * ROWS:6.1f} s for {ROWS}  {counter.count / BASELINE_ROWS:.1f} statements/row")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "catalog.csv")
+            _write_csv(path, ROWS, farmer_id=1)
+            for label in ("import (new)", "import (again)"):
+                counter.reset()
+                start = time.perf_counter()
+                with open(path, "rb") as f:
+                    response = await client.post(
+                        "/api/v1/products/import", headers=headers, files={"file": ("catalog.csv", f, "text/csv")}
+                    )
+                elapsed = time.perf_counter() - start
+                report = response.json()
+                print(f"{label:<14}{report['rows']:>6} rows  {elapsed / ROWS * 1000:8.3f} ms/row  "
+                      f"{elapsed:7.1f} s total     {counter.count} statements "
+                      f"({report['inserted']} inserted, {report['updated']} updated)")
+
+            print("\npeak traced memory of import_products (updates)")
+            for rows in MEMORY_ROWS:
+                _write_csv(path, rows, farmer_id=1)
+                async with session_factory() as session:
+                    tracemalloc.start()
+                    with open(path, "rb") as f:
+                        await import_products(session, f, "csv")
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                    await session.rollback()
+                print(f"{rows:>6} rows  {peak / 1024 / 1024:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
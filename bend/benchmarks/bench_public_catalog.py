@@ -0,0 +1,63 @@
+"""
+Benchmark: GET /api/v1/products/public with and without the response cache.
+
+Uncached calls invalidate the catalog cache first, so every request runs
+the count, the joined page query and serialization; cached calls are
+served from the rendered bytes. Reports latency, throughput and the
+statements issued per request.
+
+    python -m benchmarks.bench_public_catalog
+"""
+import asyncio
+
+from benchmarks.common import benchmark_app, time_calls, summarize
+from app.middleware.rate_limit import limiter
+from app.models.product import Product, Farmer
+from app.utils.response_cache import catalog_cache
+
+PRODUCTS = 5_000
+FARMERS = 50
+PAGE_SIZES = [20, 100]
+ITERATIONS = 200
+
+
+async def main() -> None:
+    # The endpoint is limited to 30 requests per minute per client
+    limiter.enabled = False
+    async with benchmark_app() as (client, session_factory, counter):
+        async with session_factory() as session:
+            farmers = [Farmer(name=f"Farmer {i}", location="Bench Valley", bio="Benchmark data") for i in range(FARMERS)]
+            session.add_all(farmers)
+            await session.flush()
+            session.add_all([
+                Product(name=f"Produce {i}", price=10.0 + i % 40, stock_qty=100, unit="kg",
+                        farmer_id=farmers[i % FARMERS].id)
+                for i in range(PRODUCTS)
+            ])
+            await session.commit()
+
+        print(f"{'page_size':>9}  {'mode':<8}  {'latency':<36}  {'req/s':>8}  statements/request")
+        for page_size in PAGE_SIZES:
+            params = {"page": 3, "page_size": page_size}
+
+            async def fetch():
+                response = await client.get("/api/v1/products/public", params=params)
+                assert response.status_code == 200, response.text
+
+            async def fetch_uncached():
+                catalog_cache.invalidate()
+                await fetch()
+
+            for mode, call in (("uncached", fetch_uncached), ("cached", fetch)):
+                await call()  # warm up
+                counter.reset()
+                timings = await time_calls(call, ITERATIONS)
+                throughput = ITERATIONS / (sum(timings) / 1000)
+                print(f"{page_size:>9}  {mode:<8}  {summarize(timings):<36}  {throughput:>8.0f}  "
+                      f"{counter.count / ITERATIONS:.1f}")
+
+        print(f"\ncache stats: {catalog_cache.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+"""
+Micro-benchmark: response serialization per endpoint, before and after
+explicit response models.
+
+Each endpoint's typical payload is built from ORM objects (no database or
+HTTP involved) and serialized the way FastAPI does it:
+
+- before: no response model, so ``jsonable_encoder`` walks the objects,
+  then ``JSONResponse`` renders with the stdlib ``json``;
+- after: the route's response model validates and dumps the objects
+  (pydantic-core), then ``ORJSONResponse`` renders.
+
+    python -m benchmarks.bench_serialization
+"""
+import asyncio
+from datetime import date, datetime, timedelta
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from sqlalchemy.orm.attributes import set_committed_value
+
+from benchmarks.common import time_calls, summarize
+from app.main import app
+from app.models.order import Order, OrderItem
+from app.models.product import Product, Farmer
+from app.models.user import User
+from app.utils.pagination import offset_page
+
+ITERATIONS = 200
+PAGE_SIZE = 20
+
+
+def _farmers(count: int) -> list:
+    return [
+        Farmer(id=i, name=f"Farmer {i}", location="Mandya, Karnataka", bio="Paddy, millets and vegetables",
+               profile_pic=f"https://cdn.example.com/farmers/{i}.jpg")
+        for i in range(1, count + 1)
+    ]
+
+
+def _product(i: int, farmer: Farmer, with_farmer: bool = True) -> Product:
+    product = Product(id=i, name=f"Heirloom Tomatoes {i}", price=40.0 + i, unit="kg", stock_qty=25.0,
+                      is_organic=True, image_url=f"https://cdn.example.com/products/{i}.jpg", farmer_id=farmer.id)
+    if with_farmer:
+        # Loaded the way joinedload leaves it, without touching farmer.products
+        set_committed_value(product, "farmer", farmer)
+    return product
+
+
+def _orders(count: int, items_per_order: int, with_farmer: bool = True) -> list:
+    farmers = _farmers(5)
+    created = datetime(2026, 10, 1, 9, 30)
+    orders = []
+    for i in range(1, count + 1):
+        order = Order(id=i, customer_name=f"Customer {i}", customer_email=f"customer{i}@example.com",
+                      address="42 MG Road, Bengaluru 560001", total_price=250.0, status="pending",
+                      created_at=created - timedelta(minutes=i), delivery_date=date(2026, 10, 3))
+        items = []
+        for j in range(items_per_order):
+            item = OrderItem(id=i * 10 + j, order_id=i, product_id=j + 1, quantity=2, price_at_time=41.0 + j,
+                             is_harvested=False)
+            set_committed_value(item, "product", _product(j + 1, farmers[j % len(farmers)], with_farmer))
+            items.append(item)
+        set_committed_value(order, "items", items)
+        orders.append(order)
+    return orders
+
+
+def _payloads() -> dict:
+    farmers = _farmers(50)
+    products = [_product(i, farmers[i % len(farmers)]) for i in range(1, PAGE_SIZE + 1)]
+    users = [
+        User(id=i, email=f"user{i}@example.com", hashed_password="$2b$12$" + "x" * 53, role="farmer", farmer_id=i)
+        for i in range(1, 101)
+    ]
+    return {
+        ("GET", "/api/v1/products/"): offset_page(products, 1000, 1, PAGE_SIZE),
+        ("GET", "/api/v1/orders/"): offset_page(_orders(PAGE_SIZE, 3), 1000, 1, PAGE_SIZE),
+        # Tracking loads products but not their farmers
+        ("GET", "/api/v1/orders/track"): _orders(1, 5, with_farmer=False)[0],
+        ("GET", "/api/v1/farmers/"): farmers,
+        ("GET", "/api/v1/users/"): users,
+    }
+
+
+def _route(method: str, path: str) -> APIRoute:
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.path == path and method in route.methods:
+            return route
+    raise LookupError(f"{method} {path}")
+
+
+async def main() -> None:
+    print(f"{'endpoint':<24}  {'before (jsonable_encoder + json)':<36}  {'after (response model + orjson)':<36}  bytes")
+    for (method, path), content in _payloads().items():
+        route = _route(method, path)
+
+        async def before():
+            data = await serialize_response(response_content=content)
+            return JSONResponse(data).body
+
+        async def after():
+            data = await serialize_response(field=route.response_field, response_content=content, is_coroutine=True)
+            return ORJSONResponse(data).body
+
+        old_size, new_size = len(await before()), len(await after())  # warm up
+        old = await time_calls(before, ITERATIONS)
+        new = await time_calls(after, ITERATIONS)
+        print(f"{method + ' ' + path:<24}  {summarize(old):<36}  {summarize(new):<36}  {old_size} -> {new_size}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
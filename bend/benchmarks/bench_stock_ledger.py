@@ -0,0 +1,104 @@
+"""
+Benchmark: GET /api/v1/products/{id}/stock/at on a growing stock ledger,
+replaying every movement vs the nearest snapshot plus the tail after it.
+
+The ledger covers 90 days of movements spread over the catalog. Stock is
+first queried with no snapshots (the whole product history is replayed),
+then again after compacting it into snapshots every SNAPSHOT_HOURS, as
+the background snapshotter would.
+
+    python -m benchmarks.bench_stock_ledger
+"""
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+
+from benchmarks.common import benchmark_app, time_calls, summarize
+from app.core.security import create_access_token
+from app.middleware.rate_limit import limiter
+from app.models.ledger import StockMovement
+from app.models.product import Product, Farmer
+from app.models.user import User
+from app.utils.ledger import take_snapshots
+
+LEDGER_SIZES = [100_000, 1_000_000]
+PRODUCTS = 200
+DAYS = 90
+SNAPSHOT_HOURS = 6
+ITERATIONS = 200
+BATCH = 10_000
+START = datetime(2026, 1, 1)
+
+
+async def _seed(session_factory, movements: int) -> None:
+    rng = random.Random(25)
+    span = DAYS * 86400
+    async with session_factory() as session:
+        await session.execute(insert(Farmer), [{"name": "Farmer", "location": "Mandya"}])
+        await session.execute(insert(User), [{"email": "admin@bench.io", "hashed_password": "x", "role": "admin"}])
+        await session.execute(insert(Product), [
+            {"name": f"Product {i}", "price": 10.0, "stock_qty": 0, "unit": "kg", "farmer_id": 1}
+            for i in range(PRODUCTS)
+        ])
+        for start in range(0, movements, BATCH):
+            await session.execute(insert(StockMovement), [
+                {"product_id": rng.randint(1, PRODUCTS), "created_at": START + timedelta(seconds=rng.randrange(span)),
+                 "delta": rng.choice([-2, -1, -1, 5]), "reason": "adjustment"}
+                for _ in range(start, start + BATCH)
+            ])
+        await session.commit()
+        await session.execute(text("ANALYZE"))
+        await session.commit()
+
+
+async def _snapshot(session_factory) -> float:
+    start = time.perf_counter()
+    async with session_factory() as session:
+        for step in range(1, DAYS * 24 // SNAPSHOT_HOURS + 1):
+            await take_snapshots(session, until=START + timedelta(hours=step * SNAPSHOT_HOURS))
+            await session.commit()
+    return time.perf_counter() - start
+
+
+async def _measure(client, counter, headers) -> tuple:
+    rng = random.Random(7)
+
+    async def query():
+        product_id = rng.randint(1, PRODUCTS)
+        at = START + timedelta(seconds=rng.randrange(DAYS * 86400))
+        response = await client.get(
+            f"/api/v1/products/{product_id}/stock/at", params={"at": at.isoformat()}, headers=headers
+        )
+        assert response.status_code == 200, response.text
+        replayed.append(response.json()["movements_replayed"])
+
+    replayed = []
+    await query()  # warm up
+    replayed.clear()
+    counter.reset()
+    timings = await time_calls(query, ITERATIONS)
+    return timings, sum(replayed) / len(replayed), counter.count / ITERATIONS
+
+
+async def main() -> None:
+    limiter.enabled = False
+    token = create_access_token(data={"sub": "admin@bench.io", "role": "admin"})
+    headers = {"Authorization": f"Bearer {token}"}
+    print(f"{'movements':>9}  {'mode':<10}  {'latency':<36}  replayed  stmts")
+    for size in LEDGER_SIZES:
+        async with benchmark_app() as (client, session_factory, counter):
+            await _seed(session_factory, size)
+            timings, replayed, statements = await _measure(client, counter, headers)
+            print(f"{size:>9}  {'replay':<10}  {summarize(timings):<36}  {replayed:>8.0f}  {statements:>5.1f}")
+
+            elapsed = await _snapshot(session_factory)
+            timings, replayed, statements = await _measure(client, counter, headers)
+            print(f"{size:>9}  {'snapshots':<10}  {summarize(timings):<36}  {replayed:>8.1f}  {statements:>5.1f}"
+                  f"  ({DAYS * 24 // SNAPSHOT_HOURS} snapshot runs in {elapsed:.1f} s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""
+Shared setup for the API benchmarks.
+
+Benchmarks run the real application in-process against a throwaway SQLite
+database, the same way the test suite does. Run them from the ``bend``
+directory, e.g. ``python -m benchmarks.bench_create_order``.
+"""
+import os
+
+# Point the app at SQLite BEFORE any app modules are imported.
+os.environ.setdefault("database-url", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("ENVIRONMENT", "benchmark")
+
+import logging
+import statistics
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Awaitable, List, Tuple
+
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
+
+from app.main import app
+from app.core.database import get_db, Base
+
+logging.disable(logging.WARNING)
+
+
+class StatementCounter:
+    """Counts SQL statements sent to the database (i.e. round trips)."""
+
+    def __init__(self, engine: AsyncEngine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs) -> None:
+        self.count += 1
+
+    def reset(self) -> None:
+        self.count = 0
+
+
+@asynccontextmanager
+async def benchmark_app(database_url: str = "sqlite+aiosqlite:///:memory:") -> AsyncIterator[Tuple[AsyncClient, async_sessionmaker, StatementCounter]]:
+    """
+    Yield an HTTP client bound to the app, a session factory and a statement
+    counter, all pointing at a freshly created schema.
+    """
+    engine = create_async_engine(database_url, echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    counter = StatementCounter(engine)
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            yield client, session_factory, counter
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+async def time_calls(call: Callable[[], Awaitable[object]], iterations: int) -> List[float]:
+    """Run ``call`` ``iterations`` times and return per-call latency in ms."""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings: List[float]) -> str:
+    """Format median and p95 latency."""
+    ordered = sorted(timings)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    return f"median {statistics.median(ordered):8.2f} ms   p95 {p95:8.2f} ms"
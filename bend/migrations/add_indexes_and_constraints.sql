@@ -9,18 +9,37 @@
 -- Orders table indexes
 CREATE INDEX IF NOT EXISTS ix_orders_customer_email ON orders(customer_email);
 CREATE INDEX IF NOT EXISTS ix_orders_status ON orders(status);
-CREATE INDEX IF NOT EXISTS ix_orders_created_at ON orders(created_at);
+-- Keyset pagination on (created_at, id); supersedes the single-column index
+CREATE INDEX IF NOT EXISTS ix_orders_created_at_id ON orders(created_at, id);
+DROP INDEX IF EXISTS ix_orders_created_at;
+CREATE INDEX IF NOT EXISTS ix_orders_delivery_date ON orders(delivery_date);
 
 -- Order items table indexes
 CREATE INDEX IF NOT EXISTS ix_order_items_order_id ON order_items(order_id);
-CREATE INDEX IF NOT EXISTS ix_order_items_product_id ON order_items(product_id);
+-- Farmer item keyset pagination on (product_id, id); supersedes the single-column index
+CREATE INDEX IF NOT EXISTS ix_order_items_product_id_id ON order_items(product_id, id);
+DROP INDEX IF EXISTS ix_order_items_product_id;
+-- Pick lists: open (unharvested) items only
+CREATE INDEX IF NOT EXISTS ix_order_items_unharvested ON order_items(product_id, order_id, quantity) WHERE is_harvested = false;
 
 -- Products table indexes
-CREATE INDEX IF NOT EXISTS ix_products_farmer_id ON products(farmer_id);
+-- Farmer filter, newest first; supersedes the single-column index
+CREATE INDEX IF NOT EXISTS ix_products_farmer_id_id ON products(farmer_id, id);
+DROP INDEX IF EXISTS ix_products_farmer_id;
 CREATE INDEX IF NOT EXISTS ix_products_name ON products(name);
+-- Catalog filters and sorts: price, and in-stock only (partial)
+CREATE INDEX IF NOT EXISTS ix_products_price_id ON products(price, id);
+CREATE INDEX IF NOT EXISTS ix_products_in_stock ON products(id) WHERE stock_qty > 0;
+CREATE INDEX IF NOT EXISTS ix_products_in_stock_price ON products(price, id) WHERE stock_qty > 0;
+-- Product search: prefix full-text matching and trigram typo tolerance
+CREATE INDEX IF NOT EXISTS ix_products_name_fts ON products USING gin ((to_tsvector('simple', coalesce(name, ''))));
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops);
 
 -- Farmers table indexes
 CREATE INDEX IF NOT EXISTS ix_farmers_name ON farmers(name);
+-- Product search by farmer name, location and bio
+CREATE INDEX IF NOT EXISTS ix_farmers_search_fts ON farmers USING gin ((to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(location, '') || ' ' || coalesce(bio, ''))));
 
 -- Users table indexes (email already has unique index)
 CREATE INDEX IF NOT EXISTS ix_users_role ON users(role);
@@ -17,6 +17,11 @@ from app.main import app
 from app.core.database import get_db, Base
 from app.core.security import get_password_hash, create_access_token
 from app.core import security as security_module
+from app.utils.counting import count_cache
+from app.utils.manifest import manifest_cache
+from app.utils.quotes import quote_cache
+from app.utils.response_cache import catalog_cache
+from app.middleware.rate_limit import limiter
 from app.models.user import User
 from app.models.product import Product, Farmer
 from app.models.order import Order, OrderItem
@@ -185,6 +190,69 @@ def clear_token_blacklist():
     security_module._token_blacklist.clear()
 
 
+@pytest.fixture(autouse=True)
+def clear_count_cache():
+    """Clear cached list totals between tests (each test has a fresh database)."""
+    count_cache.clear()
+    yield
+    count_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_manifest_cache():
+    """Clear cached delivery manifests between tests."""
+    manifest_cache.clear()
+    yield
+    manifest_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_catalog_cache():
+    """Clear cached public catalog pages and counters between tests."""
+    catalog_cache.clear()
+    yield
+    catalog_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_quote_cache():
+    """Clear cart price snapshots between tests."""
+    quote_cache.clear()
+    yield
+    quote_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    """Start every test with fresh rate-limit windows (no-op without slowapi)."""
+    if hasattr(limiter, "reset"):
+        limiter.reset()
+    yield
+
+
+@pytest_asyncio.fixture
+async def postgres_env():
+    """App client and session factory on a local Postgres (TEST_POSTGRES_URL)."""
+    engine = create_async_engine(os.environ["TEST_POSTGRES_URL"])
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac, session_maker
+
+    app.dependency_overrides.clear()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
 def auth_header(token: str) -> dict:
     """Create authorization header."""
     return {"Authorization": f"Bearer {token}"}
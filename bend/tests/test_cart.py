@@ -0,0 +1,250 @@
+"""
+Tests for cart stock holds and quotes (app/utils/holds.py,
+app/utils/quotes.py, /api/v1/cart).
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, update, func
+
+from app.core.config import settings
+from app.models.hold import StockHold
+from app.models.product import Product
+from app.utils.holds import sweep_expired_holds
+
+
+def _order_payload(product_id: int, quantity: int, hold_id: str = None, price: float = 50.0, **extra) -> dict:
+    payload = {
+        "customer_name": "Cart Customer",
+        "customer_email": "cart@test.com",
+        "address": "123 Test Street, Test City",
+        "total_price": price * quantity,
+        "items": [{"product_id": product_id, "quantity": quantity, "price": price}],
+        **extra,
+    }
+    if hold_id:
+        payload["hold_id"] = hold_id
+    return payload
+
+
+@pytest.fixture(autouse=True)
+def roomy_hold_caps(monkeypatch):
+    """Per-client hold caps well above these tests' quantities (one client places every hold)."""
+    monkeypatch.setattr(settings, "CART_HOLD_MAX_UNITS_PER_CLIENT", 1000)
+    monkeypatch.setattr(settings, "CART_HOLD_MAX_UNITS_PER_PRODUCT", 1000)
+
+
+async def _available(client: AsyncClient, product_id: int) -> dict:
+    response = await client.get("/api/v1/cart/availability", params={"product_ids": [product_id]})
+    assert response.status_code == 200
+    return response.json()[0]
+
+
+@pytest.mark.asyncio
+async def test_holds_reduce_available_stock(client: AsyncClient, test_product):
+    """A hold lowers availability for other carts and checkouts without touching stock_qty."""
+    product_id = test_product.id
+    response = await client.post("/api/v1/cart/holds", json={"items": [{"product_id": product_id, "quantity": 70}]})
+    assert response.status_code == 200
+    hold_id = response.json()["hold_id"]
+
+    assert await _available(client, product_id) == {
+        "product_id": product_id, "stock_qty": 100, "held": 70, "available": 30,
+    }
+
+    # Another cart cannot hold more than what is left
+    response = await client.post("/api/v1/cart/holds", json={"items": [{"product_id": product_id, "quantity": 40}]})
+    assert response.status_code == 400
+    assert response.json()["failures"][0]["available"] == 30
+
+    # Nor can a checkout that is not converting the hold
+    response = await client.post("/api/v1/orders/", json=_order_payload(product_id, 40))
+    assert response.status_code == 400
+
+    # Refreshing the hold replaces its quantities
+    response = await client.post(
+        "/api/v1/cart/holds",
+        json={"hold_id": hold_id, "items": [{"product_id": product_id, "quantity": 50}]},
+    )
+    assert response.json()["hold_id"] == hold_id
+    assert (await _available(client, product_id))["available"] == 50
+
+
+@pytest.mark.asyncio
+async def test_order_converts_hold(client: AsyncClient, test_session, test_product):
+    """Checking out with the hold_id may use the held stock and deletes the hold."""
+    product_id = test_product.id
+    response = await client.post("/api/v1/cart/holds", json={"items": [{"product_id": product_id, "quantity": 80}]})
+    hold_id = response.json()["hold_id"]
+
+    response = await client.post("/api/v1/orders/", json=_order_payload(product_id, 90, hold_id))
+    assert response.status_code == 200
+
+    assert await _available(client, product_id) == {
+        "product_id": product_id, "stock_qty": 10, "held": 0, "available": 10,
+    }
+    remaining = (await test_session.execute(select(func.count()).select_from(StockHold))).scalar_one()
+    assert remaining == 0
+
+
+@pytest.mark.asyncio
+async def test_expired_holds_stop_counting_and_are_swept(client: AsyncClient, test_session, test_product):
+    """An expired hold frees its stock at once; the sweeper deletes it later."""
+    product_id = test_product.id
+    for quantity in (60, 30):
+        await client.post("/api/v1/cart/holds", json={"items": [{"product_id": product_id, "quantity": quantity}]})
+    await test_session.execute(
+        update(StockHold)
+        .where(StockHold.quantity == 60)
+        .values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+    )
+    await test_session.commit()
+
+    assert (await _available(client, product_id))["available"] == 70
+    response = await client.post("/api/v1/orders/", json=_order_payload(product_id, 70))
+    assert response.status_code == 200
+
+    assert await sweep_expired_holds(test_session, batch_size=1) == 1
+    quantities = (await test_session.execute(select(StockHold.quantity))).scalars().all()
+    assert quantities == [30]
+
+
+@pytest.mark.asyncio
+async def test_release_hold(client: AsyncClient, test_product):
+    """Releasing a cart's hold makes the stock available again."""
+    product_id = test_product.id
+    response = await client.post("/api/v1/cart/holds", json={"items": [{"product_id": product_id, "quantity": 100}]})
+    hold_id = response.json()["hold_id"]
+
+    response = await client.delete(f"/api/v1/cart/holds/{hold_id}")
+    assert response.json() == {"released": 1}
+    assert (await _available(client, product_id))["available"] == 100
+
+    response = await client.post("/api/v1/cart/holds", json={"items": [{"product_id": 999999, "quantity": 1}]})
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_hold_caps_per_client(client: AsyncClient, test_session, test_farmer, test_product, monkeypatch):
+    """One client cannot hold more than its caps, across carts; other clients are unaffected."""
+    monkeypatch.setattr(settings, "CART_HOLD_MAX_UNITS_PER_CLIENT", 50)
+    monkeypatch.setattr(settings, "CART_HOLD_MAX_UNITS_PER_PRODUCT", 30)
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_HOPS", 1)
+    beans = Product(name="Beans", price=40.0, stock_qty=100, unit="kg", farmer_id=test_farmer.id)
+    test_session.add(beans)
+    await test_session.commit()
+    product_id, beans_id = test_product.id, beans.id
+    # Clients as seen by the trusted proxy; whatever the client sent comes first
+    first_client = {"X-Forwarded-For": "10.9.8.7, 203.0.113.7"}
+
+    def hold(pid: int, quantity: int, hold_id: str = None, headers: dict = first_client):
+        payload = {"items": [{"product_id": pid, "quantity": quantity}]}
+        if hold_id:
+            payload["hold_id"] = hold_id
+        return client.post("/api/v1/cart/holds", json=payload, headers=headers)
+
+    response = await hold(product_id, 31)
+    assert response.status_code == 429
+    assert "30 units of product" in response.json()["detail"]
+
+    response = await hold(product_id, 30)
+    assert response.status_code == 200
+    hold_id = response.json()["hold_id"]
+
+    # A second cart counts against the same caps
+    assert (await hold(product_id, 1)).status_code == 429
+    response = await hold(beans_id, 21)
+    assert response.status_code == 429
+    assert "50 units at once" in response.json()["detail"]
+    assert (await hold(beans_id, 20)).status_code == 200
+
+    # Renewing a cart replaces its own holds rather than adding to them
+    assert (await hold(product_id, 30, hold_id)).status_code == 200
+
+    # Expired holds no longer count
+    await test_session.execute(update(StockHold).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    await test_session.commit()
+    assert (await hold(beans_id, 30)).status_code == 200
+
+    # Another client has its own allowance
+    assert (await hold(product_id, 30, headers={"X-Forwarded-For": "198.51.100.2"})).status_code == 200
+    assert (await _available(client, product_id))["held"] == 30
+
+
+@pytest.mark.asyncio
+async def test_hold_caps_ignore_forged_forwarding(client: AsyncClient, test_product, monkeypatch):
+    """Clients cannot pick their own identity with X-Forwarded-For, however long the header."""
+    monkeypatch.setattr(settings, "CART_HOLD_MAX_UNITS_PER_PRODUCT", 30)
+    product_id = test_product.id
+
+    def hold(forwarded_for: str):
+        return client.post(
+            "/api/v1/cart/holds",
+            json={"items": [{"product_id": product_id, "quantity": 30}]},
+            headers={"X-Forwarded-For": forwarded_for},
+        )
+
+    # No trusted proxy: the connection's address is the client, whatever the header says
+    assert (await hold("203.0.113.1")).status_code == 200
+    assert (await hold("203.0.113.2")).status_code == 429
+    assert (await hold("x" * 500)).status_code == 429
+
+    # Behind a proxy only the hop it appended counts, and any length fits the key column
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_HOPS", 1)
+    assert (await hold("198.51.100.1, 198.51.100.9")).status_code == 200
+    assert (await hold("198.51.100.2, 198.51.100.9")).status_code == 429
+    assert (await hold("x" * 500)).status_code == 200
+    assert (await hold("x" * 500)).status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_quote_prices_whole_cart(client: AsyncClient, test_session, test_farmer, test_product):
+    """A quote returns current prices, line totals, availability and missing products."""
+    carrots = Product(name="Carrots", price=20.5, stock_qty=3, unit="kg", farmer_id=test_farmer.id)
+    test_session.add(carrots)
+    await test_session.commit()
+    await client.post("/api/v1/cart/holds", json={"items": [{"product_id": test_product.id, "quantity": 98}]})
+
+    response = await client.post("/api/v1/cart/quote", json={"items": [
+        {"product_id": test_product.id, "quantity": 2},
+        {"product_id": carrots.id, "quantity": 4},
+        {"product_id": 999999, "quantity": 1},
+    ]})
+    assert response.status_code == 200
+    quote = response.json()
+    assert [(line["product_id"], line["line_total"], line["available"], line["in_stock"]) for line in quote["items"]] == [
+        (test_product.id, 100.0, 2, True),
+        (carrots.id, 82.0, 3, False),
+    ]
+    assert quote["total"] == 182.0
+    assert quote["missing"] == [999999]
+    assert quote["all_in_stock"] is False
+
+
+@pytest.mark.asyncio
+async def test_order_checked_against_quote_snapshot(client: AsyncClient, test_session, test_product):
+    """The quoted price is honoured after a price change; without the quote the order is refused."""
+    product_id = test_product.id
+    response = await client.post("/api/v1/cart/quote", json={"items": [{"product_id": product_id, "quantity": 2}]})
+    quote_id = response.json()["quote_id"]
+
+    await test_session.execute(update(Product).where(Product.id == product_id).values(price=60.0))
+    await test_session.commit()
+
+    response = await client.post("/api/v1/orders/", json=_order_payload(product_id, 2))
+    assert response.status_code == 409
+    failures = response.json()["failures"]
+    assert [(f["reason"], f["expected"]) for f in failures] == [("price_changed", 60.0), ("total_mismatch", 120.0)]
+
+    response = await client.post("/api/v1/orders/", json=_order_payload(product_id, 2, quote_id=quote_id))
+    assert response.status_code == 200
+
+    # An unknown (or expired) quote falls back to current prices
+    response = await client.post("/api/v1/orders/", json=_order_payload(product_id, 1, quote_id="gone"))
+    assert response.status_code == 409
+    response = await client.post("/api/v1/orders/", json=_order_payload(product_id, 1, price=60.0, quote_id="gone"))
+    assert response.status_code == 200
+
+    stock = (await test_session.execute(select(Product.stock_qty).where(Product.id == product_id))).scalar_one()
+    assert stock == 97
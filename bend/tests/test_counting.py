@@ -0,0 +1,74 @@
+"""
+Tests for cached and optional totals on paginated list endpoints.
+"""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from app.utils.counting import CountCache
+from tests.conftest import auth_header
+
+
+def _order_payload(product_id: int) -> dict:
+    return {
+        "customer_name": "Count Customer",
+        "customer_email": "count@test.com",
+        "address": "123 Test Street, Test City",
+        "total_price": 50.0,
+        "items": [{"product_id": product_id, "quantity": 1, "price": 50.0}],
+    }
+
+
+def _count_statements(engine) -> list:
+    """Record count queries executed on ``engine``."""
+    seen = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, *args):
+        if "count(" in statement.lower():
+            seen.append(statement)
+
+    return seen
+
+
+@pytest.mark.asyncio
+async def test_order_total_cached_and_invalidated(client: AsyncClient, test_engine, test_order, admin_token):
+    """The orders total is counted once, served from cache, and refreshed after a new order."""
+    counts = _count_statements(test_engine)
+    product_id = (await client.get("/api/v1/products/", headers=auth_header(admin_token))).json()["items"][0]["id"]
+
+    first = await client.get("/api/v1/orders/", headers=auth_header(admin_token))
+    second = await client.get("/api/v1/orders/", headers=auth_header(admin_token))
+    assert first.json()["total"] == second.json()["total"] == 1
+    order_counts = [s for s in counts if "orders" in s]
+    assert len(order_counts) == 1
+
+    await client.post("/api/v1/orders/", json=_order_payload(product_id))
+    third = await client.get("/api/v1/orders/", headers=auth_header(admin_token))
+    assert third.json()["total"] == 2
+
+
+@pytest.mark.asyncio
+async def test_include_total_false_skips_count(client: AsyncClient, test_engine, test_product):
+    """include_total=false returns no total and never runs a count."""
+    counts = _count_statements(test_engine)
+    response = await client.get("/api/v1/products/public", params={"include_total": "false"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] is None
+    assert data["total_pages"] is None
+    assert len(data["items"]) == 1
+    assert counts == []
+
+
+def test_count_cache_ignores_stale_store():
+    """A count started before an invalidation is not cached."""
+    cache = CountCache(ttl_seconds=60, max_entries=10)
+    key = cache.key("orders", {"status": "pending"})
+    generation = cache.generation("orders")
+
+    cache.invalidate("orders")
+    cache.set(key, 5, generation)
+
+    assert cache.get(key) is None
@@ -0,0 +1,98 @@
+"""
+Tests for bulk inventory updates (PATCH /api/v1/products/stock).
+"""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.models.product import Product, Farmer
+from tests.conftest import auth_header
+
+
+async def _levels(session, *product_ids) -> dict:
+    """product_id -> (stock_qty, price), read from the table rather than the identity map."""
+    result = await session.execute(
+        select(Product.id, Product.stock_qty, Product.price).where(Product.id.in_(product_ids))
+    )
+    return {row.id: (row.stock_qty, row.price) for row in result}
+
+
+async def _other_farmers_product(session) -> Product:
+    other = Farmer(name="Other Farmer", location="Other Location")
+    session.add(other)
+    await session.flush()
+    product = Product(name="Their Beans", price=10.0, stock_qty=5, unit="kg", farmer_id=other.id)
+    session.add(product)
+    await session.commit()
+    return product
+
+
+@pytest.mark.asyncio
+async def test_farmer_inventory_patch(client: AsyncClient, test_session, test_product, farmer_token):
+    """Own products are set in one go; others' products, unknown ids and repeats are rejected."""
+    own = Product(name="Okra", price=30.0, stock_qty=0, unit="kg", farmer_id=test_product.farmer_id)
+    test_session.add(own)
+    await test_session.commit()
+    theirs = await _other_farmers_product(test_session)
+
+    response = await client.patch(
+        "/api/v1/products/stock",
+        json={"items": [
+            {"product_id": test_product.id, "stock_qty": 40},
+            {"product_id": own.id, "stock_qty": 12.5, "price": 35},
+            {"product_id": theirs.id, "stock_qty": 0},
+            {"product_id": 9999, "stock_qty": 1},
+            {"product_id": own.id, "stock_qty": 99},
+        ]},
+        headers=auth_header(farmer_token),
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["updated"] == [
+        {"product_id": test_product.id, "stock_qty": 40.0, "price": 50.0},
+        {"product_id": own.id, "stock_qty": 12.5, "price": 35.0},
+    ]
+    assert data["rejected"] == [
+        {"product_id": own.id, "reason": "duplicate"},
+        {"product_id": theirs.id, "reason": "forbidden"},
+        {"product_id": 9999, "reason": "not_found"},
+    ]
+    assert await _levels(test_session, test_product.id, own.id, theirs.id) == {
+        test_product.id: (40.0, 50.0),
+        own.id: (12.5, 35.0),
+        theirs.id: (5.0, 10.0),
+    }
+
+
+@pytest.mark.asyncio
+async def test_admin_inventory_patch_refreshes_catalog(client: AsyncClient, test_session, test_product, admin_token):
+    """Admins may update any product; cached catalog pages are dropped once."""
+    theirs = await _other_farmers_product(test_session)
+    response = await client.get("/api/v1/products/public", params={"in_stock": "true"})
+    assert response.json()["total"] == 2
+
+    response = await client.patch(
+        "/api/v1/products/stock",
+        json={"items": [{"product_id": test_product.id, "stock_qty": 0}, {"product_id": theirs.id, "stock_qty": 0}]},
+        headers=auth_header(admin_token),
+    )
+    assert [line["product_id"] for line in response.json()["updated"]] == [test_product.id, theirs.id]
+
+    response = await client.get("/api/v1/products/public", params={"in_stock": "true"})
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json()["total"] == 0
+
+    response = await client.get("/api/v1/products/public/cache-stats", headers=auth_header(admin_token))
+    assert response.json()["invalidations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_inventory_patch_validation(client: AsyncClient, test_product, farmer_token):
+    """Negative stock or prices and empty batches are refused before anything is written."""
+    for items in ([{"product_id": test_product.id, "stock_qty": -1}],
+                  [{"product_id": test_product.id, "stock_qty": 1, "price": -5}],
+                  []):
+        response = await client.patch(
+            "/api/v1/products/stock", json={"items": items}, headers=auth_header(farmer_token)
+        )
+        assert response.status_code == 422
@@ -0,0 +1,121 @@
+"""
+Tests for order event pub/sub and the SSE tracking stream.
+"""
+import asyncio
+import json
+import os
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.core.events import EventBroker, LocalBackend, PostgresNotifyBackend, broker, order_topic
+from app.models.order import OrderItem
+from tests.conftest import auth_header
+
+
+def _parse_sse(body: str) -> list:
+    """Split an SSE body into (event, data) pairs, ignoring comments."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = [line for line in block.splitlines() if not line.startswith(":")]
+        if not lines:
+            continue
+        fields = dict(line.split(": ", 1) for line in lines)
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+async def _wait_for_subscriber(topic: str) -> None:
+    for _ in range(100):
+        if broker.subscriber_count(topic):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"No subscriber on {topic}")
+
+
+@pytest.mark.asyncio
+async def test_broker_fans_out_and_drops_oldest_when_full():
+    """Every subscriber gets the event; a full queue loses its oldest event, not the newest."""
+    local = EventBroker(LocalBackend(), queue_size=2)
+    first = local.subscribe("order:1")
+    second = local.subscribe("order:1")
+    other = local.subscribe("order:2")
+
+    for n in range(3):
+        await local.publish("order:1", {"n": n})
+
+    assert [first.get_nowait()["n"] for _ in range(2)] == [1, 2]
+    assert second.qsize() == 2
+    assert other.empty()
+
+    local.unsubscribe("order:1", first)
+    local.unsubscribe("order:1", second)
+    assert local.subscriber_count("order:1") == 0
+
+
+@pytest.mark.asyncio
+async def test_track_stream_pushes_harvest_and_status(client: AsyncClient, test_session, test_order, farmer_token, admin_token):
+    """The stream sends a snapshot, then harvest and status events, and ends on delivery."""
+    order_id = test_order.id
+    item_id = (await test_session.execute(
+        select(OrderItem.id).where(OrderItem.order_id == order_id)
+    )).scalar_one()
+    topic = order_topic(order_id)
+
+    stream = asyncio.create_task(client.get(
+        "/api/v1/orders/track/stream",
+        params={"order_id": order_id, "email": "customer@test.com"},
+    ))
+    await _wait_for_subscriber(topic)
+
+    response = await client.patch(f"/api/v1/orders/items/{item_id}/harvest", headers=auth_header(farmer_token))
+    assert response.status_code == 200
+    response = await client.patch(
+        f"/api/v1/orders/{order_id}/status", params={"status": "delivered"}, headers=auth_header(admin_token)
+    )
+    assert response.status_code == 200
+
+    response = await asyncio.wait_for(stream, timeout=5)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = _parse_sse(response.text)
+    assert [name for name, _ in events] == ["snapshot", "harvest", "status"]
+    snapshot = events[0][1]
+    assert snapshot["status"] == "pending"
+    assert snapshot["items"][0]["is_harvested"] is False
+    assert events[1][1] == {"order_id": order_id, "type": "harvest", "item_ids": [item_id], "status": "packed"}
+    assert events[2][1]["status"] == "delivered"
+    assert broker.subscriber_count(topic) == 0
+
+
+@pytest.mark.asyncio
+async def test_track_stream_wrong_email(client: AsyncClient, test_order):
+    """A mismatched email gets the same 404 as /track and leaves no subscriber behind."""
+    order_id = test_order.id
+    response = await client.get(
+        "/api/v1/orders/track/stream",
+        params={"order_id": order_id, "email": "someone@else.com"},
+    )
+    assert response.status_code == 404
+    assert broker.subscriber_count(order_topic(order_id)) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+async def test_postgres_backend_delivers_across_brokers():
+    """Two brokers sharing a database see each other's events (as two replicas would)."""
+    dsn = os.environ["TEST_POSTGRES_URL"].replace("+asyncpg", "")
+    publisher = EventBroker(PostgresNotifyBackend(dsn), queue_size=10)
+    listener = EventBroker(PostgresNotifyBackend(dsn), queue_size=10)
+    await publisher.start()
+    await listener.start()
+    try:
+        queue = listener.subscribe("order:42")
+        await publisher.publish("order:42", {"type": "status", "status": "packed"})
+        event = await asyncio.wait_for(queue.get(), timeout=5)
+        assert event == {"type": "status", "status": "packed"}
+    finally:
+        await publisher.stop()
+        await listener.stop()
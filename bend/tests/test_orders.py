@@ -213,3 +213,681 @@ async def test_track_order_success(client: AsyncClient, test_order):
     data = response.json()
     assert data["id"] == test_order.id
     assert data["customer_email"] == "customer@test.com"
+
+
+@pytest.mark.asyncio
+async def test_create_order_multiple_lines_reserves_stock(client: AsyncClient, test_session, test_farmer, test_product):
+    """A multi-line cart decrements every product, combining repeated lines."""
+    from app.models.product import Product
+
+    carrots = Product(name="Carrots", price=20.0, stock_qty=10, unit="kg", farmer_id=test_farmer.id)
+    test_session.add(carrots)
+    await test_session.commit()
+
+    order_data = {
+        "customer_name": "Bulk Buyer",
+        "customer_email": "bulk@test.com",
+        "address": "42 Restaurant Row, Test City",
+        "total_price": 280.0,
+        "items": [
+            {"product_id": test_product.id, "quantity": 3, "price": 50.0},
+            {"product_id": carrots.id, "quantity": 4, "price": 20.0},
+            {"product_id": test_product.id, "quantity": 1, "price": 50.0},
+        ],
+    }
+    response = await client.post("/api/v1/orders/", json=order_data)
+    assert response.status_code == 200
+
+    await test_session.refresh(test_product)
+    await test_session.refresh(carrots)
+    assert test_product.stock_qty == 96
+    assert carrots.stock_qty == 6
+
+
+@pytest.mark.asyncio
+async def test_create_order_unknown_product_leaves_stock(client: AsyncClient, test_session, test_product):
+    """An unknown product in the cart returns 404 and reserves nothing."""
+    order_data = {
+        "customer_name": "Test Customer",
+        "customer_email": "customer@test.com",
+        "address": "123 Test Street, Test City",
+        "total_price": 100.0,
+        "items": [
+            {"product_id": test_product.id, "quantity": 2, "price": 50.0},
+            {"product_id": 99999, "quantity": 1, "price": 10.0},
+        ],
+    }
+    response = await client.post("/api/v1/orders/", json=order_data)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Product 99999 not found"
+
+    await test_session.refresh(test_product)
+    assert test_product.stock_qty == 100
+
+
+def _order_payload(product_id: int, quantity: int = 2) -> dict:
+    return {
+        "customer_name": "Retry Customer",
+        "customer_email": "retry@test.com",
+        "address": "123 Test Street, Test City",
+        "total_price": 50.0 * quantity,
+        "items": [{"product_id": product_id, "quantity": quantity, "price": 50.0}],
+    }
+
+
+@pytest.mark.asyncio
+async def test_create_order_idempotent_replay(client: AsyncClient, test_session, test_product):
+    """Retrying with the same Idempotency-Key returns the first order without re-reserving stock."""
+    headers = {"Idempotency-Key": "checkout-abc-123"}
+    first = await client.post("/api/v1/orders/", json=_order_payload(test_product.id), headers=headers)
+    second = await client.post("/api/v1/orders/", json=_order_payload(test_product.id), headers=headers)
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert second.json()["order_id"] == first.json()["order_id"]
+    assert second.headers.get("Idempotent-Replayed") == "true"
+
+    await test_session.refresh(test_product)
+    assert test_product.stock_qty == 98
+
+
+@pytest.mark.asyncio
+async def test_create_order_idempotency_key_reused_with_other_body(client: AsyncClient, test_product):
+    """Reusing a key for a different cart is rejected."""
+    headers = {"Idempotency-Key": "checkout-reused"}
+    await client.post("/api/v1/orders/", json=_order_payload(test_product.id, 1), headers=headers)
+    response = await client.post("/api/v1/orders/", json=_order_payload(test_product.id, 3), headers=headers)
+
+    assert response.status_code == 422
+    assert "different request" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_create_order_idempotent_error_replayed(client: AsyncClient, test_product):
+    """A rejected checkout is replayed as the same error."""
+    payload = _order_payload(test_product.id, 500)
+    headers = {"Idempotency-Key": "checkout-too-many"}
+    first = await client.post("/api/v1/orders/", json=payload, headers=headers)
+    second = await client.post("/api/v1/orders/", json=payload, headers=headers)
+
+    assert first.status_code == 400
+    assert second.status_code == 400
+    assert second.json() == first.json()
+
+
+async def _abandoned_claim(test_session, key: str, payload: dict, locked_until) -> None:
+    """Insert the in-progress row a worker leaves behind if it dies after claiming ``key``."""
+    from datetime import datetime, timedelta
+    from app.models.idempotency import IdempotencyKey
+    from app.schemas.order import OrderCreate
+    from app.utils.idempotency import request_fingerprint
+
+    now = datetime.utcnow()
+    test_session.add(IdempotencyKey(
+        key=f"orders:{key}",
+        request_hash=request_fingerprint(OrderCreate(**payload)),
+        owner="dead-worker",
+        locked_until=locked_until,
+        created_at=now,
+        expires_at=now + timedelta(hours=24),
+    ))
+    await test_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_create_order_takes_over_abandoned_claim(client: AsyncClient, test_session, test_product):
+    """A retry takes over a claim whose lease lapsed instead of getting 409 until the key expires."""
+    from datetime import datetime, timedelta
+
+    payload = _order_payload(test_product.id)
+    await _abandoned_claim(test_session, "checkout-crashed", payload, datetime.utcnow() - timedelta(seconds=1))
+    headers = {"Idempotency-Key": "checkout-crashed"}
+
+    first = await client.post("/api/v1/orders/", json=payload, headers=headers)
+    assert first.status_code == 200
+    second = await client.post("/api/v1/orders/", json=payload, headers=headers)
+    assert second.json()["order_id"] == first.json()["order_id"]
+    assert second.headers.get("Idempotent-Replayed") == "true"
+
+    await test_session.refresh(test_product)
+    assert test_product.stock_qty == 98
+
+
+@pytest.mark.asyncio
+async def test_create_order_waits_on_live_claim(client: AsyncClient, test_session, test_product, monkeypatch):
+    """A claim still within its lease is not taken over."""
+    from datetime import datetime, timedelta
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.2)
+    payload = _order_payload(test_product.id)
+    await _abandoned_claim(test_session, "checkout-running", payload, datetime.utcnow() + timedelta(minutes=1))
+
+    response = await client.post("/api/v1/orders/", json=payload, headers={"Idempotency-Key": "checkout-running"})
+    assert response.status_code == 409
+    assert "still being processed" in response.json()["detail"]
+
+    await test_session.refresh(test_product)
+    assert test_product.stock_qty == 100
+
+
+async def _seed_orders(test_session, product, count: int, created_at=None):
+    """Insert ``count`` single-item orders for ``product``; returns their ids."""
+    from datetime import datetime
+    from app.models.order import Order, OrderItem
+
+    ids = []
+    for i in range(count):
+        order = Order(
+            customer_name=f"Customer {i}",
+            customer_email=f"c{i}@test.com",
+            address="123 Test Street, Test City",
+            total_price=50.0,
+            created_at=created_at or datetime(2026, 1, 1 + i),
+        )
+        test_session.add(order)
+        await test_session.flush()
+        test_session.add(OrderItem(order_id=order.id, product_id=product.id, quantity=1, price_at_time=50.0))
+        ids.append(order.id)
+    await test_session.commit()
+    return ids
+
+
+async def _walk_cursor(client: AsyncClient, token: str, page_size: int) -> list:
+    """Follow next_cursor from the first page to the end; return all order ids."""
+    seen = []
+    params = {"mode": "cursor", "page_size": page_size}
+    while True:
+        response = await client.get("/api/v1/orders/", params=params, headers=auth_header(token))
+        assert response.status_code == 200
+        data = response.json()
+        assert "total" not in data
+        seen.extend(order["id"] for order in data["items"])
+        if not data["next_cursor"]:
+            return seen
+        params = {"cursor": data["next_cursor"], "page_size": page_size}
+
+
+@pytest.mark.asyncio
+async def test_get_orders_cursor_mode_walks_all_pages(client: AsyncClient, test_session, test_product, admin_token):
+    """Cursor mode returns every order exactly once, newest first, even with tied timestamps."""
+    from datetime import datetime
+
+    dated = await _seed_orders(test_session, test_product, 3)
+    tied = await _seed_orders(test_session, test_product, 3, created_at=datetime(2026, 2, 1))
+
+    seen = await _walk_cursor(client, admin_token, page_size=2)
+
+    assert seen == sorted(tied, reverse=True) + sorted(dated, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_get_orders_cursor_mode_farmer_view(client: AsyncClient, test_session, test_product, farmer_token):
+    """Farmers only page through orders containing their products."""
+    from app.models.product import Farmer, Product
+
+    other_farmer = Farmer(name="Other Farmer", location="Elsewhere", bio="Not ours")
+    test_session.add(other_farmer)
+    await test_session.flush()
+    other_product = Product(name="Beans", price=10.0, stock_qty=10, unit="kg", farmer_id=other_farmer.id)
+    test_session.add(other_product)
+    await test_session.commit()
+
+    mine = await _seed_orders(test_session, test_product, 3)
+    await _seed_orders(test_session, other_product, 2)
+
+    seen = await _walk_cursor(client, farmer_token, page_size=2)
+
+    assert sorted(seen) == sorted(mine)
+
+
+@pytest.mark.asyncio
+async def test_get_orders_invalid_cursor(client: AsyncClient, admin_token):
+    """A tampered cursor is rejected with 400."""
+    response = await client.get(
+        "/api/v1/orders/",
+        params={"cursor": "not-a-cursor"},
+        headers=auth_header(admin_token),
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_orders_farmer_sees_only_own_items(client: AsyncClient, test_session, test_product, farmer_token, admin_token):
+    """A farmer gets only their own lines of a shared order, and the session's Order.items is never touched."""
+    from sqlalchemy import inspect
+    from app.models.product import Farmer, Product
+    from app.models.order import Order, OrderItem
+
+    other_farmer = Farmer(name="Other Farmer", location="Elsewhere", bio="Not ours")
+    test_session.add(other_farmer)
+    await test_session.flush()
+    other_product = Product(name="Beans", price=10.0, stock_qty=10, unit="kg", farmer_id=other_farmer.id)
+    test_session.add(other_product)
+    await test_session.flush()
+
+    order = Order(
+        customer_name="Shared Cart",
+        customer_email="shared@test.com",
+        address="123 Test Street, Test City",
+        total_price=60.0,
+    )
+    test_session.add(order)
+    await test_session.flush()
+    test_session.add_all([
+        OrderItem(order_id=order.id, product_id=test_product.id, quantity=1, price_at_time=50.0),
+        OrderItem(order_id=order.id, product_id=other_product.id, quantity=1, price_at_time=10.0),
+    ])
+    await test_session.commit()
+
+    response = await client.get("/api/v1/orders/", headers=auth_header(farmer_token))
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    items = data["items"][0]["items"]
+    assert [item["product_id"] for item in items] == [test_product.id]
+    assert items[0]["product"]["name"] == "Test Tomatoes"
+    assert "items" in inspect(order).unloaded
+
+    response = await client.get("/api/v1/orders/", headers=auth_header(admin_token))
+    assert len(response.json()["items"][0]["items"]) == 2
+
+
+async def _shared_order(test_session, product, other_farmer_name: str = "Other Farmer"):
+    """An order with one line of ``product`` and one line of another farmer's product."""
+    from app.models.product import Farmer, Product
+    from app.models.order import Order, OrderItem
+
+    other_farmer = Farmer(name=other_farmer_name, location="Elsewhere", bio="Not ours")
+    test_session.add(other_farmer)
+    await test_session.flush()
+    other_product = Product(name="Beans", price=10.0, stock_qty=10, unit="kg", farmer_id=other_farmer.id)
+    test_session.add(other_product)
+    await test_session.flush()
+
+    order = Order(
+        customer_name="Shared Cart",
+        customer_email="shared@test.com",
+        address="123 Test Street, Test City",
+        total_price=60.0,
+    )
+    test_session.add(order)
+    await test_session.flush()
+    ours = OrderItem(order_id=order.id, product_id=product.id, quantity=1, price_at_time=50.0)
+    theirs = OrderItem(order_id=order.id, product_id=other_product.id, quantity=1, price_at_time=10.0)
+    test_session.add_all([ours, theirs])
+    await test_session.commit()
+    return order.id, ours.id, theirs.id
+
+
+@pytest.mark.asyncio
+async def test_bulk_harvest_reports_each_item(client: AsyncClient, test_session, test_product, test_order, farmer_token):
+    """Own items are harvested, others are reported, and a fully harvested order is packed."""
+    from sqlalchemy import select
+    from app.models.order import OrderItem
+
+    own_order_id = test_order.id
+    own_item_id = (await test_session.execute(
+        select(OrderItem.id).where(OrderItem.order_id == own_order_id)
+    )).scalar_one()
+    shared_order_id, ours_id, theirs_id = await _shared_order(test_session, test_product)
+
+    response = await client.patch(
+        "/api/v1/orders/items/harvest",
+        json={"item_ids": [own_item_id, ours_id, theirs_id, 99999, own_item_id]},
+        headers=auth_header(farmer_token),
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["results"] == [
+        {"item_id": own_item_id, "status": "harvested"},
+        {"item_id": ours_id, "status": "harvested"},
+        {"item_id": theirs_id, "status": "forbidden"},
+        {"item_id": 99999, "status": "not_found"},
+    ]
+    assert data["harvested"] == 2
+    # The shared order still has the other farmer's line to harvest
+    assert data["packed_orders"] == [own_order_id]
+
+    response = await client.patch(
+        "/api/v1/orders/items/harvest",
+        json={"item_ids": [own_item_id]},
+        headers=auth_header(farmer_token),
+    )
+    assert response.json()["results"] == [{"item_id": own_item_id, "status": "already_harvested"}]
+    assert response.json()["packed_orders"] == []
+
+    response = await client.get(
+        "/api/v1/orders/track", params={"order_id": shared_order_id, "email": "shared@test.com"}
+    )
+    assert response.json()["status"] == "pending"
+
+
+@pytest.mark.asyncio
+async def test_bulk_harvest_admin_packs_shared_order(client: AsyncClient, test_session, test_product, admin_token):
+    """Admins may harvest any item; the order is packed once every line is harvested."""
+    order_id, ours_id, theirs_id = await _shared_order(test_session, test_product)
+
+    response = await client.patch(
+        "/api/v1/orders/items/harvest",
+        json={"item_ids": [ours_id, theirs_id]},
+        headers=auth_header(admin_token),
+    )
+    assert response.status_code == 200
+    assert response.json()["packed_orders"] == [order_id]
+
+    status_counts = (await client.get("/api/v1/analytics/status", headers=auth_header(admin_token))).json()
+    assert status_counts["packed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_harvest_rejects_empty_list(client: AsyncClient, farmer_token):
+    """At least one item id is required."""
+    response = await client.patch(
+        "/api/v1/orders/items/harvest", json={"item_ids": []}, headers=auth_header(farmer_token)
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_update_order_status_rejects_invalid_transition(client: AsyncClient, test_order, admin_token):
+    """Delivered is terminal, and cancelling must go through the cancel endpoint."""
+    order_id = test_order.id
+    headers = auth_header(admin_token)
+
+    response = await client.patch(f"/api/v1/orders/{order_id}/status", params={"status": "cancelled"}, headers=headers)
+    assert response.status_code == 400
+
+    response = await client.patch(f"/api/v1/orders/{order_id}/status", params={"status": "delivered"}, headers=headers)
+    assert response.status_code == 200
+
+    response = await client.patch(f"/api/v1/orders/{order_id}/status", params={"status": "pending"}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cannot move order from delivered to pending"
+
+
+@pytest.mark.asyncio
+async def test_bulk_status_update_by_delivery_date(client: AsyncClient, test_session, test_product, admin_token):
+    """Every packed order for a delivery date is delivered; others are skipped with their status."""
+    from datetime import date
+    from sqlalchemy import update
+    from app.models.order import Order
+
+    order_ids = await _seed_orders(test_session, test_product, 4)
+    delivery = date(2026, 11, 2)
+    statuses = ["packed", "packed", "cancelled", "delivered"]
+    for order_id, status in zip(order_ids, statuses):
+        await test_session.execute(
+            update(Order).where(Order.id == order_id).values(status=status, delivery_date=delivery)
+        )
+    await test_session.commit()
+
+    response = await client.patch(
+        "/api/v1/orders/status",
+        json={"status": "delivered", "delivery_date": delivery.isoformat()},
+        headers=auth_header(admin_token),
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["updated"] == order_ids[:2]
+    assert data["skipped"] == [
+        {"order_id": order_ids[2], "status": "cancelled"},
+        {"order_id": order_ids[3], "status": "delivered"},
+    ]
+    assert data["not_found"] == []
+
+
+@pytest.mark.asyncio
+async def test_bulk_status_update_by_ids(client: AsyncClient, test_order, admin_token, farmer_token):
+    """Explicit ids report unknown orders; the endpoint is admin only and needs a selection."""
+    order_id = test_order.id
+
+    response = await client.patch(
+        "/api/v1/orders/status",
+        json={"status": "confirmed", "order_ids": [order_id, 99999]},
+        headers=auth_header(admin_token),
+    )
+    assert response.status_code == 200
+    assert response.json()["updated"] == [order_id]
+    assert response.json()["not_found"] == [99999]
+
+    response = await client.patch(
+        "/api/v1/orders/status", json={"status": "packed"}, headers=auth_header(admin_token)
+    )
+    assert response.status_code == 422
+
+    response = await client.patch(
+        "/api/v1/orders/status",
+        json={"status": "packed", "order_ids": [order_id]},
+        headers=auth_header(farmer_token),
+    )
+    assert response.status_code == 403
+
+
+async def _seed_farmer_items(test_session, product) -> list:
+    """Orders with a mix of harvested/unharvested items and delivery dates; returns item ids."""
+    from datetime import date
+    from sqlalchemy import select, update
+    from app.models.order import Order, OrderItem
+
+    order_ids = await _seed_orders(test_session, product, 6)
+    await test_session.execute(
+        update(Order).where(Order.id.in_(order_ids[:3])).values(delivery_date=date(2026, 11, 2))
+    )
+    await test_session.execute(
+        update(OrderItem).where(OrderItem.order_id.in_(order_ids[::2])).values(is_harvested=True)
+    )
+    await test_session.commit()
+    result = await test_session.execute(
+        select(OrderItem.id).where(OrderItem.order_id.in_(order_ids)).order_by(OrderItem.id)
+    )
+    return result.scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_farmer_items_keyset_pages(client: AsyncClient, test_session, test_product, farmer_token):
+    """Farmer items are paged newest first with filters applied."""
+    item_ids = await _seed_farmer_items(test_session, test_product)
+    headers = auth_header(farmer_token)
+
+    seen, cursor = [], None
+    while True:
+        params = {"page_size": 4, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/api/v1/orders/farmer-items", params=params, headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        seen.extend(item["id"] for item in data["items"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+    assert seen == sorted(item_ids, reverse=True)
+
+    response = await client.get(
+        "/api/v1/orders/farmer-items",
+        params={"harvested": "false", "delivery_date": "2026-11-02", "page_size": 10},
+        headers=headers,
+    )
+    items = response.json()["items"]
+    assert [item["id"] for item in items] == [item_ids[1]]
+    assert items[0]["product"]["name"] == "Test Tomatoes"
+    assert items[0]["order"]["delivery_date"] == "2026-11-02"
+
+
+@pytest.mark.asyncio
+async def test_farmer_items_plain_list_by_default(client: AsyncClient, test_session, test_product, farmer_token):
+    """Without page_size or cursor the endpoint keeps returning a plain list of every item."""
+    item_ids = await _seed_farmer_items(test_session, test_product)
+
+    response = await client.get("/api/v1/orders/farmer-items", headers=auth_header(farmer_token))
+    assert response.status_code == 200
+    items = response.json()
+    assert isinstance(items, list)
+    assert [item["id"] for item in items] == sorted(item_ids, reverse=True)
+    assert items[0]["product"]["unit"] == "kg"
+
+    response = await client.get(
+        "/api/v1/orders/farmer-items", params={"harvested": "true"}, headers=auth_header(farmer_token)
+    )
+    assert [item["id"] for item in response.json()] == item_ids[::2][::-1]
+
+
+@pytest.mark.asyncio
+async def test_farmer_items_ndjson_stream(client: AsyncClient, test_session, test_product, farmer_token, admin_token):
+    """format=ndjson streams one JSON object per line; only farmers may list items."""
+    import json
+
+    item_ids = await _seed_farmer_items(test_session, test_product)
+    response = await client.get(
+        "/api/v1/orders/farmer-items",
+        params={"format": "ndjson", "status": "pending"},
+        headers=auth_header(farmer_token),
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == sorted(item_ids, reverse=True)
+    assert lines[0]["order"]["status"] == "pending"
+
+    response = await client.get("/api/v1/orders/farmer-items", headers=auth_header(admin_token))
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_pick_list_sums_open_items(client: AsyncClient, test_session, test_farmer, test_product, farmer_token):
+    """Only unharvested items of open orders in the date range are summed, per product."""
+    from datetime import date
+    from sqlalchemy import update
+    from app.models.order import Order, OrderItem
+    from app.models.product import Product
+
+    carrots = Product(name="Carrots", price=20.0, stock_qty=50, unit="kg", farmer_id=test_farmer.id)
+    test_session.add(carrots)
+    await test_session.commit()
+    carrots_id = carrots.id
+
+    order_ids = await _seed_orders(test_session, test_product, 5)
+    test_session.add(OrderItem(order_id=order_ids[0], product_id=carrots_id, quantity=3, price_at_time=20.0))
+    day = date(2026, 11, 2)
+    await test_session.execute(update(Order).where(Order.id.in_(order_ids[:4])).values(delivery_date=day))
+    await test_session.execute(update(Order).where(Order.id == order_ids[2]).values(status="cancelled"))
+    await test_session.execute(
+        update(OrderItem).where(OrderItem.order_id == order_ids[3]).values(is_harvested=True)
+    )
+    await test_session.commit()
+
+    response = await client.get(
+        "/api/v1/orders/pick-list", params={"delivery_date": "2026-11-02"}, headers=auth_header(farmer_token)
+    )
+    assert response.status_code == 200
+    assert response.json()["items"] == [
+        {"product_id": carrots_id, "name": "Carrots", "unit": "kg", "quantity": 3, "order_count": 1},
+        {"product_id": test_product.id, "name": "Test Tomatoes", "unit": "kg", "quantity": 2, "order_count": 2},
+    ]
+
+    # No date: every open order, including the undated one
+    response = await client.get("/api/v1/orders/pick-list", headers=auth_header(farmer_token))
+    assert response.json()["items"][1]["quantity"] == 3
+
+    response = await client.get(
+        "/api/v1/orders/pick-list",
+        params={"start_date": "2026-11-01", "end_date": "2026-11-03", "format": "csv"},
+        headers=auth_header(farmer_token),
+    )
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "2026-11-01-to-2026-11-03" in response.headers["content-disposition"]
+    lines = response.text.splitlines()
+    assert lines[0] == "product_id,name,unit,quantity,order_count"
+    assert lines[2] == f"{test_product.id},Test Tomatoes,kg,2,2"
+
+
+@pytest.mark.asyncio
+async def test_pick_list_uses_unharvested_index(test_session, test_product):
+    """The pick-list predicate matches the partial unharvested-items index."""
+    from datetime import date
+    from sqlalchemy import text, update
+    from app.api.v1.endpoints.orders import pick_list_query
+    from app.models.order import OrderItem
+
+    # Most items are already harvested, as on a live store
+    order_ids = await _seed_orders(test_session, test_product, 30)
+    await test_session.execute(
+        update(OrderItem).where(OrderItem.order_id.in_(order_ids[:27])).values(is_harvested=True)
+    )
+    await test_session.execute(text("ANALYZE"))
+    await test_session.commit()
+
+    for start_date, end_date in [(None, None), (date(2026, 11, 1), date(2026, 11, 3))]:
+        query = pick_list_query(test_product.farmer_id, start_date, end_date)
+        compiled = query.compile(test_session.bind, compile_kwargs={"literal_binds": True})
+        rows = (await test_session.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))).all()
+        assert "ix_order_items_unharvested" in " | ".join(row[-1] for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_pick_list_admin_needs_farmer(client: AsyncClient, test_farmer, admin_token):
+    """Admins must say whose pick list they want."""
+    farmer_id = test_farmer.id
+    response = await client.get("/api/v1/orders/pick-list", headers=auth_header(admin_token))
+    assert response.status_code == 400
+
+    response = await client.get(
+        "/api/v1/orders/pick-list", params={"farmer_id": farmer_id}, headers=auth_header(admin_token)
+    )
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+
+
+@pytest.mark.asyncio
+async def test_delivery_manifest_cached_until_order_changes(client: AsyncClient, test_session, test_product, admin_token):
+    """The manifest lists deliverable orders for the date and is cached until one of them changes."""
+    from datetime import date
+    from sqlalchemy import update
+    from app.models.order import Order, OrderItem
+
+    order_ids = await _seed_orders(test_session, test_product, 4)
+    day = date(2026, 11, 2)
+    await test_session.execute(update(Order).where(Order.id.in_(order_ids[:3])).values(delivery_date=day))
+    await test_session.execute(update(Order).where(Order.id == order_ids[2]).values(status="cancelled"))
+    test_session.add(OrderItem(order_id=order_ids[0], product_id=test_product.id, quantity=4, price_at_time=50.0))
+    await test_session.commit()
+    headers = auth_header(admin_token)
+
+    response = await client.get("/api/v1/orders/manifest", params={"delivery_date": "2026-11-02"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["x-cache"] == "MISS"
+    manifest = response.json()
+    assert manifest["delivery_date"] == "2026-11-02"
+    assert [o["order_id"] for o in manifest["orders"]] == order_ids[:2]
+    first = manifest["orders"][0]
+    assert (first["item_count"], first["total_quantity"], first["harvested_count"], first["packed"]) == (2, 5, 0, False)
+
+    response = await client.get("/api/v1/orders/manifest", params={"delivery_date": "2026-11-02"}, headers=headers)
+    assert response.headers["x-cache"] == "HIT"
+    assert response.json() == manifest
+
+    response = await client.patch(
+        "/api/v1/orders/status", json={"status": "packed", "order_ids": [order_ids[1]]}, headers=headers
+    )
+    assert response.json()["updated"] == [order_ids[1]]
+
+    response = await client.get("/api/v1/orders/manifest", params={"delivery_date": "2026-11-02"}, headers=headers)
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["orders"][1]["packed"] is True
+
+    # Bulk harvest only knows item ids; the dates are looked up
+    from sqlalchemy import select
+    item_id = (await test_session.execute(
+        select(OrderItem.id).where(OrderItem.order_id == order_ids[0]).order_by(OrderItem.id).limit(1)
+    )).scalar_one()
+    await client.patch("/api/v1/orders/items/harvest", json={"item_ids": [item_id]}, headers=headers)
+    response = await client.get("/api/v1/orders/manifest", params={"delivery_date": "2026-11-02"}, headers=headers)
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["orders"][0]["harvested_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_delivery_manifest_admin_only(client: AsyncClient, farmer_token):
+    response = await client.get(
+        "/api/v1/orders/manifest", params={"delivery_date": "2026-11-02"}, headers=auth_header(farmer_token)
+    )
+    assert response.status_code == 403
@@ -0,0 +1,137 @@
+"""
+Tests for the transactional outbox and webhook dispatcher (app/utils/outbox.py).
+"""
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.models.order import OrderItem
+from app.models.outbox import OutboxEvent
+from app.utils.outbox import dispatch_batch, retry_delay
+from tests.conftest import auth_header
+from tests.webhook_stub import WebhookStub
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    """A running webhook stand-in configured as the 'pos' sink."""
+    with WebhookStub() as stub:
+        monkeypatch.setattr(settings, "WEBHOOK_SINKS", f"pos={stub.url}")
+        yield stub
+
+
+def _order_payload(product_id: int, quantity: int = 2) -> dict:
+    return {
+        "customer_name": "Outbox Customer",
+        "customer_email": "outbox@test.com",
+        "address": "123 Test Street, Test City",
+        "total_price": 50.0 * quantity,
+        "items": [{"product_id": product_id, "quantity": quantity, "price": 50.0}],
+    }
+
+
+async def _events(session) -> list:
+    result = await session.execute(select(OutboxEvent).order_by(OutboxEvent.id))
+    events = result.scalars().all()
+    for event in events:
+        await session.refresh(event)
+    return events
+
+
+@pytest.mark.asyncio
+async def test_order_events_written_with_the_order(client: AsyncClient, test_session, test_product, monkeypatch):
+    """Placing an order writes one event per sink; a rejected order writes none."""
+    monkeypatch.setattr(settings, "WEBHOOK_SINKS", "pos=http://pos.invalid/hooks, notify=http://notify.invalid/")
+    product_id = test_product.id
+
+    response = await client.post("/api/v1/orders/", json=_order_payload(product_id, 1000))
+    assert response.status_code == 400
+    assert await _events(test_session) == []
+
+    response = await client.post("/api/v1/orders/", json=_order_payload(product_id))
+    assert response.status_code == 200
+    events = await _events(test_session)
+    assert [(e.sink, e.event_type, e.status) for e in events] == [
+        ("pos", "order.created", "pending"),
+        ("notify", "order.created", "pending"),
+    ]
+    assert events[0].event_id == events[1].event_id
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_delivers_and_records_state(client: AsyncClient, test_session, test_product, admin_token, sink, monkeypatch):
+    """Due events are POSTed to the sink with their id, type and signature, then marked delivered."""
+    monkeypatch.setattr(settings, "WEBHOOK_SECRET", "shh")
+    response = await client.post("/api/v1/orders/", json=_order_payload(test_product.id))
+    order_id = response.json()["order_id"]
+    await client.patch(f"/api/v1/orders/{order_id}/cancel", headers=auth_header(admin_token))
+
+    async with httpx.AsyncClient() as http:
+        assert await dispatch_batch(test_session, http) == 2
+        assert await dispatch_batch(test_session, http) == 0
+
+    assert [r["body"]["type"] for r in sink.received] == ["order.created", "order.cancelled"]
+    created = sink.received[0]
+    assert created["body"]["data"]["order_id"] == order_id
+    assert created["body"]["data"]["items"][0]["farmer_id"] == test_product.farmer_id
+    assert created["headers"]["X-Event-Type"] == "order.created"
+    assert created["headers"]["X-Signature"].startswith("sha256=")
+    assert sink.received[1]["body"]["data"]["previous_status"] == "pending"
+
+    events = await _events(test_session)
+    assert all(e.status == "delivered" and e.attempts == 1 and e.delivered_at for e in events)
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_backs_off_and_gives_up(client: AsyncClient, test_session, test_product, test_order, farmer_token, sink, monkeypatch):
+    """A failing sink is retried after a backoff and marked failed after the last attempt."""
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 3)
+    item_id = (await test_session.execute(
+        select(OrderItem.id).where(OrderItem.order_id == test_order.id)
+    )).scalar_one()
+    await client.patch(f"/api/v1/orders/items/{item_id}/harvest", headers=auth_header(farmer_token))
+
+    sink.fail_next(3)
+    async with httpx.AsyncClient() as http:
+        for attempt in (1, 2, 3):
+            assert await dispatch_batch(test_session, http) == 1
+            (event,) = await _events(test_session)
+            assert event.attempts == attempt
+            assert event.last_error == "HTTP 503"
+            # Not due again until the backoff passes
+            assert event.next_attempt_at > datetime.utcnow() + retry_delay(attempt) - timedelta(seconds=5)
+            assert await dispatch_batch(test_session, http) == 0
+            await test_session.execute(
+                update(OutboxEvent).values(next_attempt_at=datetime.utcnow() - timedelta(seconds=1))
+            )
+            await test_session.commit()
+
+    assert event.status == "failed"
+    assert sink.received == []
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_retries_until_sink_recovers(client: AsyncClient, test_session, test_product, sink):
+    """One failure is followed by a successful redelivery of the same event."""
+    await client.post("/api/v1/orders/", json=_order_payload(test_product.id))
+    sink.fail_next(1, status=500)
+
+    async with httpx.AsyncClient() as http:
+        await dispatch_batch(test_session, http)
+        await test_session.execute(update(OutboxEvent).values(next_attempt_at=datetime.utcnow()))
+        await test_session.commit()
+        await dispatch_batch(test_session, http)
+
+    (event,) = await _events(test_session)
+    assert (event.status, event.attempts, event.last_error) == ("delivered", 2, None)
+    assert sink.received[0]["headers"]["X-Event-Id"] == event.event_id
+
+
+def test_retry_delay_is_exponential_and_capped(monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_RETRY_BASE_SECONDS", 5)
+    monkeypatch.setattr(settings, "OUTBOX_RETRY_MAX_SECONDS", 60)
+    assert [retry_delay(n).total_seconds() for n in (1, 2, 3, 4, 5)] == [5, 10, 20, 40, 60]
@@ -0,0 +1,121 @@
+"""
+Tests for bulk product import (app/utils/product_import.py, POST /api/v1/products/import).
+"""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.product import Product, Farmer
+from tests.conftest import auth_header
+
+
+async def _import(client: AsyncClient, token: str, content: str, filename: str, **params):
+    return await client.post(
+        "/api/v1/products/import",
+        params=params,
+        files={"file": (filename, content.encode(), "application/octet-stream")},
+        headers=auth_header(token),
+    )
+
+
+async def _catalog(session) -> dict:
+    """name -> (price, stock_qty, farmer_id), read from the table rather than the identity map."""
+    result = await session.execute(select(Product.name, Product.price, Product.stock_qty, Product.farmer_id))
+    return {row.name: (row.price, row.stock_qty, row.farmer_id) for row in result}
+
+
+@pytest.mark.asyncio
+async def test_farmer_csv_import(client: AsyncClient, test_session, test_product, farmer_token):
+    """Farmers import their own rows; new names insert, known names update, bad rows are reported."""
+    other = Farmer(name="Other Farmer", location="Other Location")
+    test_session.add(other)
+    await test_session.commit()
+
+    content = (
+        "name,price,unit,stock_qty,is_organic,farmer_id\n"
+        "Okra,30,kg,12,,\n"
+        "Test Tomatoes,55.5,kg,80,true,\n"
+        "Mango,-4,kg,10,,\n"
+        f"Rice,60,kg,5,,{other.id}\n"
+    )
+    response = await _import(client, farmer_token, content, "harvest.csv")
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert (report["format"], report["rows"], report["inserted"], report["updated"], report["failed"]) == (
+        "csv", 4, 1, 1, 2,
+    )
+    assert [error["line"] for error in report["errors"]] == [4, 5]
+    assert report["errors"][0]["errors"][0].startswith("price:")
+    assert "own products" in report["errors"][1]["errors"][0]
+
+    catalog = await _catalog(test_session)
+    assert catalog["Okra"] == (30.0, 12.0, test_product.farmer_id)
+    assert catalog["Test Tomatoes"] == (55.5, 80.0, test_product.farmer_id)
+    assert "Mango" not in catalog and "Rice" not in catalog
+
+
+@pytest.mark.asyncio
+async def test_admin_ndjson_import_across_batches(
+    client: AsyncClient, test_session, test_product, admin_token, monkeypatch
+):
+    """Rows are checked per batch; a name repeated in a later batch updates instead of duplicating."""
+    monkeypatch.setattr(settings, "PRODUCT_IMPORT_BATCH_SIZE", 2)
+    farmer_id = test_product.farmer_id
+    content = "\n".join([
+        f'{{"name": "Spinach", "price": 20, "unit": "bunch", "stock_qty": 40, "farmer_id": {farmer_id}}}',
+        f'{{"id": {test_product.id}, "name": "Test Tomatoes", "price": 45, "unit": "kg", "stock_qty": 7, "farmer_id": {farmer_id}}}',
+        "{not json",
+        '{"name": "Ghee", "price": 600, "unit": "kg", "stock_qty": 3, "farmer_id": 9999}',
+        "",
+        f'{{"name": "Spinach", "price": 25, "unit": "bunch", "stock_qty": 35, "farmer_id": {farmer_id}}}',
+        f'{{"id": 9999, "name": "Ghost", "price": 1, "unit": "kg", "stock_qty": 1, "farmer_id": {farmer_id}}}',
+        '["a list"]',
+    ])
+    response = await _import(client, admin_token, content, "catalog.ndjson")
+    report = response.json()
+    assert (report["rows"], report["inserted"], report["updated"], report["failed"]) == (7, 1, 2, 4)
+    assert [(error["line"], error["errors"][0]) for error in report["errors"]] == [
+        (3, "Invalid JSON"),
+        (4, "farmer_id: Farmer not found"),
+        (7, "id: Product not found"),
+        (8, "Expected a JSON object"),
+    ]
+
+    result = await test_session.execute(select(Product.price).where(Product.name == "Spinach"))
+    assert result.scalars().all() == [25.0]
+    assert (await _catalog(test_session))["Test Tomatoes"] == (45.0, 7.0, farmer_id)
+
+
+@pytest.mark.asyncio
+async def test_import_dry_run_and_limits(client: AsyncClient, test_session, test_product, admin_token, monkeypatch):
+    """Dry runs save nothing; unknown formats, oversized files and other farmers' products are refused."""
+    content = f"name,price,unit,stock_qty,farmer_id\nOkra,30,kg,12,{test_product.farmer_id}\n"
+    response = await _import(client, admin_token, content, "okra.csv", dry_run="true")
+    assert (response.json()["inserted"], response.json()["dry_run"]) == (1, True)
+    assert "Okra" not in await _catalog(test_session)
+
+    response = await _import(client, admin_token, content, "okra.txt")
+    assert response.status_code == 400
+    response = await _import(client, admin_token, content, "okra.txt", format="csv")
+    assert response.json()["inserted"] == 1
+
+    monkeypatch.setattr(settings, "PRODUCT_IMPORT_MAX_ROWS", 1)
+    response = await _import(client, admin_token, content + "Beans,20,kg,5,1\n", "more.csv")
+    assert response.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_farmer_cannot_import_over_other_products(client: AsyncClient, test_session, farmer_token):
+    """An ``id`` naming another farmer's product is rejected."""
+    other = Farmer(name="Other Farmer", location="Other Location")
+    test_session.add(other)
+    await test_session.flush()
+    theirs = Product(name="Their Beans", price=10.0, stock_qty=5, unit="kg", farmer_id=other.id)
+    test_session.add(theirs)
+    await test_session.commit()
+
+    content = f'{{"id": {theirs.id}, "name": "Mine Now", "price": 1, "unit": "kg", "stock_qty": 1}}\n'
+    response = await _import(client, farmer_token, content, "steal.jsonl")
+    assert response.json()["errors"] == [{"line": 1, "errors": ["id: Not authorized to update this product"]}]
+    assert (await _catalog(test_session))["Their Beans"] == (10.0, 5.0, other.id)
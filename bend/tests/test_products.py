@@ -3,6 +3,12 @@ Tests for product endpoints.
 """
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import text
+
+from app.models.product import Product, Farmer
+from app.schemas.enums import ProductSort
+from app.utils.catalog import CatalogFilters
+from app.utils.response_cache import ResponseCache
 
 
 @pytest.mark.asyncio
@@ -90,3 +96,130 @@ async def test_update_stock_not_found(client: AsyncClient, admin_token):
     )
 
     assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_public_products_cached_until_catalog_changes(client: AsyncClient, test_product, admin_token):
+    """Repeat requests are served from the cache; stock updates and orders invalidate it."""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    first = await client.get("/api/v1/products/public")
+    second = await client.get("/api/v1/products/public")
+    assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("MISS", "HIT")
+    assert second.content == first.content
+
+    # Different query parameters are cached separately
+    response = await client.get("/api/v1/products/public", params={"page_size": 5})
+    assert response.headers["X-Cache"] == "MISS"
+
+    await client.patch(f"/api/v1/products/{test_product.id}/stock", params={"qty": 7}, headers=headers)
+    response = await client.get("/api/v1/products/public")
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json()["items"][0]["stock_qty"] == 7
+
+    response = await client.post("/api/v1/orders/", json={
+        "customer_name": "Cache Customer",
+        "customer_email": "cache@test.com",
+        "address": "123 Test Street, Test City",
+        "total_price": 100.0,
+        "items": [{"product_id": test_product.id, "quantity": 2, "price": 50.0}],
+    })
+    assert response.status_code == 200
+    response = await client.get("/api/v1/products/public")
+    assert response.headers["X-Cache"] == "MISS"
+
+    response = await client.get("/api/v1/products/public/cache-stats", headers=headers)
+    stats = response.json()
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (1, 4, 2)
+
+
+def test_response_cache_lru_and_generation():
+    """The least recently used page is evicted; a page rendered across an invalidation is not stored."""
+    cache = ResponseCache(ttl_seconds=60, max_entries=2)
+    cache.set("a", b"A", cache.generation)
+    cache.set("b", b"B", cache.generation)
+    assert cache.get("a") == b"A"
+    cache.set("c", b"C", cache.generation)
+    assert cache.get("b") is None
+    assert cache.get("a") == b"A"
+
+    generation = cache.generation
+    cache.invalidate()
+    cache.set("a", b"stale", generation)
+    assert cache.get("a") is None
+
+
+async def _seed_filter_catalog(session, farmer_id: int) -> dict:
+    other = Farmer(name="Other Farmer", location="Other Location", bio="Other bio")
+    session.add(other)
+    await session.flush()
+    products = {
+        "cheap": Product(name="Okra", price=20.0, stock_qty=5, unit="kg", farmer_id=farmer_id),
+        "sold_out": Product(name="Mango", price=90.0, stock_qty=0, unit="kg", farmer_id=farmer_id),
+        "regular": Product(name="Rice", price=60.0, stock_qty=8, unit="kg", is_organic=False, farmer_id=other.id),
+        "dear": Product(name="Saffron", price=400.0, stock_qty=1, unit="g", farmer_id=other.id),
+    }
+    session.add_all(products.values())
+    await session.commit()
+    ids = {key: product.id for key, product in products.items()}
+    ids["other_farmer"] = other.id
+    return ids
+
+
+def _filters(**values) -> CatalogFilters:
+    defaults = {"in_stock": False, "organic": None, "min_price": None, "max_price": None,
+                "farmer_id": None, "sort": ProductSort.NEWEST}
+    return CatalogFilters(**{**defaults, **values})
+
+
+@pytest.mark.asyncio
+async def test_public_products_filters_and_sorts(client: AsyncClient, test_session, test_farmer):
+    """Stock, organic, price and farmer filters combine; price sorts are stable."""
+    ids = await _seed_filter_catalog(test_session, test_farmer.id)
+
+    async def listed(**params):
+        response = await client.get("/api/v1/products/public", params=params)
+        assert response.status_code == 200, response.text
+        return [item["id"] for item in response.json()["items"]]
+
+    assert await listed(in_stock="true", sort="price_asc") == [ids["cheap"], ids["regular"], ids["dear"]]
+    assert await listed(sort="price_desc", max_price=100) == [ids["sold_out"], ids["regular"], ids["cheap"]]
+    assert await listed(organic="false") == [ids["regular"]]
+    assert await listed(farmer_id=ids["other_farmer"], min_price=100) == [ids["dear"]]
+
+    response = await client.get("/api/v1/products/public", params={"in_stock": "true", "organic": "true"})
+    assert response.json()["total"] == 2
+
+    response = await client.get("/api/v1/products/public", params={"min_price": 50, "max_price": 10})
+    assert response.status_code == 422
+    response = await client.get("/api/v1/products/public", params={"sort": "cheapest"})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_products_filters_scoped_to_farmer(client: AsyncClient, test_session, test_farmer, farmer_token):
+    """Farmers filter within their own products and cannot list another farmer's."""
+    ids = await _seed_filter_catalog(test_session, test_farmer.id)
+    headers = {"Authorization": f"Bearer {farmer_token}"}
+
+    response = await client.get("/api/v1/products/", params={"in_stock": "true"}, headers=headers)
+    assert [item["id"] for item in response.json()["items"]] == [ids["cheap"]]
+
+    response = await client.get("/api/v1/products/", params={"farmer_id": ids["other_farmer"]}, headers=headers)
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_catalog_filters_use_indexes(test_session):
+    """In-stock and price queries are planned on the partial and composite indexes."""
+    async def plan(filters: CatalogFilters) -> str:
+        query = filters.page_query(offset=0, limit=20)
+        compiled = query.compile(test_session.bind, compile_kwargs={"literal_binds": True})
+        rows = (await test_session.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))).all()
+        return " | ".join(row[-1] for row in rows)
+
+    assert "ix_products_in_stock " in await plan(_filters(in_stock=True)) + " "
+    in_stock_by_price = await plan(_filters(in_stock=True, sort=ProductSort.PRICE_ASC))
+    assert "ix_products_in_stock_price" in in_stock_by_price
+    assert "TEMP B-TREE" not in in_stock_by_price
+    assert "ix_products_price_id" in await plan(_filters(min_price=10, sort=ProductSort.PRICE_DESC))
+    assert "ix_products_farmer_id_id" in await plan(_filters(farmer_id=1))
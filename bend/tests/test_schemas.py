@@ -1,9 +1,13 @@
 """
-Unit tests for Pydantic schemas — OrderCreate, OrderItemCreate, OrderStatus enum.
+Unit tests for Pydantic schemas — OrderCreate, OrderItemCreate, OrderStatus enum,
+and the response models declared on routes.
 """
 import pytest
+from fastapi.routing import APIRoute
 from pydantic import ValidationError
 
+from app.main import app
+
 from app.schemas.order import OrderCreate, OrderItemCreate
 from app.schemas.enums import OrderStatus
 
@@ -100,3 +104,18 @@ def test_order_status_enum_values():
     expected = {"pending", "confirmed", "packed", "delivered", "cancelled"}
     actual = {s.value for s in OrderStatus}
     assert actual == expected
+
+
+# ─── Response models ──────────────────────────────────────
+
+# Health checks, and routes that return a streamed or pre-rendered Response
+RAW_RESPONSE_ROUTES = {"/", "/health", "/api/v1/orders/manifest", "/api/v1/orders/track/stream"}
+
+
+def test_api_routes_declare_response_models():
+    """Every JSON endpoint serializes through an explicit response model."""
+    missing = [
+        route.path for route in app.routes
+        if isinstance(route, APIRoute) and route.response_model is None and route.path not in RAW_RESPONSE_ROUTES
+    ]
+    assert missing == []
@@ -0,0 +1,139 @@
+"""
+Tests for product search (app/utils/search.py, GET /api/v1/products/search).
+
+The SQLite tests cover the LIKE fallback. Set TEST_POSTGRES_URL to also run
+the full-text and trigram search against a local Postgres.
+"""
+import os
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from app.models.product import Product, Farmer
+from app.utils import search as search_module
+from app.utils.search import search_terms
+
+
+async def _seed_catalog(session) -> dict:
+    ramesh = Farmer(name="Ramesh Gowda", location="Mandya Valley", bio="Paddy and sugarcane")
+    lakshmi = Farmer(name="Lakshmi Devi", location="Ooty Hills", bio="Heirloom tomatoes and carrots")
+    session.add_all([ramesh, lakshmi])
+    await session.flush()
+    products = {
+        "cherry": Product(name="Cherry Tomatoes", price=80.0, stock_qty=10, unit="kg", farmer_id=ramesh.id),
+        "tomatoes": Product(name="Tomatoes", price=40.0, stock_qty=10, unit="kg", farmer_id=ramesh.id),
+        "carrots": Product(name="Ooty Carrots", price=60.0, stock_qty=10, unit="kg", farmer_id=lakshmi.id),
+        "beans": Product(name="Green Beans", price=50.0, stock_qty=10, unit="kg", farmer_id=lakshmi.id),
+    }
+    session.add_all(products.values())
+    await session.commit()
+    return {key: product.id for key, product in products.items()}
+
+
+def test_search_terms():
+    assert search_terms("  Cherry-TOMATO's!! ") == ["cherry", "tomato", "s"]
+    assert search_terms("%_%") == []
+
+
+@pytest.mark.asyncio
+async def test_search_prefix_matches_ranked(client: AsyncClient, test_session):
+    """A prefix finds matching names; name matches outrank farmer-only matches."""
+    ids = await _seed_catalog(test_session)
+
+    response = await client.get("/api/v1/products/search", params={"q": "tom"})
+    assert response.status_code == 200
+    data = response.json()
+    # Lakshmi's bio mentions tomatoes, so her products match with a lower rank
+    assert [item["id"] for item in data["items"]] == [ids["tomatoes"], ids["cherry"], ids["beans"], ids["carrots"]]
+    ranks = [item["rank"] for item in data["items"]]
+    assert ranks[0] > ranks[1] > ranks[2] == ranks[3]
+    assert data["items"][0]["farmer"]["name"] == "Ramesh Gowda"
+    assert data["total"] == 4
+
+
+@pytest.mark.asyncio
+async def test_search_farmer_fields_and_all_terms(client: AsyncClient, test_session):
+    """Farmer name, location and bio are searched; every term must match."""
+    ids = await _seed_catalog(test_session)
+
+    response = await client.get("/api/v1/products/search", params={"q": "ooty"})
+    found = [item["id"] for item in response.json()["items"]]
+    # The product named "Ooty ..." outranks one that only matches the farmer's location
+    assert found == [ids["carrots"], ids["beans"]]
+
+    response = await client.get("/api/v1/products/search", params={"q": "heirloom beans"})
+    assert [item["id"] for item in response.json()["items"]] == [ids["beans"]]
+
+    response = await client.get("/api/v1/products/search", params={"q": "ramesh carrots"})
+    assert response.json()["items"] == []
+
+    # Terms may match the product and its farmer separately
+    response = await client.get("/api/v1/products/search", params={"q": "beans lakshmi"})
+    assert [item["id"] for item in response.json()["items"]] == [ids["beans"]]
+
+
+@pytest.mark.asyncio
+async def test_search_pagination(client: AsyncClient, test_session):
+    """Results page like the catalog, and blank queries return nothing."""
+    await _seed_catalog(test_session)
+
+    response = await client.get("/api/v1/products/search", params={"q": "o", "page": 2, "page_size": 3})
+    data = response.json()
+    assert (data["total"], data["total_pages"], len(data["items"])) == (4, 2, 1)
+
+    response = await client.get(
+        "/api/v1/products/search", params={"q": "o", "page_size": 3, "include_total": "false"}
+    )
+    assert response.json()["total"] is None
+
+    response = await client.get("/api/v1/products/search", params={"q": "?!"})
+    assert response.json()["items"] == []
+    response = await client.get("/api/v1/products/search", params={"q": ""})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+async def test_postgres_full_text_and_typo_search(postgres_env, monkeypatch):
+    """On Postgres prefixes use the full-text index and misspellings match by trigrams."""
+    client, session_maker = postgres_env
+    monkeypatch.setattr(search_module, "_trigram_available", None)
+    async with session_maker() as session:
+        await session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        ids = await _seed_catalog(session)
+
+    response = await client.get("/api/v1/products/search", params={"q": "tom"})
+    found = [item["id"] for item in response.json()["items"]]
+    assert set(found[:2]) == {ids["tomatoes"], ids["cherry"]}
+    assert set(found[2:]) == {ids["carrots"], ids["beans"]}
+
+    response = await client.get("/api/v1/products/search", params={"q": "tomatos"})
+    assert ids["tomatoes"] in [item["id"] for item in response.json()["items"]]
+
+    response = await client.get("/api/v1/products/search", params={"q": "mandya"})
+    assert {item["id"] for item in response.json()["items"]} == {ids["tomatoes"], ids["cherry"]}
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+async def test_postgres_terms_match_product_or_farmer(postgres_env, monkeypatch):
+    """On Postgres, as on SQLite, each term may match the product or its farmer."""
+    client, session_maker = postgres_env
+    monkeypatch.setattr(search_module, "_trigram_available", None)
+    async with session_maker() as session:
+        ids = await _seed_catalog(session)
+
+    response = await client.get("/api/v1/products/search", params={"q": "beans lakshmi"})
+    assert [item["id"] for item in response.json()["items"]] == [ids["beans"]]
+
+    response = await client.get("/api/v1/products/search", params={"q": "tom ramesh"})
+    found = [item["id"] for item in response.json()["items"]]
+    assert set(found) == {ids["tomatoes"], ids["cherry"]}
+
+    # Lakshmi's text holds every term; the product named "Ooty Carrots" ranks first
+    response = await client.get("/api/v1/products/search", params={"q": "heirloom ooty carrots"})
+    assert [item["id"] for item in response.json()["items"]] == [ids["carrots"], ids["beans"]]
+
+    response = await client.get("/api/v1/products/search", params={"q": "ramesh carrots"})
+    assert response.json()["items"] == []
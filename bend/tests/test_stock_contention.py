@@ -0,0 +1,404 @@
+"""
+Concurrency tests for stock reservation in POST /api/v1/orders/, cart
+holds in POST /api/v1/cart/holds and the stock restore in
+PATCH /api/v1/orders/{id}/cancel.
+
+These use a file-backed SQLite database with one session per request so
+checkouts really do run concurrently on separate connections. SQLite
+serializes writers on its database lock, so set TEST_POSTGRES_URL to also
+run the interleaved-session tests against a local Postgres, where
+concurrent reservations contend on row locks.
+"""
+import asyncio
+import os
+import random
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.main import app
+from app.core.database import get_db, Base
+from app.core.security import create_access_token, get_password_hash
+from app.models.product import Product, Farmer
+from app.models.hold import StockHold
+from app.models.order import Order, OrderItem
+from app.models.user import User
+from app.schemas.order import OrderItemCreate
+from app.utils.holds import place_holds
+from app.utils.stock import reserve_stock, StockReservationError
+from tests.conftest import auth_header
+
+INITIAL_STOCK = 60
+CONCURRENT_ORDERS = 200
+
+
+@pytest_asyncio.fixture
+async def concurrent_env(tmp_path):
+    """App client whose requests each get their own session and connection."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'contention.db'}",
+        connect_args={"timeout": 60},
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac, session_maker
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_orders_never_oversell(concurrent_env):
+    """Hundreds of simultaneous checkouts of one product never drive stock negative."""
+    client, session_maker = concurrent_env
+
+    async with session_maker() as session:
+        farmer = Farmer(name="Mango Farmer", location="Ratnagiri Coast", bio="Alphonso grower")
+        session.add(farmer)
+        await session.flush()
+        mangoes = Product(name="Mangoes", price=100.0, stock_qty=INITIAL_STOCK, unit="crate", farmer_id=farmer.id)
+        session.add(mangoes)
+        await session.commit()
+        product_id = mangoes.id
+
+    rng = random.Random(42)
+    quantities = [rng.randint(1, 3) for _ in range(CONCURRENT_ORDERS)]
+
+    async def checkout(index: int, quantity: int):
+        return quantity, await client.post("/api/v1/orders/", json={
+            "customer_name": f"Customer {index}",
+            "customer_email": f"customer{index}@test.com",
+            "address": "1 Harvest Lane, Test City",
+            "total_price": 100.0 * quantity,
+            "items": [{"product_id": product_id, "quantity": quantity, "price": 100.0}],
+        })
+
+    results = await asyncio.gather(*(checkout(i, q) for i, q in enumerate(quantities)))
+
+    succeeded = [(q, r) for q, r in results if r.status_code == 200]
+    rejected = [(q, r) for q, r in results if r.status_code != 200]
+    assert succeeded
+    assert all(r.status_code == 400 for _, r in rejected)
+    assert all(r.json()["failures"][0]["reason"] == "insufficient_stock" for _, r in rejected)
+
+    sold = sum(q for q, _ in succeeded)
+    async with session_maker() as session:
+        stock = (await session.execute(select(Product.stock_qty).where(Product.id == product_id))).scalar_one()
+        order_count = (await session.execute(select(func.count()).select_from(Order))).scalar_one()
+        item_qty = (await session.execute(select(func.sum(OrderItem.quantity)))).scalar_one()
+
+    assert stock >= 0
+    assert stock == INITIAL_STOCK - sold
+    assert order_count == len(succeeded)
+    assert item_qty == sold
+    # Every rejected order must have been unfillable at the final stock level
+    assert all(q > stock for q, _ in rejected)
+
+
+@pytest.mark.asyncio
+async def test_partial_failure_reports_each_line(concurrent_env):
+    """A cart with several short lines reports every one and reserves nothing."""
+    client, session_maker = concurrent_env
+
+    async with session_maker() as session:
+        farmer = Farmer(name="Leafy Farmer", location="Nilgiri Hills", bio="Greens")
+        session.add(farmer)
+        await session.flush()
+        spinach = Product(name="Spinach", price=30.0, stock_qty=5, unit="bunch", farmer_id=farmer.id)
+        kale = Product(name="Kale", price=40.0, stock_qty=1, unit="bunch", farmer_id=farmer.id)
+        okra = Product(name="Okra", price=25.0, stock_qty=50, unit="kg", farmer_id=farmer.id)
+        session.add_all([spinach, kale, okra])
+        await session.commit()
+
+    response = await client.post("/api/v1/orders/", json={
+        "customer_name": "Greedy Customer",
+        "customer_email": "greedy@test.com",
+        "address": "1 Harvest Lane, Test City",
+        "total_price": 500.0,
+        "items": [
+            {"product_id": okra.id, "quantity": 2, "price": 25.0},
+            {"product_id": spinach.id, "quantity": 6, "price": 30.0},
+            {"product_id": kale.id, "quantity": 2, "price": 40.0},
+        ],
+    })
+
+    assert response.status_code == 400
+    body = response.json()
+    assert body["detail"] == "Only 5.0 bunch of Spinach left!"
+    assert [f["product_id"] for f in body["failures"]] == [spinach.id, kale.id]
+    assert body["failures"][1]["available"] == 1
+
+    async with session_maker() as session:
+        okra_stock = (await session.execute(select(Product.stock_qty).where(Product.id == okra.id))).scalar_one()
+    assert okra_stock == 50
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_with_idempotency_key(concurrent_env):
+    """Simultaneous retries with one Idempotency-Key create a single order."""
+    client, session_maker = concurrent_env
+
+    async with session_maker() as session:
+        farmer = Farmer(name="Retry Farmer", location="Coorg Estate", bio="Coffee and pepper")
+        session.add(farmer)
+        await session.flush()
+        pepper = Product(name="Pepper", price=80.0, stock_qty=100, unit="kg", farmer_id=farmer.id)
+        session.add(pepper)
+        await session.commit()
+        product_id = pepper.id
+
+    payload = {
+        "customer_name": "Flaky Network",
+        "customer_email": "flaky@test.com",
+        "address": "1 Harvest Lane, Test City",
+        "total_price": 160.0,
+        "items": [{"product_id": product_id, "quantity": 2, "price": 80.0}],
+    }
+    responses = await asyncio.gather(*(
+        client.post("/api/v1/orders/", json=payload, headers={"Idempotency-Key": "same-tap"})
+        for _ in range(10)
+    ))
+
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.json()["order_id"] for r in responses}) == 1
+
+    async with session_maker() as session:
+        stock = (await session.execute(select(Product.stock_qty).where(Product.id == product_id))).scalar_one()
+        order_count = (await session.execute(select(func.count()).select_from(Order))).scalar_one()
+    assert stock == 98
+    assert order_count == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_holds_never_overcommit(concurrent_env, monkeypatch):
+    """Simultaneous carts never hold more than the stock, and held carts can all check out."""
+    from app.core.config import settings
+
+    # Each cart comes from its own client, as seen by a trusted proxy
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_HOPS", 1)
+    client, session_maker = concurrent_env
+
+    async with session_maker() as session:
+        farmer = Farmer(name="Drop Farmer", location="Nashik Valley", bio="Grapes")
+        session.add(farmer)
+        await session.flush()
+        grapes = Product(name="Grapes", price=60.0, stock_qty=INITIAL_STOCK, unit="kg", farmer_id=farmer.id)
+        session.add(grapes)
+        await session.commit()
+        product_id = grapes.id
+
+    responses = await asyncio.gather(*(
+        client.post(
+            "/api/v1/cart/holds",
+            json={"items": [{"product_id": product_id, "quantity": 2}]},
+            headers={"X-Forwarded-For": f"10.0.0.{index}"},
+        )
+        for index in range(50)
+    ))
+    held = [r.json()["hold_id"] for r in responses if r.status_code == 200]
+    assert len(held) == INITIAL_STOCK // 2
+    assert all(r.status_code == 400 for r in responses if r.status_code != 200)
+
+    checkouts = await asyncio.gather(*(
+        client.post("/api/v1/orders/", json={
+            "customer_name": f"Holder {index}",
+            "customer_email": f"holder{index}@test.com",
+            "address": "1 Harvest Lane, Test City",
+            "total_price": 120.0,
+            "hold_id": hold_id,
+            "items": [{"product_id": product_id, "quantity": 2, "price": 60.0}],
+        })
+        for index, hold_id in enumerate(held)
+    ))
+    assert all(r.status_code == 200 for r in checkouts)
+
+    async with session_maker() as session:
+        stock = (await session.execute(select(Product.stock_qty).where(Product.id == product_id))).scalar_one()
+        holds = (await session.execute(select(func.count()).select_from(StockHold))).scalar_one()
+    assert (stock, holds) == (0, 0)
+
+
+async def _seed_cancellable_order(session_maker) -> tuple:
+    """One admin, two products and a pending order for 3 + 4 of them. Returns (token, order_id, product ids)."""
+    async with session_maker() as session:
+        admin = User(email="racer@test.com", hashed_password=get_password_hash("TestPass123"), role="admin")
+        farmer = Farmer(name="Berry Farmer", location="Mahabaleshwar", bio="Strawberries")
+        session.add_all([admin, farmer])
+        await session.flush()
+        berries = Product(name="Strawberries", price=120.0, stock_qty=10, unit="box", farmer_id=farmer.id)
+        mulberries = Product(name="Mulberries", price=90.0, stock_qty=10, unit="box", farmer_id=farmer.id)
+        session.add_all([berries, mulberries])
+        await session.flush()
+        order = Order(customer_name="Race Customer", customer_email="race@test.com",
+                      address="1 Harvest Lane, Test City", total_price=840.0, status="confirmed")
+        session.add(order)
+        await session.flush()
+        session.add_all([
+            OrderItem(order_id=order.id, product_id=berries.id, quantity=1, price_at_time=120.0),
+            OrderItem(order_id=order.id, product_id=berries.id, quantity=2, price_at_time=120.0),
+            OrderItem(order_id=order.id, product_id=mulberries.id, quantity=4, price_at_time=90.0),
+        ])
+        await session.commit()
+        token = create_access_token(data={"sub": admin.email, "role": admin.role})
+        return token, order.id, (berries.id, mulberries.id)
+
+
+async def _stock(session_maker, product_ids) -> list:
+    async with session_maker() as session:
+        result = await session.execute(
+            select(Product.stock_qty).where(Product.id.in_(product_ids)).order_by(Product.id)
+        )
+        return list(result.scalars())
+
+
+@pytest.mark.asyncio
+async def test_concurrent_cancels_restore_stock_once(concurrent_env):
+    """Simultaneous cancels of one order succeed once and restore each product once."""
+    client, session_maker = concurrent_env
+    token, order_id, product_ids = await _seed_cancellable_order(session_maker)
+
+    responses = await asyncio.gather(*(
+        client.patch(f"/api/v1/orders/{order_id}/cancel", headers=auth_header(token))
+        for _ in range(10)
+    ))
+
+    assert sum(r.status_code == 200 for r in responses) == 1
+    assert all(r.status_code in (400, 409) for r in responses if r.status_code != 200)
+    assert await _stock(session_maker, product_ids) == [13, 14]
+
+
+@pytest.mark.asyncio
+async def test_cancel_racing_status_update(concurrent_env):
+    """A cancel and a delivery racing each other leave a consistent order and stock."""
+    client, session_maker = concurrent_env
+    token, order_id, product_ids = await _seed_cancellable_order(session_maker)
+
+    cancel, deliver = await asyncio.gather(
+        client.patch(f"/api/v1/orders/{order_id}/cancel", headers=auth_header(token)),
+        client.patch(f"/api/v1/orders/{order_id}/status", params={"status": "delivered"},
+                     headers=auth_header(token)),
+    )
+
+    async with session_maker() as session:
+        status = (await session.execute(select(Order.status).where(Order.id == order_id))).scalar_one()
+    stock = await _stock(session_maker, product_ids)
+    if cancel.status_code == 200:
+        assert deliver.status_code in (400, 409)
+        assert (status, stock) == ("cancelled", [13, 14])
+    else:
+        assert deliver.status_code == 200
+        assert (status, stock) == ("delivered", [10, 10])
+
+
+async def _seed_product(session_maker, stock_qty: int) -> int:
+    async with session_maker() as session:
+        farmer = Farmer(name="Lock Farmer", location="Test Location", bio="Test bio")
+        session.add(farmer)
+        await session.flush()
+        product = Product(name="Jackfruit", price=150.0, stock_qty=stock_qty, unit="piece", farmer_id=farmer.id)
+        session.add(product)
+        await session.commit()
+        return product.id
+
+
+def _line(product_id: int, quantity: int) -> list:
+    return [OrderItemCreate(product_id=product_id, quantity=quantity, price=150.0)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+async def test_postgres_interleaved_reservations_recheck_stock(postgres_env):
+    """A reservation blocked on another's row lock rechecks stock after it commits."""
+    _, session_maker = postgres_env
+    product_id = await _seed_product(session_maker, stock_qty=5)
+
+    async with session_maker() as first, session_maker() as second:
+        await reserve_stock(first, _line(product_id, 4))
+        blocked = asyncio.create_task(reserve_stock(second, _line(product_id, 3)))
+        await asyncio.sleep(0.5)
+        assert not blocked.done()
+
+        await first.commit()
+        with pytest.raises(StockReservationError) as exc:
+            await blocked
+        await second.rollback()
+
+    assert exc.value.failures[0]["available"] == 1
+    assert await _stock(session_maker, [product_id]) == [1]
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+async def test_postgres_interleaved_reservations_both_fit(postgres_env):
+    """When both reservations fit, the blocked one succeeds on the committed stock."""
+    _, session_maker = postgres_env
+    product_id = await _seed_product(session_maker, stock_qty=5)
+
+    async with session_maker() as first, session_maker() as second:
+        await reserve_stock(first, _line(product_id, 2))
+        blocked = asyncio.create_task(reserve_stock(second, _line(product_id, 3)))
+        await asyncio.sleep(0.5)
+        assert not blocked.done()
+
+        await first.commit()
+        reserved = await blocked
+        await second.commit()
+
+    assert reserved[product_id]["stock_qty"] == 0
+    assert await _stock(session_maker, [product_id]) == [0]
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+async def test_postgres_checkout_waits_for_new_hold(postgres_env):
+    """A checkout blocked behind a hold being placed counts that hold once it commits."""
+    _, session_maker = postgres_env
+    product_id = await _seed_product(session_maker, stock_qty=5)
+
+    async with session_maker() as holder, session_maker() as buyer:
+        await place_holds(holder, _line(product_id, 4))
+        blocked = asyncio.create_task(reserve_stock(buyer, _line(product_id, 3)))
+        await asyncio.sleep(0.5)
+        assert not blocked.done()
+
+        await holder.commit()
+        with pytest.raises(StockReservationError) as exc:
+            await blocked
+        await buyer.rollback()
+
+    assert exc.value.failures[0]["available"] == 1
+    assert await _stock(session_maker, [product_id]) == [5]
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+async def test_postgres_concurrent_holds_respect_client_cap(postgres_env, monkeypatch):
+    """Simultaneous carts of one client on different products never exceed its total cap."""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "CART_HOLD_MAX_UNITS_PER_CLIENT", 50)
+    client, session_maker = postgres_env
+    product_ids = [await _seed_product(session_maker, stock_qty=100) for _ in range(10)]
+
+    responses = await asyncio.gather(*(
+        client.post("/api/v1/cart/holds", json={"items": [{"product_id": product_id, "quantity": 10}]})
+        for product_id in product_ids
+    ))
+
+    assert sum(r.status_code == 200 for r in responses) == 5
+    assert all(r.status_code == 429 for r in responses if r.status_code != 200)
+    async with session_maker() as session:
+        held = (await session.execute(select(func.sum(StockHold.quantity)))).scalar_one()
+    assert held == 50
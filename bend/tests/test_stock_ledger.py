@@ -0,0 +1,242 @@
+"""
+Tests for the stock ledger (app/utils/ledger.py) and its endpoints
+(GET /api/v1/products/{id}/stock/history, GET .../stock/at, POST /api/v1/products/stock/snapshots).
+
+Set TEST_POSTGRES_URL to also run concurrent snapshot runs against a local Postgres.
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, insert, func
+
+from app.models.ledger import StockMovement, StockSnapshot
+from app.models.product import Product, Farmer
+from app.utils.ledger import record_opening_balances, take_snapshots, stock_at, snapshot_stock, _lock_snapshot_runs
+from tests.conftest import auth_header
+
+
+async def _history(client: AsyncClient, token: str, product_id: int, **params) -> list:
+    response = await client.get(
+        f"/api/v1/products/{product_id}/stock/history", params=params, headers=auth_header(token)
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["items"]
+
+
+@pytest.mark.asyncio
+async def test_stock_changes_are_recorded(client: AsyncClient, test_session, test_product, farmer_token):
+    """Every write to stock appends a movement; the ledger sums to stock_qty."""
+    await record_opening_balances(test_session)
+    await test_session.commit()
+
+    response = await client.patch(
+        f"/api/v1/products/{test_product.id}/stock", params={"qty": 60}, headers=auth_header(farmer_token)
+    )
+    assert response.status_code == 200
+    response = await client.post("/api/v1/orders/", json={
+        "customer_name": "Test Customer",
+        "customer_email": "customer@test.com",
+        "address": "123 Test Street",
+        "total_price": 200.0,
+        "items": [
+            {"product_id": test_product.id, "quantity": 3, "price": 50.0},
+            {"product_id": test_product.id, "quantity": 1, "price": 50.0},
+        ],
+    })
+    order_id = response.json()["order_id"]
+    response = await client.patch(f"/api/v1/orders/{order_id}/cancel", headers=auth_header(farmer_token))
+    assert response.status_code == 200
+    response = await client.patch(
+        "/api/v1/products/stock",
+        json={"items": [{"product_id": test_product.id, "stock_qty": 40}]},
+        headers=auth_header(farmer_token),
+    )
+    assert response.status_code == 200
+
+    history = await _history(client, farmer_token, test_product.id)
+    assert [(m["reason"], m["delta"], m["order_id"]) for m in reversed(history)] == [
+        ("opening", 100.0, None),
+        ("adjustment", -40.0, None),
+        ("order", -4.0, order_id),
+        ("cancellation", 4.0, order_id),
+        ("adjustment", -20.0, None),
+    ]
+    assert history[0]["user_id"] is not None
+
+    total = await test_session.scalar(
+        select(func.sum(StockMovement.delta)).where(StockMovement.product_id == test_product.id)
+    )
+    assert total == await test_session.scalar(select(Product.stock_qty).where(Product.id == test_product.id))
+
+    # Keyset pages and filters
+    first = await client.get(
+        f"/api/v1/products/{test_product.id}/stock/history",
+        params={"page_size": 2}, headers=auth_header(farmer_token),
+    )
+    second = await _history(client, farmer_token, test_product.id, page_size=10, cursor=first.json()["next_cursor"])
+    assert [m["id"] for m in first.json()["items"] + second] == [m["id"] for m in history]
+    assert len(await _history(client, farmer_token, test_product.id, reason="adjustment")) == 2
+
+
+@pytest.mark.asyncio
+async def test_new_and_imported_products_are_recorded(client: AsyncClient, test_session, test_product, farmer_token):
+    """Creating and importing products records their stock without an opening balance."""
+    response = await client.post("/api/v1/products/upsert", data={
+        "name": "Okra", "price": 30, "stock_qty": 12, "unit": "kg", "farmer_id": test_product.farmer_id,
+    }, headers=auth_header(farmer_token))
+    assert response.status_code == 200
+    content = "name,price,unit,stock_qty\nOkra,30,kg,20\nBeans,25,kg,8\n"
+    response = await client.post(
+        "/api/v1/products/import",
+        files={"file": ("harvest.csv", content.encode(), "text/csv")},
+        headers=auth_header(farmer_token),
+    )
+    assert response.json()["failed"] == 0
+
+    result = await test_session.execute(
+        select(Product.name, StockMovement.reason, StockMovement.delta)
+        .join(Product, Product.id == StockMovement.product_id)
+        .order_by(StockMovement.id)
+    )
+    assert [tuple(row) for row in result] == [
+        ("Okra", "created", 12.0),
+        ("Beans", "import", 8.0),
+        ("Okra", "import", 8.0),
+    ]
+    assert await record_opening_balances(test_session) == 1  # Test Tomatoes only
+
+
+@pytest.mark.asyncio
+async def test_snapshots_and_stock_at(test_session, test_product):
+    """Stock at any time is the nearest snapshot plus the movements after it."""
+    start = datetime(2026, 6, 1, 6, 0)
+    deltas = [100, -10, -5, 20, -30, -15]
+    await test_session.execute(insert(StockMovement), [
+        {"product_id": test_product.id, "created_at": start + timedelta(hours=hour), "delta": delta, "reason": "adjustment"}
+        for hour, delta in enumerate(deltas)
+    ])
+    expected = lambda hours: float(sum(deltas[:hours + 1]))
+
+    # No snapshot yet: the whole ledger is replayed
+    state = await stock_at(test_session, test_product.id, start + timedelta(hours=4, minutes=30))
+    assert (state["stock_qty"], state["snapshot_at"], state["movements_replayed"]) == (expected(4), None, 5)
+
+    assert await take_snapshots(test_session, until=start + timedelta(hours=2)) == 1
+    assert await take_snapshots(test_session, until=start + timedelta(hours=1)) == 0
+    assert await take_snapshots(test_session, until=start + timedelta(hours=4)) == 1
+    # Nothing moved since: no snapshot is written
+    assert await take_snapshots(test_session, until=start + timedelta(hours=4, minutes=30)) == 0
+
+    snapshots = await test_session.execute(select(StockSnapshot.taken_at, StockSnapshot.stock_qty).order_by(StockSnapshot.taken_at))
+    assert [tuple(row) for row in snapshots] == [
+        (start + timedelta(hours=2), expected(2)),
+        (start + timedelta(hours=4), expected(4)),
+    ]
+
+    for hours, replayed in [(0, 1), (2, 0), (3, 1), (5, 1)]:
+        state = await stock_at(test_session, test_product.id, start + timedelta(hours=hours))
+        assert (state["stock_qty"], state["movements_replayed"]) == (expected(hours), replayed)
+    state = await stock_at(test_session, test_product.id, start - timedelta(days=1))
+    assert (state["stock_qty"], state["movements_replayed"]) == (0.0, 0)
+
+
+@pytest.mark.asyncio
+async def test_ledger_endpoints_access(client: AsyncClient, test_session, test_product, farmer_token, admin_token):
+    """Farmers only see their own products' ledgers; snapshot runs are admin only."""
+    other = Farmer(name="Other Farmer", location="Other Location")
+    test_session.add(other)
+    await test_session.flush()
+    theirs = Product(name="Their Beans", price=10.0, stock_qty=5, unit="kg", farmer_id=other.id)
+    test_session.add(theirs)
+    await test_session.commit()
+
+    response = await client.get(f"/api/v1/products/{theirs.id}/stock/history", headers=auth_header(farmer_token))
+    assert response.status_code == 403
+    response = await client.get("/api/v1/products/9999/stock/history", headers=auth_header(admin_token))
+    assert response.status_code == 404
+    response = await client.post("/api/v1/products/stock/snapshots", headers=auth_header(farmer_token))
+    assert response.status_code == 403
+
+    response = await client.post("/api/v1/products/stock/snapshots", headers=auth_header(admin_token))
+    assert response.json()["opening_balances"] == 2
+    response = await client.get(
+        f"/api/v1/products/{theirs.id}/stock/at",
+        params={"at": (datetime.utcnow() + timedelta(minutes=1)).isoformat()},
+        headers=auth_header(admin_token),
+    )
+    assert (response.json()["stock_qty"], response.json()["movements_replayed"]) == (5.0, 1)
+
+
+@pytest.mark.asyncio
+async def test_opening_balance_after_earlier_movements(client: AsyncClient, test_session, test_product):
+    """A product that moved before the first run opens at its stock net of those movements."""
+    product_id = test_product.id
+    response = await client.post("/api/v1/orders/", json={
+        "customer_name": "Test Customer",
+        "customer_email": "customer@test.com",
+        "address": "123 Test Street, Test City",
+        "total_price": 250.0,
+        "items": [{"product_id": product_id, "quantity": 5, "price": 50.0}],
+    })
+    assert response.status_code == 200, response.text
+
+    assert await snapshot_stock(test_session, until=datetime.utcnow() + timedelta(minutes=1)) == {
+        "opening_balances": 1, "snapshots": 1,
+    }
+    state = await stock_at(test_session, product_id, datetime.utcnow() + timedelta(minutes=2))
+    assert state["stock_qty"] == 95.0
+    # Balanced now, so later runs add nothing
+    assert await record_opening_balances(test_session) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+async def test_postgres_concurrent_snapshot_runs(postgres_env):
+    """A run started while another is in progress waits for it and never double-counts."""
+    _, session_maker = postgres_env
+    start = datetime(2026, 6, 1, 6, 0)
+    async with session_maker() as session:
+        farmer = Farmer(name="Ledger Farmer", location="Test Location")
+        session.add(farmer)
+        await session.flush()
+        product = Product(name="Test Tomatoes", price=50.0, stock_qty=80, unit="kg", farmer_id=farmer.id)
+        session.add(product)
+        await session.flush()
+        await session.execute(insert(StockMovement), [
+            {"product_id": product.id, "created_at": start + timedelta(hours=hour), "delta": delta, "reason": "adjustment"}
+            for hour, delta in enumerate([100, -10, -10])
+        ])
+        await session.commit()
+        product_id = product.id
+
+    async with session_maker() as first, session_maker() as second:
+        await _lock_snapshot_runs(first)
+        waiting = asyncio.create_task(snapshot_stock(second, until=start + timedelta(hours=3)))
+        await asyncio.sleep(0.5)
+        assert not waiting.done()
+
+        assert await take_snapshots(first, until=start + timedelta(hours=1)) == 1
+        await first.commit()
+        assert await waiting == {"opening_balances": 0, "snapshots": 1}
+
+    async with session_maker() as session:
+        snapshots = await session.execute(
+            select(StockSnapshot.taken_at, StockSnapshot.stock_qty).order_by(StockSnapshot.taken_at)
+        )
+        assert [tuple(row) for row in snapshots] == [
+            (start + timedelta(hours=1), 90.0),
+            (start + timedelta(hours=3), 80.0),
+        ]
+
+    # Simultaneous runs record one opening balance per product
+    async with session_maker() as session:
+        session.add(Product(name="Unledgered Beans", price=10.0, stock_qty=5, unit="kg", farmer_id=farmer.id))
+        await session.commit()
+    sessions = [session_maker() for _ in range(5)]
+    results = await asyncio.gather(*(snapshot_stock(session) for session in sessions))
+    for session in sessions:
+        await session.close()
+    assert sum(r["opening_balances"] for r in results) == 1
@@ -18,6 +18,7 @@ async def test_list_users_admin(client: AsyncClient, admin_token):
     data = response.json()
     assert isinstance(data, list)
     assert len(data) >= 1
+    assert set(data[0]) == {"id", "email", "role", "farmer_id"}
 
 
 @pytest.mark.asyncio